@@ -1,6 +1,8 @@
 '''
 Class for parsing the input string using user-input production and parse tables.
 '''
+from collections import deque
+
 class Parser:
   def __init__(self):
     self.prod_table = []
@@ -8,7 +10,7 @@ class Parser:
     self.tokens= set()
 
     self.stack = []
-    self.input_buffer = []
+    self.input_buffer = deque()
     self.action = []
     self.total_output = []
     
@@ -105,7 +107,7 @@ class Parser:
       return(self.is_valid, self.error_message, 'Error: Invalid input')
 
     # Initialize the input buffer and stack
-    self.input_buffer = input_string.strip().split(' ')
+    self.input_buffer = deque(input_string.strip().split(' '))
     self.stack.append('$')
     self.stack.append(self.prod_table[0][1])
     
@@ -120,7 +122,7 @@ class Parser:
       # If the symbol and input match, pop the stack and input buffer
       if(current_symbol == current_input):
         self.action.append(f'Match {current_symbol}')
-        self.input_buffer.pop(0)
+        self.input_buffer.popleft()
         self.total_output.append([' '.join(self.stack[::-1]), ' '.join(self.input_buffer) + '$', self.action[-1]])
         
         current_symbol = self.stack.pop()
@@ -0,0 +1,139 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from compile_cache import CompileCache # On-disk cache of compilations
+from compiler import compile_source # Headless compilation
+from grammar import Grammar, load_grammar # Import the compiled grammar
+
+# Kinds of errors reported for a file
+ERROR_KINDS = ("lexical", "syntax", "semantic", "file", "internal")
+
+class FileReport:
+  """
+    Errors found while compiling one file of a batch, by kind.
+  """
+  def __init__(self, path: str, errors: dict[str, list[str]]):
+    self.path = path
+    self.errors = errors # Kind -> error messages, only the kinds with errors
+
+  @property
+  def is_valid(self):
+    return not self.errors
+
+  def to_dict(self):
+    return {"path": self.path, "valid": self.is_valid, "errors": self.errors}
+
+class BatchReport:
+  """
+    Errors of every file of a batch, in the order the files were given.
+  """
+  def __init__(self, files: list[FileReport]):
+    self.files = files
+
+  def count(self, kind: str):
+    """
+      Gets the number of files with errors of the given kind.
+    """
+    return sum(1 for file in self.files if kind in file.errors)
+
+  @property
+  def invalid_files(self):
+    return [file for file in self.files if not file.is_valid]
+
+  def summary(self):
+    counts = ", ".join(f"{kind} {self.count(kind)}" for kind in ERROR_KINDS if self.count(kind))
+    summary = f"{len(self.files)} files, {len(self.files) - len(self.invalid_files)} valid, {len(self.invalid_files)} with errors"
+    return f"{summary} ({counts})" if counts else summary
+
+  def format(self):
+    """
+      Gets the report as text, the errors of every invalid file followed by the summary.
+    """
+    lines = []
+    for file in self.invalid_files:
+      lines.append(f"{file.path}:")
+      for kind, errors in file.errors.items():
+        lines += [f"  [{kind}] {error}" for error in errors]
+    lines.append(self.summary())
+    return "\n".join(lines)
+
+  def to_dict(self):
+    return {
+      "files": [file.to_dict() for file in self.files],
+      "summary": {"files": len(self.files), "invalid": len(self.invalid_files), **{kind: self.count(kind) for kind in ERROR_KINDS}},
+    }
+
+def classify_error(error: str):
+  """
+    Gets the kind of a compilation error from its message.
+  """
+  if error.startswith("Semantic Error"):
+    return "semantic"
+  if error.startswith("Lexical Analysis failed") or "| Invalid word:" in error:
+    return "lexical"
+  return "syntax"
+
+def find_sources(paths: list[str]):
+  """
+    Gets the .iol files of the given paths, directories are searched recursively in name order.
+  """
+  sources = []
+  for path in paths:
+    if not os.path.isdir(path):
+      sources.append(path)
+      continue
+
+    for directory, subdirectories, file_names in os.walk(path):
+      subdirectories.sort()
+      sources += [os.path.join(directory, file_name) for file_name in sorted(file_names) if file_name.endswith(".iol")]
+  return sources
+
+# Grammar and compile cache of a worker process, set once when the worker starts
+_worker_grammar = None
+_worker_cache = None
+
+def _initialize_worker(grammar: Grammar, cache_directory: str | None):
+  global _worker_grammar, _worker_cache
+  _worker_grammar = grammar
+  _worker_cache = CompileCache(cache_directory) if cache_directory is not None else None
+
+def compile_file(path: str, grammar: Grammar | None = None, cache: CompileCache | None = None):
+  """
+    Compiles one file and collects its errors by kind, a file that cannot be read or crashes the compiler is reported too.
+  """
+  try:
+    with open(path, "r") as file:
+      source = file.read()
+  except (OSError, UnicodeDecodeError) as error:
+    return FileReport(path, {"file": [str(error)]})
+
+  try:
+    result = compile_source(source, grammar if grammar is not None else _worker_grammar, cache=cache if cache is not None else _worker_cache)
+  except Exception as error: # Malformed programs the parser cannot handle
+    return FileReport(path, {"internal": [f"{type(error).__name__}: {error}"]})
+
+  errors = {}
+  for error in result.errors:
+    errors.setdefault(classify_error(error), []).append(error)
+  return FileReport(path, errors)
+
+def compile_files(paths: list[str], jobs: int | None = None, grammar: Grammar | None = None, cache_directory: str | None = None):
+  """
+    Compiles many files over a pool of processes and aggregates their errors into a single report.
+    The compiled grammar is sent to every worker process once, when it starts.
+    @param paths: Paths of the .iol files.
+    @param jobs: Number of worker processes, the number of CPUs if None. 1 compiles in this process.
+    @param grammar: The grammar used by the parser, the default grammar files if None.
+    @param cache_directory: Directory of a compile cache shared by the workers, unchanged files are not compiled again.
+  """
+  grammar = grammar if grammar is not None else load_grammar()
+  jobs = jobs or os.cpu_count() or 1
+
+  if jobs == 1 or len(paths) <= 1:
+    cache = CompileCache(cache_directory) if cache_directory is not None else None
+    return BatchReport([compile_file(path, grammar, cache) for path in paths])
+
+  # Several files per task, so the cost of sending a task is shared by its files
+  chunk_size = max(1, len(paths) // (jobs * 8))
+  with ProcessPoolExecutor(max_workers=jobs, initializer=_initialize_worker, initargs=(grammar, cache_directory)) as executor:
+    return BatchReport(list(executor.map(compile_file, paths, chunksize=chunk_size)))
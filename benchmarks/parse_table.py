@@ -0,0 +1,82 @@
+# Micro-benchmark of the parse table lookup done on every nonterminal expansion
+# Compares the linear scan of the parse table rows and header with the indexed LL(1) table.
+# Run from the project root: python -m benchmarks.parse_table [token_count]
+
+import sys
+import time
+
+from benchmarks.token_memory import generate_program
+from lexical_analyzer import LexicalAnalyzer
+from parser import Parser
+from symbol_table import SymbolTable
+
+class RecordingRow(dict):
+  """
+    Row of the LL(1) table that records every lookup made by the parser.
+  """
+  def __init__(self, nonterminal: str, entries: dict, steps: list):
+    super().__init__(entries)
+    self.nonterminal = nonterminal
+    self.steps = steps
+
+  def get(self, terminal, default = None):
+    self.steps.append((self.nonterminal, terminal))
+    return super().get(terminal, default)
+
+def linear_lookup(parser: Parser, nonterminal: str, terminal: str):
+  """
+    Expansion lookup as done before the LL(1) table: scan for the row and column, then split the production.
+  """
+  parse_row = next((ind for ind, X in enumerate(parser.parse_table) if X[0] == nonterminal), None)
+  parse_col = next((ind for ind, X in enumerate(parser.parse_table[0]) if X == terminal), None)
+  if parse_row == None or parse_col == None or parser.parse_table[parse_row][parse_col] == '':
+    return None
+
+  parse_cell = parser.parse_table[parse_row][parse_col]
+  production_name = parser.prod_table[int(parse_cell) - 1][1]
+  production_symbols = parser.prod_table[int(parse_cell) - 1][2].strip().split(' ')
+  return production_name, production_symbols
+
+def indexed_lookup(parser: Parser, nonterminal: str, terminal: str):
+  """
+    Expansion lookup through the LL(1) table.
+  """
+  return parser.ll1_table.get(nonterminal, {}).get(terminal)
+
+def tokenize(source: str):
+  """
+    Tokenizes the source and loads its variables into a new symbol table.
+  """
+  lexer = LexicalAnalyzer(single_pass=True, compact=True)
+  lexer.tokenizeInput(source)
+  symbol_table = SymbolTable()
+  for variable in lexer.getVariables():
+    symbol_table.add_symbol(variable["name"], variable["data_type"], variable["value"])
+  return lexer.getOutput(), symbol_table
+
+if __name__ == "__main__":
+  token_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+  tokens, symbol_table = tokenize(generate_program(token_count, 100))
+
+  # Record the expansions of a full parse
+  parser = Parser(symbol_table)
+  steps = []
+  ll1_table = parser.ll1_table
+  parser.ll1_table = {nonterminal: RecordingRow(nonterminal, entries, steps) for nonterminal, entries in ll1_table.items()}
+  parser.parse(tokens)
+  parser.ll1_table = ll1_table
+  print(f"Program: {token_count} tokens, {len(steps)} expansions")
+
+  for label, lookup in (("linear scan", linear_lookup), ("LL(1) table", indexed_lookup)):
+    start = time.perf_counter()
+    for nonterminal, terminal in steps:
+      lookup(parser, nonterminal, terminal)
+    elapsed = time.perf_counter() - start
+    print(f"{label:12} lookups {len(steps) / elapsed:12,.0f} steps/s")
+
+  # Full parse with the LL(1) table
+  parser = Parser(symbol_table)
+  start = time.perf_counter()
+  parser.parse(tokens)
+  elapsed = time.perf_counter() - start
+  print(f"{'full parse':12} {len(steps) / elapsed:12,.0f} expansions/s ({elapsed:.2f} s)")
@@ -0,0 +1,33 @@
+# Scaling benchmark of Parser.parse on programs written on a single line
+# The whole line sits in the input buffer, so consuming a token must not depend on the buffer length.
+# Run from the project root: python -m benchmarks.parser_scaling [token_count ...]
+
+import sys
+import time
+
+from benchmarks.parse_table import tokenize
+from parser import Parser
+
+def generate_line_program(token_count: int):
+  """
+    Generates an IOL program with roughly the given number of tokens, all on one line.
+  """
+  statements = ["INT num IS 1"]
+  tokens = 6
+  while tokens < token_count:
+    statements.append("INTO num IS ADD num 1 PRINT num NEWLN")
+    tokens += 9
+  return "IOL " + " ".join(statements) + " LOI"
+
+if __name__ == "__main__":
+  sizes = [int(size) for size in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+
+  for token_count in sizes:
+    tokens, symbol_table = tokenize(generate_line_program(token_count))
+    parser = Parser(symbol_table)
+
+    start = time.perf_counter()
+    parser.parse(tokens)
+    elapsed = time.perf_counter() - start
+
+    print(f"{token_count:>10,} tokens | {elapsed:7.3f} s | {elapsed / token_count * 1e6:6.2f} us/token | errors: {len(parser.errors)}")
@@ -0,0 +1,105 @@
+# Benchmark of the bytecode virtual machine
+# Compiles arithmetic-heavy generated programs from their syntax tree, runs them with Runtime.run_program
+# before and after optimisation, and checks that both write the same output.
+# Run from the project root: python -m benchmarks.runtime_vm [statement_count] [repeat]
+
+import random
+import sys
+import time
+
+from benchmarks.parse_table import tokenize
+from bytecode import BytecodeCompiler
+from optimizer import Optimizer
+from parser import Parser
+from runtime import Runtime
+
+class BufferRuntime(Runtime):
+  """
+    Runtime collecting its output in a list.
+  """
+  def __init__(self):
+    super().__init__(None)
+    self.output = []
+
+  def _write(self, text):
+    self.output.append(str(text))
+
+def generate_expression(variables: list[str], depth: int, random_generator: random.Random):
+  """
+    Generates a prefix expression of the given depth without divisions, so it always evaluates to an integer.
+  """
+  if depth == 0:
+    return random_generator.choice(variables) if random_generator.random() < 0.6 else str(random_generator.randint(1, 99))
+  operator = random_generator.choice(["ADD", "SUB", "MULT", "MOD"])
+  right = generate_expression(variables, depth - 1, random_generator)
+  if operator == "MOD":
+    right = str(random_generator.randint(1, 99)) # Keep the divisor nonzero
+  return f"{operator} {generate_expression(variables, depth - 1, random_generator)} {right}"
+
+def generate_arithmetic_program(statement_count: int, variable_count: int = 50, depth: int = 4, seed: int = 129):
+  """
+    Generates an IOL program of assignments with nested expressions, printing some of the results.
+  """
+  random_generator = random.Random(seed)
+  variables = [f"v{i}" for i in range(variable_count)]
+  lines = ["IOL"]
+  lines += [f"INT {variable} IS {i + 1}" for i, variable in enumerate(variables)]
+
+  for i in range(statement_count):
+    target = variables[i % variable_count]
+    # MOD keeps the values small so the timing measures dispatch rather than big integer arithmetic
+    lines.append(f"INTO {target} IS MOD {generate_expression(variables, depth, random_generator)} 1000")
+    if i % 10 == 0:
+      lines.append(f"PRINT {target} NEWLN")
+
+  lines.append("LOI")
+  return "\n".join(lines)
+
+def best_time(function, repeat: int):
+  """
+    Gets the best elapsed time of several calls of the function.
+  """
+  best = float("inf")
+  for _ in range(repeat):
+    start = time.perf_counter()
+    function()
+    best = min(best, time.perf_counter() - start)
+  return best
+
+if __name__ == "__main__":
+  statement_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+  repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+  source = generate_arithmetic_program(statement_count)
+  tokens, symbol_table = tokenize(source)
+  token_count = sum(len(line) for line in tokens.values())
+  print(f"Program: {statement_count:,} statements, {token_count:,} tokens")
+
+  initial_values = {name: symbol["value"] for name, symbol in symbol_table.get_symbol_table().items()}
+  def reset_symbols():
+    for name, value in initial_values.items():
+      symbol_table.update_symbol(name, value)
+
+  parser = Parser(symbol_table)
+  parser.parse(tokens)
+  program = BytecodeCompiler().compile(parser.tree, symbol_table)
+  optimized_program = Optimizer().optimize(program)
+
+  # Both programs start from the same values, the runs overwrite them
+  outputs = {}
+  def run_vm(name, program):
+    reset_symbols()
+    runtime = BufferRuntime()
+    runtime.run_program(program, symbol_table)
+    outputs[name] = runtime.output
+
+  compile_time = best_time(lambda: BytecodeCompiler().compile(parser.tree, symbol_table), repeat)
+  optimize_time = best_time(lambda: Optimizer().optimize(program), repeat)
+  vm_time = best_time(lambda: run_vm("vm", program), repeat)
+  optimized_time = best_time(lambda: run_vm("optimized", optimized_program), repeat)
+
+  print(f"{'compile':14} {compile_time:8.3f} s ({len(program.code) // 2:,} instructions)")
+  print(f"{'optimize':14} {optimize_time:8.3f} s ({len(optimized_program.code) // 2:,} instructions)")
+  print(f"{'vm':14} {vm_time:8.3f} s")
+  print(f"{'optimized vm':14} {optimized_time:8.3f} s ({vm_time / optimized_time:.1f}x faster than the unoptimised program)")
+  print(f"Identical output: {outputs['vm'] == outputs['optimized']}")
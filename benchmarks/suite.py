@@ -0,0 +1,164 @@
+# Benchmark suite of the compiler phases on generated workloads
+# Times LexicalAnalyzer.tokenizeInput, Parser.parse, the bytecode compilation and the headless execution of
+# programs of every shape and size, with their throughput, peak memory and how their time scales with the size.
+# Results can be saved as JSON and compared with a previous run to find regressions.
+# Run from the project root: python -m benchmarks.suite [--sizes N ...] [--shapes NAME ...] [--output FILE] [--compare FILE]
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.workloads import WORKLOADS
+from compiler import compile_program
+from lexical_analyzer import LexicalAnalyzer
+from output_sink import CallbackSink
+from parser import Parser
+from runtime import Runtime
+from symbol_table import SymbolTable
+
+PHASES = ("lex", "parse", "compile", "run")
+
+def load_symbols(variables: list[dict]):
+  """
+    Gets a new symbol table holding the variables found by the lexical analyzer.
+  """
+  symbol_table = SymbolTable()
+  for variable in variables:
+    symbol_table.add_symbol(variable["name"], variable["data_type"], variable["value"])
+  return symbol_table
+
+def measure(setup, phase, repeat: int):
+  """
+    Gets the best elapsed time of the phase over several runs, and its peak traced memory in one more run.
+    The setup builds the argument of the phase and is not timed.
+  """
+  best = float("inf")
+  for _ in range(repeat):
+    argument = setup()
+    start = time.perf_counter()
+    phase(argument)
+    best = min(best, time.perf_counter() - start)
+
+  argument = setup()
+  tracemalloc.start()
+  phase(argument)
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  return best, peak
+
+def benchmark_source(source: str, repeat: int):
+  """
+    Benchmarks every phase on the source, returns the token count, the errors and the results of the phases.
+  """
+  lexer = LexicalAnalyzer(single_pass=True, compact=True)
+  lexer.tokenizeInput(source)
+  tokens = lexer.getOutput()
+  variables = lexer.getVariables()
+  token_count = sum(len(line) for line in tokens.values())
+
+  parser = Parser(load_symbols(variables))
+  parser.parse(tokens)
+  program, optimization_errors = compile_program(parser.tree, load_symbols(variables))
+  errors = lexer.errors + parser.errors + optimization_errors
+
+  def run(symbol_table):
+    Runtime(None, CallbackSink(lambda text: None)).run_program(program, symbol_table)
+
+  timings = {
+    "lex": measure(lambda: source, lambda source: LexicalAnalyzer(single_pass=True, compact=True).tokenizeInput(source), repeat),
+    "parse": measure(lambda: Parser(load_symbols(variables)), lambda parser: parser.parse(tokens), repeat),
+    "compile": measure(lambda: load_symbols(variables), lambda symbol_table: compile_program(parser.tree, symbol_table), repeat),
+    "run": measure(lambda: load_symbols(variables), run, repeat),
+  }
+
+  phases = {
+    phase: {"seconds": seconds, "tokens_per_second": token_count / seconds if seconds else None, "peak_bytes": peak}
+    for phase, (seconds, peak) in timings.items()
+  }
+  return token_count, errors, phases
+
+def scaling_exponents(results: list[dict], shape: str, phase: str):
+  """
+    Gets the exponent k of time ~ tokens^k between every two consecutive sizes of a shape, 1 for linear scaling.
+  """
+  points = sorted((result["tokens"], result["phases"][phase]["seconds"]) for result in results if result["shape"] == shape)
+  return [
+    math.log(seconds / previous_seconds) / math.log(tokens / previous_tokens)
+    for (previous_tokens, previous_seconds), (tokens, seconds) in zip(points, points[1:])
+    if previous_seconds > 0 and seconds > 0 and tokens != previous_tokens
+  ]
+
+def compare(results: list[dict], baseline: dict, threshold: float):
+  """
+    Prints the time of every phase relative to the baseline results, returns the number of regressions.
+  """
+  baseline_results = {(result["shape"], result["size"]): result for result in baseline["results"]}
+  regressions = 0
+
+  print(f"\nComparison with the baseline (regression above {threshold:.0%} slower)")
+  for result in results:
+    previous = baseline_results.get((result["shape"], result["size"]))
+    if previous is None:
+      continue
+    for phase in PHASES:
+      if phase not in previous["phases"]:
+        continue
+      ratio = result["phases"][phase]["seconds"] / previous["phases"][phase]["seconds"]
+      regressed = ratio > 1 + threshold
+      regressions += regressed
+      print(f"{result['shape']:18} {result['size']:>10,} {phase:8} {ratio:6.2f}x {'REGRESSION' if regressed else ''}")
+
+  return regressions
+
+def main(argv: list[str] | None = None):
+  argument_parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="Benchmark the compiler phases on generated IOL programs.")
+  argument_parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="program sizes in tokens")
+  argument_parser.add_argument("--shapes", nargs="+", choices=sorted(WORKLOADS), default=list(WORKLOADS), help="workload shapes")
+  argument_parser.add_argument("--repeat", type=int, default=3, help="runs of each phase, the best time is kept")
+  argument_parser.add_argument("--output", help="save the results to this JSON file")
+  argument_parser.add_argument("--compare", help="compare the results with this JSON file of a previous run")
+  argument_parser.add_argument("--threshold", type=float, default=0.1, help="slowdown reported as a regression, 0.1 is 10%%")
+  arguments = argument_parser.parse_args(argv)
+
+  results = []
+  print(f"{'shape':18} {'size':>10} {'tokens':>10} {'phase':8} {'seconds':>9} {'tokens/s':>12} {'peak MiB':>9}")
+  for shape in arguments.shapes:
+    for size in sorted(arguments.sizes):
+      token_count, errors, phases = benchmark_source(WORKLOADS[shape](size), arguments.repeat)
+      if errors: # The workloads are meant to be valid, a failing phase would not be comparable
+        print(f"{shape} {size}: {len(errors)} errors, first: {errors[0]}", file=sys.stderr)
+
+      results.append({"shape": shape, "size": size, "tokens": token_count, "errors": len(errors), "phases": phases})
+      for phase, result in phases.items():
+        print(f"{shape:18} {size:>10,} {token_count:>10,} {phase:8} {result['seconds']:9.4f} {result['tokens_per_second'] or 0:12,.0f} {result['peak_bytes'] / 2**20:9.1f}")
+
+  if len(arguments.sizes) > 1:
+    print("\nScaling exponent between consecutive sizes (1 is linear)")
+    for shape in arguments.shapes:
+      exponents = {phase: scaling_exponents(results, shape, phase) for phase in PHASES}
+      print(f"{shape:18} " + " | ".join(f"{phase} {' '.join(f'{exponent:.2f}' for exponent in exponents[phase])}" for phase in PHASES))
+
+  report = {
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "repeat": arguments.repeat,
+    "results": results,
+  }
+  if arguments.output:
+    with open(arguments.output, "w") as file:
+      json.dump(report, file, indent=2)
+
+  if arguments.compare:
+    with open(arguments.compare) as file:
+      regressions = compare(results, json.load(file), arguments.threshold)
+    if regressions:
+      return 1
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
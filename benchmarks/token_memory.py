@@ -0,0 +1,51 @@
+# Memory benchmark of the lexical analyzer output
+# Compares the dictionary of token lists with the compact TokenStream on a generated program.
+# Run from the project root: python -m benchmarks.token_memory [token_count]
+
+import sys
+import time
+import tracemalloc
+
+from lexical_analyzer import LexicalAnalyzer
+
+def generate_program(token_count: int, variable_count: int = 1000):
+  """
+    Generates an IOL program with roughly the given number of tokens.
+  """
+  lines = ["IOL"]
+  lines += [f"INT v{i} IS {i}" for i in range(variable_count)]
+  tokens = 2 + 4 * variable_count
+
+  i = 0
+  while tokens < token_count:
+    lines.append(f"INTO v{i % variable_count} IS ADD v{(i * 7) % variable_count} {i % 100} PRINT v{i % variable_count}")
+    tokens += 8
+    i += 1
+
+  lines.append("LOI")
+  return "\n".join(lines)
+
+def measure(source: str, compact: bool):
+  """
+    Tokenizes the source and returns the elapsed time, the retained and the peak memory of the lexer output.
+  """
+  start = time.perf_counter()
+  LexicalAnalyzer(single_pass=True, compact=compact).tokenizeInput(source)
+  elapsed = time.perf_counter() - start
+
+  tracemalloc.start()
+  lexer = LexicalAnalyzer(single_pass=True, compact=compact)
+  lexer.tokenizeInput(source)
+  retained, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  return elapsed, retained, peak
+
+if __name__ == "__main__":
+  token_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+  source = generate_program(token_count)
+  print(f"Program: {token_count} tokens, {len(source) / 2**20:.1f} MiB of source")
+
+  for label, compact in (("dict of token lists", False), ("TokenStream", True)):
+    elapsed, retained, peak = measure(source, compact)
+    print(f"{label:20} time {elapsed:6.2f} s | retained {retained / 2**20:8.1f} MiB | peak {peak / 2**20:8.1f} MiB")
@@ -0,0 +1,76 @@
+# Generators of synthetic IOL programs for the benchmark suite
+# Every generator takes a number of tokens and returns a valid program of roughly that size with a given shape.
+# The programs compile without errors and run without input, so every phase can be timed on them.
+
+def generate_declarations(token_count: int):
+  """
+    Generates a program made of integer declarations, one per line.
+  """
+  lines = ["IOL"]
+  tokens = 2
+  i = 0
+  while tokens < token_count:
+    lines.append(f"INT v{i} IS {i}")
+    tokens += 4
+    i += 1
+
+  lines.append("PRINT v0")
+  lines.append("LOI")
+  return "\n".join(lines)
+
+def generate_deep_expressions(token_count: int, depth: int = 200):
+  """
+    Generates a program of assignments whose prefix expressions nest depth operators deep.
+  """
+  operators = ("ADD", "SUB", "MULT")
+  lines = ["IOL", "INT x IS 1"]
+  tokens = 6
+  i = 0
+  while tokens < token_count:
+    # MULT by 1 and SUB keep the value of x small
+    expression = " ".join(operators[(i + level) % 3] for level in range(depth)) + " x" + " 1" * depth
+    lines.append(f"INTO x IS {expression}")
+    tokens += 3 + 2 * depth + 1
+    i += 1
+
+  lines.append("PRINT x")
+  lines.append("LOI")
+  return "\n".join(lines)
+
+def generate_print_sequence(token_count: int, variable_count: int = 10):
+  """
+    Generates a program of long lines of PRINT and NEWLN statements.
+  """
+  lines = ["IOL"]
+  lines += [f"INT v{i} IS {i}" for i in range(variable_count)]
+  tokens = 2 + 4 * variable_count
+
+  while tokens < token_count:
+    lines.append(" ".join(f"PRINT v{i} PRINT {i} NEWLN" for i in range(variable_count)))
+    tokens += 5 * variable_count
+
+  lines.append("LOI")
+  return "\n".join(lines)
+
+def generate_identifiers(token_count: int):
+  """
+    Generates a program where almost every identifier is new, with long names.
+  """
+  lines = ["IOL"]
+  tokens = 2
+  i = 0
+  while tokens < token_count:
+    lines.append(f"INT identifier{i:08d} IS {i} INTO identifier{i:08d} IS ADD identifier{i:08d} identifier{i // 2:08d}")
+    tokens += 10
+    i += 1
+
+  lines.append("LOI")
+  return "\n".join(lines)
+
+# Shape name -> generator
+WORKLOADS = {
+  "declarations": generate_declarations,
+  "deep_expressions": generate_deep_expressions,
+  "print_sequence": generate_print_sequence,
+  "identifiers": generate_identifiers,
+}
@@ -0,0 +1,297 @@
+from itertools import islice
+
+from symbol_table import SymbolTable
+from syntax_tree import SyntaxTree, Declaration, Assignment, Input, Print, NewLine, Operation, Variable, Literal
+
+# Opcodes of the IOL virtual machine, every instruction is an (opcode, argument) pair of the flat code
+PUSH_CONST = 0 # Push constants[argument]
+LOAD_INT = 1 # Push the value of the variable in slot argument, converted to an integer
+ADD = 2 # Pop two operands and push the result of the operation
+SUB = 3
+MULT = 4
+DIV = 5 # Division or modulo by zero fails with the message of divisions[argument]
+MOD = 6
+POP = 7 # Discard the result of an expression statement
+STORE = 8 # Pop a value into the variable in slot argument
+PRINT = 9 # Pop a value and write it
+PRINT_VAR = 10 # Write the value of the variable in slot argument
+PRINT_TEXT = 11 # Write constants[argument] as is
+NEWLN = 12 # Write a line break
+BEG = 13 # Read the variable described by inputs[argument]
+FAIL = 14 # Report the runtime error failures[argument] and stop the program
+LOAD = 15 # Push the value of the variable in slot argument as is
+HALT = 16 # End of the program
+
+OPCODE_NAMES = ("PUSH_CONST", "LOAD_INT", "ADD", "SUB", "MULT", "DIV", "MOD", "POP", "STORE", "PRINT", "PRINT_VAR", "PRINT_TEXT", "NEWLN", "BEG", "FAIL", "LOAD", "HALT")
+
+# Opcodes of the arithmetic operators
+ARITHMETIC_OPCODES = {"ADD": ADD, "SUB": SUB, "MULT": MULT, "DIV": DIV, "MOD": MOD}
+
+class Program:
+  """
+    Bytecode of an IOL program.
+    Variables are referenced by slot, the slot of their symbol in the symbol table, whose names are listed in variables.
+    The program is only valid for the symbol table it was compiled with, since the type checks are resolved at compile time.
+  """
+  def __init__(self, code: tuple, constants: tuple, variables: tuple, divisions: tuple, failures: tuple, inputs: tuple, lines: tuple = ()):
+    self.code = code # Flat (opcode, argument) pairs
+    self.constants = constants # Integer and text constants
+    self.variables = variables # Variable name of each slot of the symbol table
+    self.divisions = divisions # (line number, division by zero error message) of DIV and MOD instructions
+    self.failures = failures # Error messages of FAIL instructions
+    self.inputs = inputs # (slot, variable name, variable type, line number) of BEG instructions
+    self.lines = lines # Source line number of each instruction, empty if unknown
+
+  def disassemble(self):
+    """
+      Gets a readable listing of the code, one instruction per line.
+    """
+    return "\n".join(
+      f"{index // 2:>5} {self.lines[index // 2] if self.lines else '':>5} {OPCODE_NAMES[self.code[index]]:<12} {self.code[index + 1]}"
+      for index in range(0, len(self.code), 2)
+    )
+
+class _Unreachable(Exception):
+  """
+    Stops the compilation once the program can no longer go on, the rest of the statements are never executed.
+  """
+
+class BytecodeCompiler:
+  """
+    Compiles the syntax tree of a parsed IOL program into bytecode for Runtime.run_program.
+    The statements are compiled in order, and the checks the parser cannot resolve, such as undeclared variables
+    or STR variables used as integers, become instructions reporting the runtime error on the line of the value.
+  """
+  def __init__(self):
+    self.symbol_table = SymbolTable()
+    self.line_number = 1
+    self.checkpoints = [] # Sizes of the code and tables before each statement and before the last instruction of the last compile
+    self.resume_offset = 0 # Offset in the code of the first instruction compiled by the last compile
+
+  def _emit(self, opcode: int, argument: int = 0):
+    self.code.append(opcode)
+    self.code.append(argument)
+    self.lines.append(self.line_number)
+
+  def _constant(self, value):
+    """
+      Gets the index of a constant, adding it to the constants.
+    """
+    key = (type(value), value)
+    index = self.constant_index.get(key)
+    if index is None:
+      index = self.constant_index[key] = len(self.constants)
+      self.constants.append(value)
+    return index
+
+  def _slot(self, name):
+    """
+      Gets the slot of a variable in the symbol table, a variable missing from the symbol table is a runtime error.
+    """
+    try:
+      return self.symbol_table.get_slot(name)
+    except KeyError:
+      self._fail(f"Variable {name} is not declared")
+
+  def _type(self, slot: int):
+    return self.symbol_table.get_symbol_at(slot).type
+
+  def _fail(self, message: str):
+    """
+      Emits an instruction reporting a runtime error on the current line and stops the compilation.
+    """
+    self._emit(FAIL, len(self.failures))
+    self.failures.append(f"Runtime error on line {self.line_number} | {message}")
+    raise _Unreachable()
+
+  def _compile_variable_value(self, name: str, slot: int):
+    """
+      Emits the load of a variable stored into the variable in the slot, a STR variable cannot be stored into an INT one.
+    """
+    source = self._slot(name)
+    if self._type(source) == "INT":
+      self._emit(LOAD_INT, source)
+    elif self._type(slot) == "INT":
+      self._fail(f"Cannot store STR variable {name} into INT variable {self.symbol_table.get_symbol_at(slot).name}")
+    else:
+      self._emit(LOAD, source)
+
+  def _compile_operation(self, operator_name: str, second_is_variable: bool, second_value):
+    """
+      Emits an operation once both of its operands are on the stack.
+    """
+    if operator_name not in ("DIV", "MOD"):
+      self._emit(ARITHMETIC_OPCODES[operator_name])
+      return
+
+    error = "Division" if operator_name == "DIV" else "Modulo"
+    target = "variable" if second_is_variable else "integer literal"
+    self._emit(ARITHMETIC_OPCODES[operator_name], len(self.divisions))
+    self.divisions.append((self.line_number, f"Runtime error on line {self.line_number} | {error} by zero in {target} {second_value}"))
+
+  def _start(self, symbol_table: SymbolTable):
+    """
+      Resets the compiler before compiling a program.
+    """
+    self.symbol_table = symbol_table
+
+    self.line_number = 1
+
+    self.code = []
+    self.lines = []
+    self.constants = []
+    self.constant_index = {}
+    self.divisions = []
+    self.failures = []
+    self.inputs = []
+    self.checkpoints = []
+
+  def _resume(self, symbol_table: SymbolTable, statement: int):
+    """
+      Drops the code and the table entries of the statements from the given one onward, keeping the ones before it.
+    """
+    self.symbol_table = symbol_table
+
+    code_size, constant_count, division_count, failure_count, input_count = self.checkpoints[statement]
+    del self.code[code_size:]
+    del self.lines[code_size // 2:]
+    for value in self.constants[constant_count:]:
+      del self.constant_index[(type(value), value)]
+    del self.constants[constant_count:]
+    del self.divisions[division_count:]
+    del self.failures[failure_count:]
+    del self.inputs[input_count:]
+    del self.checkpoints[statement:]
+
+  def _checkpoint(self):
+    self.checkpoints.append((len(self.code), len(self.constants), len(self.divisions), len(self.failures), len(self.inputs)))
+
+  def _program(self):
+    return Program(
+      tuple(self.code), tuple(self.constants), tuple(self.symbol_table.get_symbol_table()), # Names in slot order
+      tuple(self.divisions), tuple(self.failures), tuple(self.inputs), tuple(self.lines)
+    )
+
+  def _compile_value(self, node: Variable | Literal):
+    """
+      Emits the code of an operand node of an expression.
+    """
+    self.line_number = node.line
+    if type(node) is Literal:
+      self._emit(PUSH_CONST, self._constant(int(node.value)))
+      return
+
+    slot = self._slot(node.name)
+    if self._type(slot) != "INT":
+      self._fail(f"Operand {node.name} is not an integer")
+    self._emit(LOAD_INT, slot)
+
+  def _compile_expression(self, expression: Operation):
+    """
+      Emits the code of an expression node, operands before their operation.
+      Nested expressions use an explicit stack of (node, operands emitted) entries.
+    """
+    pending = [(expression, False)]
+    while pending:
+      node, operands_emitted = pending.pop()
+
+      if type(node) is not Operation:
+        self._compile_value(node)
+      elif operands_emitted:
+        second = node.second
+        second_value = second.name if type(second) is Variable else second.value if type(second) is Literal else None
+        self._compile_operation(node.operator, type(second) is Variable, second_value)
+      else:
+        pending.append((node, True))
+        pending.append((node.second, False))
+        pending.append((node.first, False))
+
+  def _compile_store(self, variable: Variable, value):
+    """
+      Emits the code storing the value of an assignment or declaration into its variable.
+    """
+    self.line_number = variable.line
+    slot = self._slot(variable.name)
+
+    if type(value) is Operation:
+      self._compile_expression(value)
+    else:
+      self.line_number = value.line
+      if type(value) is Literal:
+        self._emit(PUSH_CONST, self._constant(int(value.value)))
+      else:
+        self._compile_variable_value(value.name, slot)
+    self._emit(STORE, slot)
+
+  def _compile_declaration(self, declaration: Declaration):
+    """
+      Emits the code of a declaration, the value is evaluated then stored into the variable.
+    """
+    if declaration.value is not None:
+      self._compile_store(declaration.variable, declaration.value)
+    else:
+      self.line_number = declaration.variable.line
+      self._slot(declaration.variable.name)
+
+  def _compile_statement(self, statement):
+    """
+      Emits the code of a statement node.
+    """
+    if type(statement) is Print:
+      value = statement.value
+      if type(value) is Variable:
+        self.line_number = value.line
+        self._emit(PRINT_VAR, self._slot(value.name))
+      elif type(value) is Literal: # Literals are printed as written
+        self.line_number = value.line
+        self._emit(PRINT_TEXT, self._constant(value.value))
+      else:
+        self._compile_expression(value)
+        self._emit(PRINT)
+
+    elif type(statement) is NewLine:
+      self.line_number = statement.line
+      self._emit(NEWLN)
+
+    elif type(statement) is Assignment:
+      self._compile_store(statement.variable, statement.value)
+
+    elif type(statement) is Declaration:
+      self._compile_declaration(statement)
+
+    elif type(statement) is Input:
+      variable = statement.variable
+      self.line_number = variable.line
+      slot = self._slot(variable.name)
+      self._emit(BEG, len(self.inputs))
+      self.inputs.append((slot, variable.name, self._type(slot), self.line_number))
+
+  def compile(self, tree: SyntaxTree, symbol_table: SymbolTable, first_statement: int = 0):
+    """
+      Compiles the syntax tree of a parsed program.
+      The tree of a program with syntax errors holds the statements the parser recovered, the others are not compiled.
+      @param tree: The syntax tree built by the parser.
+      @param symbol_table: The symbol table holding the variables of the program.
+      @param first_statement: Index of the first statement changed since the previous compile, the code of the statements before it is kept.
+      Those statements and the symbols they use must be the same as in the previous compile.
+    """
+    first_statement = min(first_statement, len(self.checkpoints) - 1)
+    if first_statement > 0:
+      self._resume(symbol_table, first_statement)
+    else:
+      first_statement = 0
+      self._start(symbol_table)
+    self.resume_offset = len(self.code)
+
+    try:
+      for statement in islice(tree.statements, first_statement, None):
+        self._checkpoint()
+        self._compile_statement(statement)
+
+      self._checkpoint()
+      self.line_number = tree.end_line
+      self._emit(HALT)
+    except _Unreachable: # The program always stops at the last instruction
+      pass
+
+    return self._program()
@@ -0,0 +1,8 @@
+# Cancellation of long running analyses and programs
+# A caller that may cancel a phase sets its cancel_event attribute to a threading.Event, the phase checks it
+# between its steps and raises JobCancelled once it is set. The phase never sets the event itself.
+
+class JobCancelled(Exception):
+  """
+    Raised inside a job once it has been cancelled, stops the job at its next check.
+  """
@@ -0,0 +1,156 @@
+"""
+  Command line interface of the IOL compiler, runs without the IDE and without tkinter.
+
+  Usage:
+    python -m cli compile program.iol [--tokens output.tkn] [--output program.iolc]
+    python -m cli run program.iol
+    python -m cli run program.iolc
+    python -m cli run program.iol --profile
+    python -m cli batch programs/ [--jobs 8] [--report report.json]
+    Every command also takes --cache DIR to reuse the compilations of unchanged programs.
+"""
+import argparse
+import json
+import sys
+
+from compiler import compile_source, format_tokens # Headless compilation
+from runtime import ConsoleRuntime # Runtime component writing to the terminal
+from profiler import Profiler, profile_phase # Timing report of the phases
+from batch import compile_files, find_sources # Parallel compilation of many files
+from compile_cache import CompileCache # On-disk cache of compilations
+from program_file import ProgramFileError, load_program, write_program # Compiled program files
+
+def _read_source(file_path: str):
+  """
+    Reads the source code of a program, "-" reads it from the standard input.
+  """
+  if file_path == "-":
+    return sys.stdin.read()
+  with open(file_path, "r") as file:
+    return file.read()
+
+def _compile(arguments):
+  """
+    Compiles the program and reports the errors, returns the compile result or None if there are errors.
+  """
+  cache = CompileCache(arguments.cache) if arguments.cache else None
+  result = compile_source(_read_source(arguments.file), hooks=arguments.profiler, cache=cache)
+
+  if arguments.tokens and result.tokens:
+    with open(arguments.tokens, "w") as file:
+      file.write(format_tokens(result.tokens))
+
+  if result.errors:
+    print("Compilation completed with errors:\n", file=sys.stderr)
+    for error in result.errors:
+      print(error, file=sys.stderr)
+    return None
+
+  return result
+
+def _print_profile(arguments):
+  """
+    Prints the timing report to the standard error if the program was profiled.
+  """
+  if arguments.profiler is not None:
+    print(f"\n{arguments.profiler.report()}", file=sys.stderr)
+
+def compile_command(arguments):
+  """
+    Compiles the program without running it.
+  """
+  result = _compile(arguments)
+  _print_profile(arguments)
+  if result is None:
+    return 1
+
+  if arguments.output:
+    write_program(arguments.output, result.program, result.symbol_table)
+
+  print("Code compiled with no errors found.")
+  return 0
+
+def run_command(arguments):
+  """
+    Compiles the program and runs it when there are no errors, a compiled program file is run without compiling it.
+  """
+  if arguments.file.endswith(".iolc"):
+    try:
+      with profile_phase(arguments.profiler, "loading"):
+        program, symbol_table = load_program(arguments.file, arguments.verify)
+    except ProgramFileError as error:
+      print(f"Error: {arguments.file}: {error}", file=sys.stderr)
+      return 1
+  else:
+    result = _compile(arguments)
+    if result is None:
+      _print_profile(arguments)
+      return 1
+    program, symbol_table = result.program, result.symbol_table
+
+  runtime = ConsoleRuntime()
+  runtime.hooks = arguments.profiler
+  try:
+    with profile_phase(arguments.profiler, "execution"):
+      runtime.run_program(program, symbol_table)
+  finally:
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+    _print_profile(arguments)
+
+  return 1 if runtime.errors else 0
+
+def batch_command(arguments):
+  """
+    Compiles many files in parallel and reports the errors of every file.
+  """
+  sources = find_sources(arguments.paths)
+  report = compile_files(sources, arguments.jobs, cache_directory=arguments.cache)
+
+  print(report.format())
+  if arguments.report:
+    with open(arguments.report, "w") as file:
+      json.dump(report.to_dict(), file, indent=2)
+
+  return 1 if report.invalid_files else 0
+
+def build_argument_parser():
+  argument_parser = argparse.ArgumentParser(prog="python -m cli", description="Compile and run IOL programs without the IDE.")
+  subparsers = argument_parser.add_subparsers(dest="command", required=True)
+
+  compile_parser = subparsers.add_parser("compile", help="check a program for lexical, syntax and static semantics errors")
+  compile_parser.add_argument("file", help="path of the .iol file, - for the standard input")
+  compile_parser.add_argument("--tokens", metavar="OUT", help="also write the tokenized code to OUT")
+  compile_parser.add_argument("--output", metavar="OUT", help="write the compiled program to OUT, a .iolc file the run command loads without compiling")
+  compile_parser.add_argument("--profile", action="store_true", help="print the time spent in every phase, production and instruction")
+  compile_parser.add_argument("--cache", metavar="DIR", help="cache the compilation in DIR, an unchanged program is loaded from it")
+  compile_parser.set_defaults(handler=compile_command)
+
+  run_parser = subparsers.add_parser("run", help="compile a program and run it in the terminal")
+  run_parser.add_argument("file", help="path of the .iol file, or of a .iolc file written by compile --output")
+  run_parser.add_argument("--tokens", metavar="OUT", help="also write the tokenized code to OUT")
+  run_parser.add_argument("--profile", action="store_true", help="print the time spent in every phase, production and instruction")
+  run_parser.add_argument("--cache", metavar="DIR", help="cache the compilation in DIR, an unchanged program is loaded from it")
+  run_parser.add_argument("--verify", action="store_true", help="check every instruction of a .iolc file before running it, for files not written by compile --output")
+  run_parser.set_defaults(handler=run_command)
+
+  batch_parser = subparsers.add_parser("batch", help="check many programs in parallel and report the errors of every file")
+  batch_parser.add_argument("paths", nargs="+", help=".iol files, or directories searched recursively for .iol files")
+  batch_parser.add_argument("--jobs", type=int, help="number of worker processes, the number of CPUs by default")
+  batch_parser.add_argument("--report", metavar="OUT", help="also write the report to OUT as JSON")
+  batch_parser.add_argument("--cache", metavar="DIR", help="cache the compilations in DIR, unchanged programs are loaded from it")
+  batch_parser.set_defaults(handler=batch_command, profile=False)
+
+  return argument_parser
+
+def main(argv: list[str] | None = None):
+  arguments = build_argument_parser().parse_args(argv)
+  arguments.profiler = Profiler() if arguments.profile else None
+  try:
+    return arguments.handler(arguments)
+  except OSError as error: # Unreadable source or output file
+    print(f"Error: {error}", file=sys.stderr)
+    return 1
+
+if __name__ == "__main__":
+  sys.exit(main())
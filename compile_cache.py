@@ -0,0 +1,293 @@
+import contextlib
+import hashlib
+import json
+import os
+import sys
+from array import array
+
+try:
+  import fcntl # Locks of the size file
+except ImportError: # Windows
+  fcntl = None
+  import msvcrt
+
+from program_file import ProgramFileError, decode_program, encode_program # Compiled program files
+from symbol_table import SymbolTable
+from token_container import TOKEN_NAMES, TokenStream
+
+# Format version of the cache entries, changing it ignores the entries written by older versions of the compiler
+# Version 7: a line of JSON holding the variables, the errors and the byte sizes of the token sections,
+# followed by the token sections, the raw arrays of the TokenStream (kinds, value ids, line offsets, then the
+# offsets and UTF-8 texts of its value table) in the byte order of the writer, and by the .iolc file of the program
+CACHE_VERSION = 7
+
+# Default size limit of a cache directory
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+# File of the cache directory holding the total size of the entries, updated by one process at a time
+SIZE_FILE_NAME = "size"
+
+class CacheEntry:
+  """
+    Compilation of a source cached on disk: its tokens, the variables found by the lexical analyzer,
+    its errors, its optimised bytecode if it has no errors, and the symbol table of the variables.
+  """
+  def __init__(self, tokens, variables: list[dict], errors: list[str], program, symbol_table: SymbolTable | None = None):
+    self.tokens = tokens
+    self.variables = variables
+    self.errors = errors
+    self.program = program
+    self.symbol_table = symbol_table if symbol_table is not None else _symbol_table(variables)
+
+class CompileCache:
+  """
+    Content-addressed cache of compilations in a directory, keyed by the SHA-256 of the source and of the grammar.
+    Entries are files written to a temporary name and renamed, so several processes can share the directory:
+    readers never see a partial entry, and concurrent writers of a key write the same content.
+    An entry holds its variables and errors as JSON, followed by the arrays of its tokens and by its program as a .iolc file,
+    so a hit copies the arrays and maps the program without decoding them token by token, it is never unpickled.
+    Reading an entry updates its modification time. The total size of the entries is kept in a file updated under a lock,
+    and once it grows past max_bytes the least recently used entries are removed.
+  """
+  def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+    self.directory = directory
+    self.max_bytes = max_bytes
+    self.hits = 0
+    self.misses = 0
+    os.makedirs(directory, exist_ok=True)
+
+  def key(self, source: str, grammar_digest: str):
+    """
+      Gets the key of a source compiled with the grammar of the given digest.
+    """
+    digest = hashlib.sha256(f"{CACHE_VERSION}\0{grammar_digest}\0".encode())
+    digest.update(source.encode("UTF-8"))
+    return digest.hexdigest()
+
+  def _path(self, key: str):
+    return os.path.join(self.directory, key[:2], f"{key}.iolcache")
+
+  def get(self, key: str):
+    """
+      Gets the cached compilation of a key, None if it is not cached or its entry cannot be read.
+    """
+    path = self._path(key)
+    try:
+      with open(path, "rb") as file:
+        data = file.read()
+    except OSError: # Not cached
+      self.misses += 1
+      return None
+
+    try:
+      end = data.index(b"\n")
+      fields = json.loads(data[:end])
+      if fields["version"] != CACHE_VERSION or fields["key"] != key or fields["byte_order"] != sys.byteorder:
+        self.misses += 1
+        return None
+      view = memoryview(data)[end + 1:]
+      tokens = _decode_tokens(view, fields["token_sections"])
+      program = symbol_table = None
+      if fields["has_program"]: # Written by encode_program, which checked its code, so it is not verified again
+        program, symbol_table = decode_program(view[sum(fields["token_sections"]):])
+    except (ValueError, KeyError, TypeError, ProgramFileError): # Unreadable entry
+      self._remove(path)
+      self.misses += 1
+      return None
+
+    try:
+      os.utime(path) # Mark the entry as recently used
+    except OSError: # Evicted by another process since it was read
+      pass
+    self.hits += 1
+    return CacheEntry(tokens, fields["variables"], fields["errors"], program, symbol_table)
+
+  def put(self, key: str, entry: CacheEntry):
+    """
+      Stores the compilation of a key, then evicts the least recently used entries if the cache is too large.
+      The cache is optional, so failures to write are ignored.
+    """
+    try:
+      data = _encode_entry(key, entry)
+    except ProgramFileError: # Programs the file format cannot hold are not cached
+      return
+
+    path = self._path(key)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+      with open(temporary_path, "wb") as file:
+        file.write(data)
+      os.replace(temporary_path, path) # Readers never see a partially written entry
+
+      # Rewriting an entry counts it twice until the next eviction rescans the directory, so the size is never too small
+      with self._size_file() as size_file:
+        size = _read_size(size_file)
+        size = self._scan_size() if size is None else size + len(data)
+        if size > self.max_bytes:
+          size = self._evict()
+        _write_size(size_file, size)
+    except OSError:
+      self._remove(temporary_path)
+
+  def _entries(self):
+    """
+      Gets the (modification time, size, path) of every entry in the directory.
+    """
+    entries = []
+    for directory, _, file_names in os.walk(self.directory):
+      for file_name in file_names:
+        if not file_name.endswith(".iolcache"):
+          continue
+        path = os.path.join(directory, file_name)
+        try:
+          stat = os.stat(path)
+        except OSError: # Removed by another process
+          continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+    return entries
+
+  def _scan_size(self):
+    return sum(size for _, size, _ in self._entries())
+
+  @contextlib.contextmanager
+  def _size_file(self):
+    """
+      Opens the size file of the directory, locked until the block ends so one process at a time updates the size.
+    """
+    with open(os.path.join(self.directory, SIZE_FILE_NAME), "a+") as file:
+      if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+      else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+      try:
+        yield file
+      finally:
+        if fcntl is None:
+          file.seek(0)
+          msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+  def _evict(self):
+    """
+      Removes the least recently used entries until the cache holds at most three quarters of max_bytes,
+      so the next writes do not evict again right away. Returns the size of the remaining entries.
+    """
+    entries = sorted(self._entries())
+    size = sum(size for _, size, _ in entries)
+    target = self.max_bytes * 3 // 4
+
+    for _, entry_size, path in entries:
+      if size <= target:
+        break
+      self._remove(path)
+      size -= entry_size
+    return size
+
+  def evict(self):
+    """
+      Removes the least recently used entries if the cache is larger than max_bytes.
+    """
+    with self._size_file() as size_file:
+      size = self._scan_size()
+      _write_size(size_file, self._evict() if size > self.max_bytes else size)
+
+  def clear(self):
+    """
+      Removes every entry of the cache.
+    """
+    with self._size_file() as size_file:
+      for _, _, path in self._entries():
+        self._remove(path)
+      _write_size(size_file, 0)
+
+  def _remove(self, path: str):
+    try:
+      os.remove(path)
+    except OSError: # Already removed by another process
+      pass
+
+def _read_size(file):
+  """
+    Reads the total size of the entries from the size file, None if it has not been written yet.
+  """
+  file.seek(0)
+  try:
+    return int(file.read())
+  except ValueError:
+    return None
+
+def _write_size(file, size: int):
+  file.seek(0)
+  file.truncate()
+  file.write(str(size))
+  file.flush()
+
+def _symbol_table(variables: list[dict]):
+  """
+    Gets the symbol table of the variables found by the lexical analyzer, before the program runs.
+  """
+  symbol_table = SymbolTable()
+  for variable in variables:
+    symbol_table.add_symbol(variable["name"], variable["data_type"], variable["value"])
+  return symbol_table
+
+def _encode_entry(key: str, entry: CacheEntry):
+  """
+    Gets the bytes of the file of an entry: a line of JSON fields, the token sections, then the .iolc file of its program if it has one.
+  """
+  sections = _encode_tokens(entry.tokens)
+  fields = {
+    "version": CACHE_VERSION,
+    "key": key,
+    "byte_order": sys.byteorder,
+    "token_sections": [len(section) for section in sections],
+    "variables": entry.variables,
+    "errors": entry.errors,
+    "has_program": entry.program is not None,
+  }
+  data = json.dumps(fields).encode("UTF-8") + b"\n" + b"".join(sections) # Newlines in texts are escaped by JSON
+  if entry.program is None:
+    return data
+  return data + encode_program(entry.program, entry.symbol_table)
+
+def _encode_tokens(tokens: TokenStream):
+  """
+    Gets the token sections of an entry: the arrays of the tokens, then the offsets and texts of their values.
+  """
+  values = [value.encode("UTF-8") for value in tokens.value_table[1:]] # The first value is the None of keywords
+  value_offsets = array("I", [0])
+  for value in values:
+    value_offsets.append(value_offsets[-1] + len(value))
+  return [tokens.kinds.tobytes(), tokens.value_ids.tobytes(), tokens.line_offsets.tobytes(), value_offsets.tobytes(), b"".join(values)]
+
+def _decode_tokens(view: memoryview, sizes: list[int]):
+  """
+    Rebuilds the tokens of an entry from its token sections, in the compact container of the lexical analyzer.
+  """
+  if len(sizes) != 5 or sum(sizes) > len(view):
+    raise ValueError("Truncated token sections")
+  sections = []
+  for size in sizes:
+    sections.append(view[:size])
+    view = view[size:]
+
+  tokens = TokenStream()
+  tokens.kinds.frombytes(sections[0])
+  tokens.value_ids.frombytes(sections[1])
+  tokens.line_offsets = array("I")
+  tokens.line_offsets.frombytes(sections[2])
+  value_offsets = array("I")
+  value_offsets.frombytes(sections[3])
+  values = bytes(sections[4])
+  tokens.value_table += [values[value_offsets[index]:value_offsets[index + 1]].decode("UTF-8") for index in range(len(value_offsets) - 1)]
+  tokens.value_index = {value: index for index, value in enumerate(tokens.value_table)}
+
+  if len(tokens.kinds) != len(tokens.value_ids) or not tokens.line_offsets or tokens.line_offsets[-1] != len(tokens.kinds):
+    raise ValueError("Corrupted token sections")
+  if tokens.kinds and max(tokens.kinds) >= len(TOKEN_NAMES):
+    raise ValueError("Unknown token kind")
+  if tokens.value_ids and max(tokens.value_ids) >= len(tokens.value_table):
+    raise ValueError("Token value out of the value table")
+  return tokens
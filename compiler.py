@@ -0,0 +1,112 @@
+from bytecode import BytecodeCompiler, Program # Bytecode for the runtime
+from compile_cache import CacheEntry, CompileCache # On-disk cache of compilations
+from grammar import Grammar, load_grammar # Import the compiled grammar
+from lexical_analyzer import LexicalAnalyzer # Lexical Analysis component
+from optimizer import Optimizer # Bytecode optimisation pass
+from parser import Parser # Syntax and Static Semantics Analysis component
+from profiler import ProfileHooks, profile_phase # Optional profiling of the phases
+from symbol_table import SymbolTable # Symbol Table component
+from syntax_tree import SyntaxTree # Syntax tree built by the parser
+
+class CompileResult:
+  """
+    Result of compiling an IOL program without the IDE.
+  """
+  def __init__(self, tokens, symbol_table: SymbolTable, variables: list[dict], errors: list[str], program: Program | None = None):
+    self.tokens = tokens # Line number -> tokens of the program
+    self.symbol_table = symbol_table # Variables of the program, used by the runtime
+    self.variables = variables # Variables found by the lexical analyzer
+    self.errors = errors # Lexical, syntax, static semantics and optimisation errors
+    self.program = program # Optimised bytecode of the program, None if the analysis found errors
+
+  @property
+  def is_valid(self):
+    return not self.errors
+
+def compile_source(source: str, grammar: Grammar | None = None, hooks: ProfileHooks | None = None, cache: CompileCache | None = None):
+  """
+    Performs the lexical, syntax and static semantics analysis of the source code, the same checks the IDE runs on compile.
+    @param source: The IOL source code.
+    @param grammar: The grammar used by the parser, the default grammar files if None.
+    @param hooks: Profiling hooks called around the phases and on every parser expansion.
+    @param cache: Cache of compilations, an unchanged source compiled with the same grammar is loaded from it.
+  """
+  symbol_table = SymbolTable()
+  code = source.strip()
+
+  if not code: # Empty source
+    return CompileResult({}, symbol_table, [], ["Lexical Analysis failed. No code to analyze."])
+
+  # Validate IOL and LOI start and end codes
+  start_code = code[:code.find("\n") if "\n" in code else len(code)].strip().split(' ')[0]
+  end_code = code[code.rfind("\n") + 1:].strip().split(' ')[-1]
+  if start_code != "IOL" or end_code != "LOI":
+    return CompileResult({}, symbol_table, [], ["Lexical Analysis failed. Please ensure that the code starts with IOL and ends with LOI."])
+
+  grammar = grammar if grammar is not None else load_grammar()
+  if cache is not None: # Skip the analysis of a source compiled before
+    key = cache.key(code, grammar.digest)
+    entry = cache.get(key)
+    if entry is not None:
+      return CompileResult(entry.tokens, entry.symbol_table, entry.variables, entry.errors, entry.program)
+
+  # Tokenize the source code
+  lexical_analyzer = LexicalAnalyzer(single_pass=True, compact=True)
+  with profile_phase(hooks, "lexical analysis"):
+    lexical_analyzer.tokenizeInput(code)
+  tokens = lexical_analyzer.getOutput()
+
+  # Append the variables to the symbol table
+  variables = lexical_analyzer.getVariables()
+  for variable in variables:
+    symbol_table.add_symbol(variable["name"], variable["data_type"], variable["value"])
+
+  # Parse the tokenized code
+  parser = Parser(symbol_table, grammar)
+  parser.hooks = hooks
+  with profile_phase(hooks, "syntax analysis"):
+    parser.parse(tokens)
+
+  errors = lexical_analyzer.errors + parser.errors
+  program = None
+  if not errors:
+    with profile_phase(hooks, "bytecode compilation"):
+      program, errors = compile_program(parser.tree, symbol_table)
+
+  if cache is not None:
+    cache.put(key, CacheEntry(tokens, variables, errors, program, symbol_table))
+  return CompileResult(tokens, symbol_table, variables, errors, program)
+
+def compile_program(tree: SyntaxTree, symbol_table: SymbolTable):
+  """
+    Compiles the syntax tree of a parsed program into optimised bytecode.
+    The tree of a program with syntax errors holds the statements the parser recovered, so it runs without them.
+    Returns the program and the errors found by the optimiser, such as divisions by a constant zero.
+  """
+  optimizer = Optimizer()
+  program = optimizer.optimize(BytecodeCompiler().compile(tree, symbol_table))
+  return program, optimizer.errors
+
+class ProgramCompiler:
+  """
+    Compiles the syntax tree of a program edited between compilations into optimised bytecode, the same as compile_program.
+    The bytecode of the statements before the first changed one is kept from the previous compilation.
+  """
+  def __init__(self):
+    self.compiler = BytecodeCompiler()
+    self.optimizer = Optimizer()
+
+  def compile(self, tree: SyntaxTree, symbol_table: SymbolTable, first_statement: int = 0):
+    """
+      Returns the program and the errors found by the optimiser.
+      @param first_statement: Index of the first statement changed since the previous compilation, see BytecodeCompiler.compile.
+    """
+    program = self.compiler.compile(tree, symbol_table, first_statement)
+    program = self.optimizer.optimize(program, self.compiler.resume_offset)
+    return program, list(self.optimizer.errors)
+
+def format_tokens(tokens):
+  """
+    Formats the tokenized code the same as the output.tkn file of the IDE, one line of token names per source line.
+  """
+  return "".join("".join(f"{token['name']} " for token in tokens[line]) + "\n" for line in tokens)
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+
+# Grammar files of the IOL, next to this module
+GRAMMAR_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROD_PATH = os.path.join(GRAMMAR_DIRECTORY, "grammar.prod")
+DEFAULT_PTBL_PATH = os.path.join(GRAMMAR_DIRECTORY, "grammar.ptbl")
+
+class Grammar:
+  """
+    Compiled grammar built from a production table (.prod) and a parse table (.ptbl).
+    Instances are immutable, so a single one is shared by every parser created from the same files.
+  """
+  __slots__ = ("prod_table", "parse_table", "ll1_table", "start_symbol", "first_sets", "follow_sets", "digest")
+
+  def __init__(self, prod_table: list[list[str]], parse_table: list[list[str]], digest: str):
+    set_attribute = super().__setattr__
+    set_attribute("prod_table", tuple(tuple(production) for production in prod_table)) # Rows of the production table
+    set_attribute("parse_table", tuple(tuple(row) for row in parse_table)) # Rows of the parse table, the first row holds the terminals
+    set_attribute("ll1_table", _build_ll1_table(self.prod_table, self.parse_table)) # Nonterminal -> terminal -> (production number, production name, is epsilon, symbols to push)
+    set_attribute("start_symbol", self.prod_table[0][1]) # Start symbol is the first symbol of the first production
+    set_attribute("first_sets", _build_first_sets(self.prod_table)) # Nonterminal -> terminals that can start it, with 'e' if it can be empty
+    set_attribute("follow_sets", _build_follow_sets(self.prod_table, self.first_sets, self.start_symbol)) # Nonterminal -> terminals that can follow it
+    set_attribute("digest", digest) # SHA-256 of the grammar files
+
+  def __setattr__(self, name, value):
+    raise AttributeError("Grammar is immutable")
+
+  def __delattr__(self, name):
+    raise AttributeError("Grammar is immutable")
+
+  def __reduce__(self):
+    # Pickle the tables only, such as when sending the grammar to a worker process, the derived tables are rebuilt on load
+    return (Grammar, ([list(production) for production in self.prod_table], [list(row) for row in self.parse_table], self.digest))
+
+def _read_table(file_path: str):
+  """
+    Reads a comma separated table file, returns its rows and its raw content.
+  """
+  with open(file_path, "rb") as file:
+    content = file.read()
+  rows = [line.strip().split(',') for line in content.decode("UTF-8").splitlines()]
+  return rows, content
+
+def _build_ll1_table(prod_table: tuple, parse_table: tuple):
+  """
+    Indexes the parse table by nonterminal and terminal so each expansion is a single lookup.
+    Each entry holds the production number, the production name, whether the production is epsilon,
+    and its symbols in the order they are pushed to the stack.
+  """
+  ll1_table = {}
+  if not parse_table:
+    return MappingProxyType(ll1_table)
+
+  header = parse_table[0]
+  for row in parse_table[1:]:
+    if row[0] in ll1_table: # Keep the first row of a nonterminal, like a linear scan would
+      continue
+
+    entries = {}
+    for terminal, parse_cell in zip(header[1:], row[1:]):
+      if parse_cell == '' or terminal in entries:
+        continue
+
+      if not parse_cell.isdigit() or not 1 <= int(parse_cell) <= len(prod_table):
+        raise ValueError(f"Invalid production number {parse_cell!r} in the parse table for {row[0]} and {terminal}")
+
+      # Get the production from the production table
+      production_number = int(parse_cell)
+      production_name = prod_table[production_number - 1][1]
+      production_symbols = prod_table[production_number - 1][2].strip().split(' ')
+      entries[terminal] = (production_number, production_name, 'e' in production_symbols, tuple(symbol for symbol in production_symbols[::-1] if symbol != 'e'))
+
+    ll1_table[row[0]] = MappingProxyType(entries)
+
+  return MappingProxyType(ll1_table)
+
+def _first_of_sequence(symbols: list[str], first_sets: dict):
+  """
+    Gets the terminals that can start a sequence of symbols, with 'e' if every symbol of the sequence can be empty.
+  """
+  first = set()
+  for symbol in symbols:
+    if symbol == 'e':
+      continue
+    if symbol not in first_sets: # Terminal
+      first.add(symbol)
+      return first
+
+    first |= first_sets[symbol] - {'e'}
+    if 'e' not in first_sets[symbol]:
+      return first
+
+  first.add('e')
+  return first
+
+def _build_first_sets(prod_table: tuple):
+  """
+    Computes the FIRST set of every nonterminal of the production table, until no set grows.
+  """
+  first_sets = {production[1]: set() for production in prod_table}
+  changed = True
+  while changed:
+    changed = False
+    for production in prod_table:
+      first = _first_of_sequence(production[2].strip().split(' '), first_sets)
+      if not first <= first_sets[production[1]]:
+        first_sets[production[1]] |= first
+        changed = True
+
+  return MappingProxyType({nonterminal: frozenset(first) for nonterminal, first in first_sets.items()})
+
+def _build_follow_sets(prod_table: tuple, first_sets: Mapping, start_symbol: str):
+  """
+    Computes the FOLLOW set of every nonterminal of the production table, the end symbol $ follows the start symbol.
+  """
+  follow_sets = {nonterminal: set() for nonterminal in first_sets}
+  follow_sets[start_symbol].add('$')
+  changed = True
+  while changed:
+    changed = False
+    for production in prod_table:
+      symbols = production[2].strip().split(' ')
+      for index, symbol in enumerate(symbols):
+        if symbol not in follow_sets:
+          continue
+
+        # Terminals that can start the rest of the production, or follow the production if the rest can be empty
+        follow = _first_of_sequence(symbols[index + 1:], first_sets)
+        if 'e' in follow:
+          follow = (follow - {'e'}) | follow_sets[production[1]]
+        if not follow <= follow_sets[symbol]:
+          follow_sets[symbol] |= follow
+          changed = True
+
+  return MappingProxyType({nonterminal: frozenset(follow) for nonterminal, follow in follow_sets.items()})
+
+def _compile_grammar(prod_path: str, ptbl_path: str):
+  """
+    Reads and compiles the grammar files.
+  """
+  prod_table, prod_content = _read_table(prod_path)
+  parse_table, ptbl_content = _read_table(ptbl_path)
+
+  if not prod_table or any(len(production) < 3 for production in prod_table):
+    raise ValueError(f"Invalid production table: {prod_path}")
+
+  digest = hashlib.sha256(prod_content + b"\0" + ptbl_content).hexdigest()
+  return Grammar(prod_table, parse_table, digest)
+
+# Compiled grammars of this process, keyed by the paths, modification times and sizes of their files
+_grammars = {}
+_grammars_lock = threading.Lock()
+
+def load_grammar(prod_path: str = DEFAULT_PROD_PATH, ptbl_path: str = DEFAULT_PTBL_PATH):
+  """
+    Gets the compiled grammar of the given files.
+    The grammar is compiled once per process and reused until one of the files changes.
+    Raises FileNotFoundError if a grammar file is missing and ValueError if the tables are malformed.
+    @param prod_path: Path of the production table.
+    @param ptbl_path: Path of the parse table.
+  """
+  prod_path = os.path.abspath(prod_path)
+  ptbl_path = os.path.abspath(ptbl_path)
+  prod_stat = os.stat(prod_path)
+  ptbl_stat = os.stat(ptbl_path)
+  file_key = (prod_path, prod_stat.st_mtime_ns, prod_stat.st_size, ptbl_path, ptbl_stat.st_mtime_ns, ptbl_stat.st_size)
+
+  grammar = _grammars.get(file_key)
+  if grammar is None:
+    with _grammars_lock:
+      grammar = _grammars.get(file_key)
+      if grammar is None:
+        grammar = _compile_grammar(prod_path, ptbl_path)
+
+        # Drop grammars compiled from older versions of the same files
+        for key in [key for key in _grammars if key[0] == prod_path and key[3] == ptbl_path]:
+          del _grammars[key]
+
+        _grammars[file_key] = grammar
+
+  return grammar
@@ -1,30 +1,61 @@
-from token_container import Tokens
+from token_container import Tokens, TokenStream
+from symbol_table import SymbolTable
+from collections.abc import Iterable
+from itertools import islice
 import re
 
+# Single alternation used by the single-pass scanner, matched with findall so every token is a plain
+# (IDENT, INT_LIT, NEWLINE, ERROR) tuple. Words may carry non-space whitespace at their edges and
+# a line break swallows the whitespace after it (same as stripping each word and line).
+# Whitespace-only words are errors only when something follows them on the same line.
+SCANNER_PATTERN = re.compile(r"""
+    \ *[^\S\ \n]*(?:(?P<IDENT>[a-zA-Z][a-zA-Z0-9]*)|(?P<INT_LIT>[0-9]+))[^\S\ \n]*(?![^\ \n])
+  | (?P<NEWLINE>\n)[^\S\n]*
+  | \ *(?P<ERROR>[^\S\ \n]*\S[^\ \n]*|[^\S\ \n]+(?=[^\S\n]*\S))
+""", re.VERBOSE)
+
+# Number of characters scanned per findall call, keeps the intermediate match list bounded
+SCANNER_CHUNK_SIZE = 1 << 20
+
 class LexicalAnalyzer:
   """
     Lexical Analyzer Class to tokenize the input code.
     Stores the tokens in a Tokens object.
     In this program, this class tokenizes the input code and stores the tokens in a .tkn file.
+    If single_pass is set, the input is scanned once with a precompiled pattern instead of word by word.
+    If compact is set, the output is a TokenStream instead of a dictionary of token lists.
+    retokenizeInput keeps the tokens of every line, so only the lines edited since the previous call are tokenized again.
   """
-  def __init__(self):
+  def __init__(self, single_pass: bool = False, compact: bool = False):
     # List of keywords
     self.keywords = ["INT", "STR", "ADD", "SUB", "MULT", "DIV", "MOD", "INTO", "IS", "BEG", "PRINT", "NEWLN", "IOL", "LOI"] # List of keywords
+    self.keyword_set = frozenset(self.keywords) # Set of keywords for constant time lookup
+    # Scanner mode
+    self.single_pass = single_pass
+    # Output mode
+    self.compact = compact
     # List of tokens
     self.tokens = []
     # Output of the Lexical Analyzer
-    self.output = {}
-    # List of variables
-    self.variables = []
+    self.output = TokenStream() if compact else {}
+    # Variables keyed by name, kept in first-seen order
+    self.variables = {}
     # Errors list
     self.errors = []
+    # Lines of the input of the last retokenizeInput call, and their (tokens, variables, invalid words)
+    self.input_lines = []
+    self.line_results = []
+    # Number of variables and errors seen before each of those lines and after the last one
+    self.line_counts = [(0, 0)]
+    # Number of variables first seen before the first line changed by the last retokenizeInput call
+    self.retained_variable_count = 0
 
   def _isValidKeyword(self, word: str):
     """
       Checks if the word is a valid keyword.
       @param word: The word to be checked.
     """
-    return word in self.keywords
+    return word in self.keyword_set
   
   def _isValidIdentifier(self, word: str):
     """
@@ -61,64 +92,289 @@ class LexicalAnalyzer:
     """
     return "INT" if previous_token == "INT" else "STR"
 
+  def _registerVariable(self, name: str, data_type: str):
+    """
+      Adds the variable to the variables dictionary if it has not been seen yet.
+      @param name: The name of the variable.
+      @param data_type: The data type of the variable.
+    """
+    if name not in self.variables:
+      self.variables[name] = {"name": name, "data_type": data_type, "value": 0 if data_type == "INT" else ""}
+
+  def _newLine(self):
+    """
+      Gets the container that receives the tokens of the next line.
+    """
+    return self.output if self.compact else Tokens()
+
+  def _endLine(self, line_number: int, tokens: Tokens | TokenStream):
+    """
+      Adds the tokens of a finished line to the output.
+      @param line_number: The line number of the finished line.
+      @param tokens: The container returned by _newLine.
+    """
+    if self.compact:
+      self.output.end_line()
+    else:
+      self.output[line_number] = tokens.get_tokens()
+
+  def _tokenizeLine(self, line: str, line_number: int, tokens: Tokens | TokenStream):
+    """
+      Tokenizes a single line word by word.
+      @param line: The line to be tokenized.
+      @param line_number: The line number used in error messages.
+      @param tokens: The container that receives the tokens.
+    """
+    split_line = line.strip().split(' ')
+    previous_token = ""
+
+    # Tokenize each word in the line
+    for word in split_line:
+      # Ignore whitespace
+      if word == "": continue
+      # Remove leading and trailing whitespace
+      word = word.strip()
+      
+      token_type = self._tokenizeWord(word)
+      if token_type == "KEYWORD": # If the word is a keyword, add it to the tokens
+        tokens.add_token(word)
+
+      elif token_type == "IDENT": # If the word is an identifier, add it to the variables dictionary
+        self._registerVariable(word, self._getDataType(previous_token))
+        tokens.add_token("IDENT", word)
+
+      elif token_type == "INT_LIT": # If the word is an integer literal, add it to the tokens
+        tokens.add_token("INT_LIT", word)
+
+      else: # If the word is invalid, add it to the errors list
+        tokens.add_token("ERROR", word)
+        self.errors.append(f"Error on line {line_number} | Invalid word: {word}")
+      
+      previous_token = word
+
+  def _scanText(self, text: str, start: int, end: int, line_number: int, tokens: Tokens | TokenStream):
+    """
+      Tokenizes text[start:end] with the precompiled scanner pattern.
+      Every line break closes the current line, returns the line number and container of the last open line.
+      @param text: The text to be tokenized.
+      @param start: The position where scanning starts, at a line start or right before a line break.
+      @param end: The position where scanning stops, right before a line break or at the end of the text.
+      @param line_number: The line number of the first line.
+      @param tokens: The container that receives the tokens of the first line.
+    """
+    keyword_set = self.keyword_set
+    previous_token = ""
+
+    for ident, int_lit, newline, error in SCANNER_PATTERN.findall(text, start, end):
+      if ident:
+        if ident in keyword_set: # If the word is a keyword, add it to the tokens
+          tokens.add_token(ident)
+        else: # If the word is an identifier, add it to the variables dictionary
+          self._registerVariable(ident, self._getDataType(previous_token))
+          tokens.add_token("IDENT", ident)
+        previous_token = ident
+
+      elif int_lit: # If the word is an integer literal, add it to the tokens
+        tokens.add_token("INT_LIT", int_lit)
+        previous_token = int_lit
+
+      elif newline: # End of line, add the tokens to the output
+        self._endLine(line_number, tokens)
+        line_number += 1
+        tokens = self._newLine()
+        previous_token = ""
+
+      else: # If the word is invalid, add it to the errors list
+        error = error.strip()
+        tokens.add_token("ERROR", error)
+        self.errors.append(f"Error on line {line_number} | Invalid word: {error}")
+        previous_token = error
+
+    return line_number, tokens
+
   def tokenizeInput(self, input: str):
     """
       Tokenizes the input code and stores the tokens in a Tokens object.
       @param input: The input code to be tokenized.
     """
+    if self.compact: # A token stream always holds a single program
+      self.output = TokenStream()
+
+    if self.single_pass: # Scan the whole input at once
+      return self._scanInput(input)
 
     # Split the input into lines
     input = input.strip().split("\n")
 
     # Tokenize each line of the input
     for index, line in enumerate(input):
-      split_line = line.strip().split(' ')
+      tokens = self._newLine()
+      self._tokenizeLine(line, index + 1, tokens)
+
+      # Add the tokens to the output
+      self._endLine(index + 1, tokens)
+
+  def _tokenizeSingleLine(self, line: str):
+    """
+      Tokenizes one line on its own, returns its tokens, its (name, data type) variables and its invalid words.
+      @param line: The line to be tokenized.
+    """
+    tokens = Tokens()
+    if self.single_pass: # The line break before the line swallows its leading whitespace
+      line = line.lstrip()
+      self._scanText(line, 0, len(line), 0, tokens)
+    else:
+      self._tokenizeLine(line, 0, tokens)
+
+    line_tokens = tokens.get_tokens()
+    variables = []
+    invalid_words = []
+    previous_name = ""
+    for token in line_tokens:
+      if token["name"] == "IDENT": # The data type comes from the previous word, like in _tokenizeLine
+        variables.append((token["value"], self._getDataType(previous_name)))
+      elif token["name"] == "ERROR":
+        invalid_words.append(token["value"])
+      previous_name = token["name"]
+
+    return line_tokens, tuple(variables), tuple(invalid_words)
+
+  def retokenizeInput(self, input: str):
+    """
+      Tokenizes the input code, reusing the tokens of the lines that did not change since the previous call.
+      The changed lines are the ones between the longest unchanged prefix and suffix of lines.
+      The output is a dictionary of token lists, and the output, variables and errors are the same as tokenizeInput.
+      Only the output, variables and errors of the lines from the first changed one onward are rebuilt.
+      Returns the number of the first changed line, the lines before it have the same tokens as before.
+      @param input: The input code to be tokenized.
+    """
+    lines = input.strip().split("\n")
+    previous_lines = self.input_lines
+
+    # Find the unchanged lines at the start and at the end of the input
+    common = min(len(lines), len(previous_lines))
+    prefix = 0
+    while prefix < common and lines[prefix] == previous_lines[prefix]:
+      prefix += 1
+    suffix = 0
+    while suffix < common - prefix and lines[-1 - suffix] == previous_lines[-1 - suffix]:
+      suffix += 1
+
+    # Tokenize the changed lines only
+    changed_results = [self._tokenizeSingleLine(line) for line in lines[prefix:len(lines) - suffix]]
+    self.line_results[prefix:len(previous_lines) - suffix] = changed_results
+    self.input_lines = lines
+
+    # The output, variables and errors of the unchanged prefix are kept, the lines after it may be numbered differently
+    if isinstance(self.output, dict) and len(self.line_counts) == len(previous_lines) + 1:
+      for line_number in range(len(lines) + 1, len(previous_lines) + 1):
+        del self.output[line_number]
+    else: # Not built by retokenizeInput, rebuild everything
+      prefix = 0
+      self.output, self.line_counts = {}, [(0, 0)]
+    variable_count, error_count = self.line_counts[prefix]
+    for _ in range(len(self.variables) - variable_count):
+      self.variables.popitem() # Last seen first, including the ones added while tokenizing the changed lines
+    del self.errors[error_count:]
+    del self.line_counts[prefix + 1:]
+    self.retained_variable_count = variable_count
+
+    # Rebuild the rest, the variables in first-seen order and the errors with their line numbers
+    for index in range(prefix, len(lines)):
+      line_tokens, variables, invalid_words = self.line_results[index]
+      self.output[index + 1] = line_tokens
+      for name, data_type in variables:
+        self._registerVariable(name, data_type)
+      for word in invalid_words:
+        self.errors.append(f"Error on line {index + 1} | Invalid word: {word}")
+      self.line_counts.append((len(self.variables), len(self.errors)))
+
+    return prefix + 1
+
+  def _scanInput(self, input: str):
+    """
+      Tokenizes the input code in a single pass using the precompiled scanner pattern.
+      Produces the same output, errors and variables as the word by word tokenizer.
+      @param input: The input code to be tokenized.
+    """
+    input = input.strip()
+
+    line_number = 1
+    tokens = self._newLine()
+
+    # Scan the input in chunks that end right before a line break
+    start = 0
+    while True:
+      end = input.find("\n", start + SCANNER_CHUNK_SIZE)
+      if end == -1:
+        end = len(input)
+
+      line_number, tokens = self._scanText(input, start, end, line_number, tokens)
+
+      if end == len(input):
+        break
+      start = end
+
+    # Add the tokens of the last line to the output
+    self._endLine(line_number, tokens)
+
+  def tokenizeLines(self, lines: Iterable[str], symbol_table: SymbolTable | None = None):
+    """
+      Tokenizes the input code lazily, yielding (line number, tokens) for every line as soon as it is read.
+      Line numbers and tokens match tokenizeInput on the whole input, but the tokens are not kept in the output.
+      @param lines: The lines of the input code, such as an open file.
+      @param symbol_table: Optional symbol table that receives the new variables of a line before it is yielded.
+    """
+    line_number = 0
+    blank_lines = 0 # Blank lines are held back until a non-blank line follows, the input is stripped
+
+    for line in lines:
+      line = line.strip()
+
+      if not line: # Skip leading blank lines, count the others
+        if line_number:
+          blank_lines += 1
+        continue
+
+      for _ in range(blank_lines): # Blank lines inside the code have no tokens
+        line_number += 1
+        yield line_number, []
+      blank_lines = 0
+
+      line_number += 1
       tokens = Tokens()
+      if self.single_pass:
+        self._scanText(line, 0, len(line), line_number, tokens)
+      else:
+        self._tokenizeLine(line, line_number, tokens)
 
-      previous_token = ""
-
-      # Tokenize each word in the line
-      for word in split_line:
-        # Ignore whitespace
-        if word == "": continue
-        # Remove leading and trailing whitespace
-        word = word.strip()
-        
-        token_type = self._tokenizeWord(word)
-        if token_type == "KEYWORD": # If the word is a keyword, add it to the tokens
-          tokens.add_token(word)
-
-        elif token_type == "IDENT": # If the word is an identifier, add it to the variables list
-          data_type = self._getDataType(previous_token)
-          flag = False
-
-          for variable in self.variables: # Check if the variable is already in the variables list
-            if variable["name"] == word: 
-              flag = True
-              break
-
-          if not flag: # If the variable is not already in the variables list, add it
-            self.variables.append({"name": word, "data_type": data_type, "value": 0 if data_type == "INT" else ""})
-
-          tokens.add_token("IDENT", word)
-
-        elif token_type == "INT_LIT": # If the word is an integer literal, add it to the tokens
-          tokens.add_token("INT_LIT", word)
-
-        else: # If the word is invalid, add it to the errors list
-          tokens.add_token("ERROR", word)
-          self.errors.append(f"Error on line {index + 1} | Invalid word: {word}")
-        
-        previous_token = word
-      
-      # Add the tokens to the output dictionary
-      self.output[index + 1] = tokens.get_tokens()
+      if symbol_table is not None: # Add the variables seen for the first time to the symbol table
+        symbols = symbol_table.get_symbol_table()
+        for token in tokens.get_tokens():
+          if token["name"] == "IDENT" and token["value"] not in symbols:
+            variable = self.variables[token["value"]]
+            symbol_table.add_symbol(variable["name"], variable["data_type"], variable["value"])
+
+      yield line_number, tokens.get_tokens()
+
+    if not line_number: # Empty input still has one empty line
+      yield 1, []
+
+  def tokenizeFile(self, file_path: str, symbol_table: SymbolTable | None = None):
+    """
+      Tokenizes an .iol file lazily, see tokenizeLines.
+      @param file_path: The path of the input file.
+      @param symbol_table: Optional symbol table that receives the new variables of a line before it is yielded.
+    """
+    with open(file_path, "r", encoding="UTF-8") as file:
+      yield from self.tokenizeLines(file, symbol_table)
 
-  def getVariables(self):
+  def getVariables(self, start: int = 0):
     """
-      Gets the variables from the variables list.
+      Gets the variables in the order they were first seen.
+      @param start: Number of first seen variables to skip.
     """
-    return self.variables
+    return list(islice(self.variables.values(), start, None))
   
   def getOutput(self):
     """
@@ -9,13 +9,20 @@
 # Last Modified: 12/08/2024
 
 # Libraries
+import traceback # Report of the errors raised on the worker thread
 import tkinter as tk # Tkinter for GUI
-from tkinter import ttk, Menu, filedialog, messagebox
+from tkinter import ttk, Menu, filedialog, messagebox, simpledialog
 
 from lexical_analyzer import LexicalAnalyzer # Lexical Analysis component
 from symbol_table import SymbolTable # Symbol Table component
 from parser import Parser # Syntax Analysis and Static Semantics component
-from runtime import Runtime # Runtime component
+from runtime import JobRuntime # Runtime component
+from compiler import CompileResult, ProgramCompiler, compile_program, format_tokens # Bytecode compilation and optimisation for the runtime
+from worker import BackgroundWorker # Worker thread for compilation and execution
+from output_sink import TextWidgetSink # Batched output to the console
+from profiler import Profiler, profile_phase # Timing report of the phases
+
+WORKER_POLL_INTERVAL = 20 # Milliseconds between two checks of the messages of the worker thread
 
 class CompilerApp:
   """
@@ -26,7 +33,7 @@ class CompilerApp:
     self.is_dark_mode = True
     self.variables = []
     self.current_input = ""
-    self.tokenized_output = ""
+    self.tokenized_output = None # Formatted tokens of the last compiled code, once they are shown or saved
     self.file_directory = ""
     self.current_display_input = True
     self.opened_file = False
@@ -34,8 +41,17 @@ class CompilerApp:
     
     # Initialize classes
     self.symbol_table = SymbolTable()
-    self.lexical_analyzer = LexicalAnalyzer()
-    self.parser = Parser(self.symbol_table)
+    self.lexical_analyzer = LexicalAnalyzer(single_pass=True)
+    self.parser = Parser(self.symbol_table, incremental=True)
+    self.first_changed_line = 1 # First line edited since the last parse, the parser resumes from it
+    self.program_compiler = ProgramCompiler() # Keeps the bytecode of the statements before the first edited one
+    self.first_changed_statement = 0 # First statement changed since the last bytecode compilation
+    self.symbols_ran = False # The last execution left its values in the symbol table
+    self.tokens = {} # Tokens of the last compiled code
+    self.program = None # Optimised bytecode of the last compiled code
+    self.worker = BackgroundWorker() # Compiles and executes the code without blocking the main loop
+    self.compile_job = None
+    self.profiler = None # Profiler of the compilation and execution in progress, None if they are not profiled
     
     # Set up the main window
     self.main_window = tk.Tk()
@@ -77,6 +93,11 @@ class CompilerApp:
     self.run_menu = Menu(self.menu, tearoff=0)
     self.run_menu.add_command(label="Execute Code", command=self.execute_code, accelerator="Ctrl+E")
     self.menu.add_cascade(label="Run", menu=self.run_menu)
+
+    # Profile Menu
+    self.profile_menu = Menu(self.menu, tearoff=0)
+    self.profile_menu.add_command(label="Profile Code", command=self.profile_code, accelerator="Ctrl+P")
+    self.menu.add_cascade(label="Profile", menu=self.profile_menu)
     
     # Add menu to the main window
     self.main_window.config(menu=self.menu)
@@ -89,6 +110,7 @@ class CompilerApp:
     self.main_window.bind("<Control-c>", lambda event: self.compile_code())
     self.main_window.bind("<Control-j>", lambda event: self.show_tokenized_output())
     self.main_window.bind("<Control-e>", lambda event: self.execute_code())
+    self.main_window.bind("<Control-p>", lambda event: self.profile_code())
 
     # Frame for source code area
     self.code_frame_wrapper = tk.Frame(self.main_window, bg=self.bg_color)
@@ -135,8 +157,13 @@ class CompilerApp:
     self.tree.column("Type", anchor="center", width=80)
     self.tree.pack(fill="both", expand=True)
 
-    # Initialize Runtime after code_text and console_text are created
-    self.runtime = Runtime(self.console_text)
+    # Initialize Runtime, its output is written to console_text by process_worker_messages
+    self.runtime = JobRuntime()
+    self.console_sink = TextWidgetSink(self.console_text)
+
+    # Cancel the compilation when the code is edited, and handle the messages of the worker thread
+    self.code_text.bind("<<Modified>>", self.code_modified)
+    self.main_window.after(WORKER_POLL_INTERVAL, self.process_worker_messages)
   
   # Function to update the console text
   def update_console_text(self, text: str, operation: str = "insert"):
@@ -216,6 +243,10 @@ class CompilerApp:
     if file_path:
       with open(file_path, 'w') as file:
         file.write(self.code_text.get(1.0, tk.END))
+
+      # Write the tokenized output of the saved code if it is compiled
+      if self.tokens and self.code_text.get(1.0, tk.END).strip() == self.current_input:
+        self.write_tokenized_output()
       
       if not self.opened_file:
         # Update tab label if it's a new file
@@ -236,6 +267,10 @@ class CompilerApp:
       with open(file_path, 'w') as file:
         file.write(self.code_text.get(1.0, tk.END))
         self.main_window.title(f"Syntax Analyzer - {file_path.split('/')[-1]}")
+
+      # Write the tokenized output of the saved code if it is compiled
+      if self.tokens and self.code_text.get(1.0, tk.END).strip() == self.current_input:
+        self.write_tokenized_output()
         
       # Update tab label
       self.tab_label = file_path.split("/")[-1]
@@ -244,85 +279,141 @@ class CompilerApp:
       
       self.update_console_text(f"File saved as {file_path.split('/')[-1]}.", "overwrite")
 
-  def perform_lexical_analysis(self):
+  def perform_lexical_analysis(self, code: str):
     """
       Function to perform lexical analysis on the code using the Lexical Analyzer.
+      Runs on the worker thread, the variables are shown once the compilation is done.
     """
-    # Reset existing symbols and variables
-    self.reset_console_and_variables()
-    self.symbol_table.remove_all_symbols()
-    self.lexical_analyzer.variables.clear()
+    # Tokenize the lines edited since the last compilation
+    self.first_changed_line = min(self.first_changed_line, self.lexical_analyzer.retokenizeInput(code))
 
-    code = self.code_text.get(1.0, tk.END).strip() # Get the current code
-    self.current_input = code
-    
-    if not code: # Empty code textarea
-      self.update_console_text("Lexical Analysis failed. No code to analyze.", "overwrite")
-      return False
-    
-    # Validate IOL and LOI start and end codes
-    start_code = code.split("\n")[0].strip().split(' ')[0] 
-    end_code = code.split("\n")[-1].strip().split(' ')[-1] 
-    if start_code != "IOL" or end_code != "LOI":
-      self.update_console_text("Lexical Analysis failed. Please ensure that the code starts with IOL and ends with LOI.", "overwrite")
-      return False
-    
-    # Tokenize the input code
-    self.lexical_analyzer.tokenizeInput(code)
+    # Keep the symbols of the variables first seen before the first edited line, their slots and types are unchanged
+    self.symbol_table.remove_symbols_from(self.lexical_analyzer.retained_variable_count)
+    if self.symbols_ran:
+      self.symbol_table.reset_values()
+      self.symbols_ran = False
 
-    # Append existing variables to the symbol table
-    for variable in self.lexical_analyzer.variables:
+    # Append the variables of the edited lines and the lines after them to the symbol table
+    for variable in self.lexical_analyzer.getVariables(self.lexical_analyzer.retained_variable_count):
       self.symbol_table.add_symbol(
         variable["name"],
         variable["data_type"],
         variable["value"]
       )
-      
-    # Display variables in the symbol table
-    variables = self.symbol_table.get_symbol_table()
-    self.show_variables(variables)
-
-    # Get the tokenized output
-    lexical_output = self.lexical_analyzer.getOutput()
-    for token in lexical_output:
-      for item in lexical_output[token]:
-         self.tokenized_output += f"{item['name']} "
-      self.tokenized_output += "\n"
-    
-    # Write tokenized output to a file
-    with open(f"{self.file_directory}/output.tkn", "w") as file:
-      file.write(self.tokenized_output)
-      
-    # Check for errors in lexical analysis
-    if self.lexical_analyzer.errors:
-      for error in self.lexical_analyzer.errors:
-        self.error_message.append(error)
+
+    # Errors in lexical analysis
+    return list(self.lexical_analyzer.errors)
   
-  def perform_syntax_analysis(self):
+  def perform_syntax_analysis(self, profiler: Profiler | None = None):
     """
       Function to perform syntax analysis on the tokenized code using the Parser.
+      Runs on the worker thread, returns the errors and the optimised bytecode of the code, None if it has errors.
     """
     tokens = self.lexical_analyzer.getOutput() # Get the tokenized code
     
-    self.parser.parse(tokens) # Parse the tokenized code
-    
-    for error in self.parser.errors: # Check for errors in syntax and static semantics
-      self.error_message.append(error)
+    with profile_phase(profiler, "syntax analysis"):
+      self.parser.parse(tokens, self.first_changed_line) # Parse the tokenized code from the first edited line
+    self.first_changed_line = len(tokens) + 1
+    self.first_changed_statement = min(self.first_changed_statement, self.parser.kept_statement_count)
     
-  def compile_code(self):
+    errors = list(self.parser.errors) # Errors in syntax and static semantics
+    if errors:
+      return errors, None
+
+    # Compile the valid code to optimised bytecode from the first changed statement, the optimiser reports divisions by a constant zero
+    with profile_phase(profiler, "bytecode compilation"):
+      program, optimization_errors = self.program_compiler.compile(self.parser.tree, self.symbol_table, self.first_changed_statement)
+    self.first_changed_statement = len(self.parser.tree.statements)
+    return optimization_errors, program
+
+  def analyze_code(self, job, code: str, profiler: Profiler | None = None):
+    """
+      Job of the worker thread compiling the code, posts the result for show_compilation.
+    """
+    self.parser.hooks = profiler
+    self.parser.cancel_event = job.cancel_event
+    with profile_phase(profiler, "lexical analysis"):
+      errors = self.perform_lexical_analysis(code) # Perform lexical analysis
+    job.check()
+
+    syntax_errors, program = self.perform_syntax_analysis(profiler) # Perform syntax analysis
+    job.check()
+
+    tokens = self.lexical_analyzer.getOutput()
+    job.post("compiled", CompileResult(tokens, self.symbol_table, self.lexical_analyzer.getVariables(), errors + syntax_errors, program))
+
+  def run_code(self, job, program, profiler: Profiler | None = None):
+    """
+      Job of the worker thread executing the compiled code, its output is posted for the console.
+      The report of a profiled compilation and execution is posted once the program stops.
+    """
+    if program is None: # Code compiled with errors, the statements the parser recovered are run
+      program, _ = compile_program(self.parser.tree, self.symbol_table)
+      job.post("program", program)
+
+    self.runtime.job = job
+    self.runtime.hooks = profiler
+    self.runtime.cancel_event = job.cancel_event
+    self.symbols_ran = True
+    try:
+      with profile_phase(profiler, "execution"):
+        self.runtime.run_program(program, self.symbol_table)
+    finally:
+      if profiler is not None:
+        job.post("profile", profiler.report())
+
+  def profile_code(self):
+    """
+      Function to compile and execute the code while timing every phase, parser expansion and runtime instruction.
+    """
+    self.compile_code(Profiler())
+
+  def compile_code(self, profiler: Profiler | None = None):
     """
       Function to compile the code by performing lexical and syntax analysis.
+      The analysis runs on the worker thread, recompiling cancels the compilation or execution in progress.
     """
-    self.tokenized_output = "" # Reset tokenized output
+    self.profiler = profiler
+    self.tokenized_output = None # Reset tokenized output
+    self.error_message = [] # Reset the errors of the previous compilation
     self.current_input = self.code_text.get(1.0, tk.END).strip() # Get the current code
     
     if not self.current_display_input: # If the code has been modified, update the current input
       return
     
-    self.symbol_table.remove_all_symbols()
-    self.perform_lexical_analysis()  # Perform lexical analysis
+    self.worker.cancel()
+    self.tokens = {}
+    self.program = None
+    code = self.current_input
+
+    # Reset existing variables
+    self.reset_console_and_variables()
+    self.current_input = code
+
+    if not code: # Empty code textarea
+      self.update_console_text("Lexical Analysis failed. No code to analyze.", "overwrite")
+      return
     
-    self.perform_syntax_analysis() # Perform syntax analysis
+    # Validate IOL and LOI start and end codes
+    start_code = code.split("\n")[0].strip().split(' ')[0] 
+    end_code = code.split("\n")[-1].strip().split(' ')[-1] 
+    if start_code != "IOL" or end_code != "LOI":
+      self.update_console_text("Lexical Analysis failed. Please ensure that the code starts with IOL and ends with LOI.", "overwrite")
+      return
+
+    self.update_console_text("Compiling...", "overwrite")
+    self.compile_job = self.worker.submit(self.analyze_code, code, profiler)
+
+  def show_compilation(self, result: CompileResult):
+    """
+      Function to display the result of a compilation done by the worker thread, then execute the code if it has no errors.
+    """
+    self.tokens = result.tokens
+    self.program = result.program
+    self.error_message = result.errors
+
+    # Display variables in the symbol table
+    self.show_variables(result.symbol_table.get_symbol_table())
     
     # Guard clause for any errors in lexical, syntax, and static semantics
     if self.error_message:
@@ -330,6 +421,10 @@ class CompilerApp:
      
       for error in self.error_message: # Display errors
         self.update_console_text(f"{error}\n", "insert")
+
+      if self.profiler is not None: # The worker thread is done with the profiler
+        self.show_profile(self.profiler.report())
+        self.profiler = None
       
       return # Do not proceed to execution if there are errors
     
@@ -340,10 +435,8 @@ class CompilerApp:
   def execute_code(self):
     """
       Function to execute the code using the Runtime component.
+      The program runs on the worker thread, its output and input requests are handled by process_worker_messages.
     """
-    # Check if the code has been compiled
-    tokens = self.lexical_analyzer.getOutput()
-    
     # Get the current code
     code = self.code_text.get(1.0, tk.END).strip()
     self.current_input = code
@@ -353,13 +446,63 @@ class CompilerApp:
       return
     
     # If tokens is empty, the code has not been compiled
-    if not tokens:
+    if not self.tokens:
         self.update_console_text("Execution failed. Please compile the code first.\n", "overwrite")
         return
     
-    # Execute the code if there are no errors
+    # Execute the code
     self.update_console_text("\n\n=== IOL Execution ===\n", "insert")
-    self.runtime.process_input_code(tokens, self.symbol_table)
+    self.worker.submit(self.run_code, self.program, self.profiler)
+    self.profiler = None # Only the execution following a profiled compilation is profiled
+
+  def process_worker_messages(self):
+    """
+      Function called periodically by the Tk main loop to handle the messages of the worker thread.
+    """
+    try:
+      for kind, data in self.worker.poll():
+        if kind == "output": # Written once per call, or earlier for long outputs
+          self.console_sink.write(data[0])
+          continue
+        self.console_sink.flush()
+
+        if kind == "input": # The program waits for the value of a variable
+          variable_name, variable_type = data
+          self.worker.reply(simpledialog.askstring("Input", f"Enter value for {variable_name} (type: {variable_type})"))
+        elif kind == "compiled":
+          self.show_compilation(data[0])
+        elif kind == "program":
+          self.program = data[0]
+        elif kind == "profile":
+          self.show_profile(data[0])
+        elif kind == "error": # Shown in the console, the rest of the messages are still handled
+          error = data[0]
+          traceback.print_exception(error)
+          self.update_console_text(f"\n\nProgram terminated due to an internal error:\n{type(error).__name__}: {error}\n", "insert")
+        elif kind == "finished":
+          self.compile_job = None
+    finally:
+      self.console_sink.flush()
+      self.main_window.after(WORKER_POLL_INTERVAL, self.process_worker_messages)
+
+  def code_modified(self, event=None):
+    """
+      Function called when the code is edited, cancels the compilation in progress.
+    """
+    if self.compile_job is not None and self.compile_job is self.worker.current_job:
+      self.worker.cancel()
+      self.update_console_text("Compilation cancelled, the code was edited.", "overwrite")
+    self.code_text.edit_modified(False) # Get notified of the next edit
+
+  def write_tokenized_output(self):
+    """
+      Function to write the tokenized output of the last compiled code to output.tkn.
+      The tokens are formatted once they are first shown or saved, not on every compilation.
+    """
+    if self.tokenized_output is None:
+      self.tokenized_output = format_tokens(self.tokens)
+    with open(f"{self.file_directory}/output.tkn", "w") as file:
+      file.write(self.tokenized_output)
 
   def show_tokenized_output(self):
     """
@@ -368,9 +511,12 @@ class CompilerApp:
     current_text = self.code_text.get(1.0, tk.END).strip() # Get the current code
     
     # If text has been modified or not compiled yet
-    if current_text != self.current_input or not self.tokenized_output:
+    if current_text != self.current_input or not self.tokens:
         self.update_console_text("Please compile the code first.\n", "overwrite")
         return
+
+    # Write tokenized output to a file
+    self.write_tokenized_output()
         
     # Create tokenized output window
     token_window = tk.Toplevel()
@@ -398,6 +544,36 @@ class CompilerApp:
     # Make text read-only
     token_text.config(state=tk.DISABLED)
 
+  def show_profile(self, report: str):
+    """
+      Function to display the timing report of a profiled compilation and execution.
+    """
+    # Create profile report window
+    profile_window = tk.Toplevel()
+    profile_window.title("Profile Report")
+    profile_window.geometry("900x500")
+    
+    # Configure window to match main theme
+    profile_window.configure(bg=self.bg_color)
+    
+    # Create text widget for the report, without wrapping so the columns stay aligned
+    profile_text = tk.Text(
+        profile_window, 
+        wrap=tk.NONE,
+        font=("Consolas", 10),
+        bg=self.frame_color,
+        fg=self.text_color,
+        padx=10,
+        pady=10
+    )
+    profile_text.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
+    
+    # Insert the report
+    profile_text.insert(tk.END, report)
+    
+    # Make text read-only
+    profile_text.config(state=tk.DISABLED)
+
   def show_variables(self, variable_list):
     """
       Function to display the variables in the symbol table.
@@ -423,8 +599,7 @@ class CompilerApp:
   def reset_console_and_variables(self):
     self.current_input = "" # Reset current input
     self.variables = [] # Reset variables
-    self.symbol_table.remove_all_symbols() # Clear symbol table
-    self.show_variables(self.symbol_table.get_symbol_table()) # Clear variables table
+    self.show_variables({}) # Clear variables table, the symbol table is only used by the worker thread
     self.console_text.insert(tk.END, "Awaiting action...") # Reset console text
 
 # Main function to run the application
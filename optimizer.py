@@ -0,0 +1,262 @@
+from bisect import bisect_right
+
+import bytecode as bc
+from bytecode import Program
+
+# Expression nodes rebuilt from the bytecode are tuples:
+#   (CONSTANT, value)
+#   (VARIABLE, is pure, slot)
+#   (VALUE, slot) value of a variable loaded as is
+#   (OPERATION, is int, is pure, opcode, first operand, second operand, division index)
+# An expression is pure if evaluating it can never raise, so it can be removed without changing the program.
+CONSTANT = 0
+VARIABLE = 1
+OPERATION = 2
+VALUE = 3
+
+class Optimizer:
+  """
+    Optimisation pass over the bytecode of a program, run between the parser and the runtime.
+    Folds constant sub-expressions, simplifies x + 0, x - 0, x * 1 and x * 0, and drops expression statements
+    that cannot fail, without changing the output or the runtime errors of the program.
+    Divisions whose divisor is always zero are reported in errors.
+  """
+  def __init__(self):
+    self.errors = [] # Compile time errors found while optimising
+    self.constants = []
+    self.constant_index = {}
+    self.code = []
+    self.lines = []
+    self.int_slots = set() # Slots known to hold an integer, loading them can never fail
+    self.int_slot_changes = [] # (slot, was known to hold an integer) for every change of int_slots, undone on resume
+    self.checkpoint_offsets = [] # Offsets of the instructions reached with an empty stack by the last optimize
+    self.checkpoints = [] # (sizes of the code, constants, errors and int slot changes) before each of those instructions
+
+  def _constant(self, value):
+    """
+      Gets the index of a constant in the optimised program, adding it to its constants.
+    """
+    key = _constant_key(value)
+    index = self.constant_index.get(key)
+    if index is None:
+      index = self.constant_index[key] = len(self.constants)
+      self.constants.append(value)
+    return index
+
+  def _is_int(self, node: tuple):
+    if node[0] == CONSTANT:
+      return type(node[1]) is int
+    if node[0] == VALUE:
+      return False
+    return node[0] == VARIABLE or node[1] # Variables are loaded as integers, except by LOAD
+
+  def _is_pure(self, node: tuple):
+    if node[0] in (CONSTANT, VALUE):
+      return True
+    return node[1] if node[0] == VARIABLE else node[2]
+
+  def _fold(self, opcode: int, first: tuple, second: tuple, division_index: int, program: Program):
+    """
+      Builds the node of an operation, folding it when its operands allow it.
+    """
+    first_is_constant = first[0] == CONSTANT
+    second_is_constant = second[0] == CONSTANT
+
+    if opcode == bc.DIV and second_is_constant and second[1] == 0:
+      line_number = program.divisions[division_index][0]
+      self.errors.append(f"Semantic Error in line {line_number}: Division by zero, the divisor always evaluates to 0")
+
+    if first_is_constant and second_is_constant:
+      value = _evaluate(opcode, first[1], second[1])
+      if value is not None:
+        return (CONSTANT, value)
+
+    # Identities, only on integers so the type and sign of the result are unchanged
+    if self._is_int(first) and self._is_int(second):
+      if second_is_constant and type(second[1]) is int:
+        if second[1] == 0 and opcode in (bc.ADD, bc.SUB):
+          return first
+        if second[1] == 1 and opcode == bc.MULT:
+          return first
+        if second[1] == 0 and opcode == bc.MULT and self._is_pure(first):
+          return (CONSTANT, 0)
+
+      if first_is_constant and type(first[1]) is int:
+        if first[1] == 0 and opcode == bc.ADD:
+          return second
+        if first[1] == 1 and opcode == bc.MULT:
+          return second
+        if first[1] == 0 and opcode == bc.MULT and self._is_pure(second):
+          return (CONSTANT, 0)
+
+    # Integer operations never fail, except MOD by a divisor that may be zero
+    is_int = self._is_int(first) and self._is_int(second) and opcode != bc.DIV
+    is_pure = (
+      is_int and self._is_pure(first) and self._is_pure(second)
+      and (opcode != bc.MOD or (second_is_constant and second[1] != 0))
+    )
+    return (OPERATION, is_int, is_pure, opcode, first, second, division_index)
+
+  def _emit_node(self, node: tuple):
+    """
+      Emits the code of an expression, operands before their operation.
+    """
+    pending = [(node, False)]
+    while pending:
+      node, operands_emitted = pending.pop()
+
+      if node[0] == CONSTANT:
+        self.code += (bc.PUSH_CONST, self._constant(node[1]))
+      elif node[0] == VARIABLE:
+        self.code += (bc.LOAD_INT, node[2])
+      elif node[0] == VALUE:
+        self.code += (bc.LOAD, node[1])
+      elif operands_emitted:
+        self.code += (node[3], node[6] if node[3] in (bc.DIV, bc.MOD) else 0)
+      else:
+        pending.append((node, True))
+        pending.append((node[5], False))
+        pending.append((node[4], False))
+
+  def _set_int_slot(self, slot: int, is_int: bool):
+    self.int_slot_changes.append((slot, slot in self.int_slots))
+    if is_int:
+      self.int_slots.add(slot)
+    else:
+      self.int_slots.discard(slot)
+
+  def _resume(self, checkpoint: int):
+    """
+      Drops the optimised code and the state from the instruction of the checkpoint onward, returns the offset of the instruction.
+    """
+    offset = self.checkpoint_offsets[checkpoint]
+    code_size, constant_count, error_count, change_count = self.checkpoints[checkpoint]
+    del self.code[code_size:]
+    del self.lines[code_size // 2:]
+    for value in self.constants[constant_count:]:
+      del self.constant_index[_constant_key(value)]
+    del self.constants[constant_count:]
+    del self.errors[error_count:]
+    for slot, was_int in reversed(self.int_slot_changes[change_count:]):
+      if was_int:
+        self.int_slots.add(slot)
+      else:
+        self.int_slots.discard(slot)
+    del self.int_slot_changes[change_count:]
+    del self.checkpoint_offsets[checkpoint:]
+    del self.checkpoints[checkpoint:]
+    return offset
+
+  def optimize(self, program: Program, start: int = 0):
+    """
+      Gets the optimised program.
+      @param program: A program compiled by BytecodeCompiler.
+      @param start: Offset in the code of the first instruction changed since the previous call, the optimised code of the
+      instructions before it is kept. The code and the tables they use must be the same as in the previous call.
+    """
+    checkpoint = bisect_right(self.checkpoint_offsets, start) - 1
+    if checkpoint > 0:
+      start = self._resume(checkpoint)
+    else:
+      start = 0
+      self.errors = []
+      self.constants = []
+      self.constant_index = {}
+      self.code = []
+      self.lines = []
+      self.int_slots = set()
+      self.int_slot_changes = []
+      self.checkpoint_offsets = []
+      self.checkpoints = []
+
+    code = program.code
+    stack = [] # Expressions whose value is still on the stack
+    int_slots = self.int_slots
+
+    for index in range(start, len(code), 2):
+      opcode = code[index]
+      argument = code[index + 1]
+
+      if not stack: # Statements start with an empty stack, the optimisation can resume from here
+        self.checkpoint_offsets.append(index)
+        self.checkpoints.append((len(self.code), len(self.constants), len(self.errors), len(self.int_slot_changes)))
+
+      if opcode == bc.PUSH_CONST:
+        stack.append((CONSTANT, program.constants[argument]))
+
+      elif opcode == bc.LOAD_INT:
+        stack.append((VARIABLE, argument in int_slots, argument))
+
+      elif opcode == bc.LOAD:
+        stack.append((VALUE, argument))
+
+      elif opcode in (bc.ADD, bc.SUB, bc.MULT, bc.DIV, bc.MOD):
+        second = stack.pop()
+        first = stack.pop()
+        stack.append(self._fold(opcode, first, second, argument, program))
+
+      elif opcode == bc.POP: # The result of the expression is unused, only its errors matter
+        node = stack.pop()
+        if not self._is_pure(node):
+          self._emit_node(node)
+          self.code += (bc.POP, 0)
+
+      elif opcode == bc.STORE:
+        node = stack.pop()
+        self._emit_node(node)
+        self.code += (bc.STORE, argument)
+        self._set_int_slot(argument, self._is_int(node))
+
+      elif opcode == bc.PRINT:
+        node = stack.pop()
+        if node[0] == CONSTANT:
+          self.code += (bc.PRINT_TEXT, self._constant(node[1]))
+        else:
+          self._emit_node(node)
+          self.code += (bc.PRINT, 0)
+
+      elif opcode == bc.PRINT_TEXT:
+        self.code += (bc.PRINT_TEXT, self._constant(program.constants[argument]))
+
+      elif opcode == bc.FAIL:
+        # The program stops here, only the errors of the unfinished expressions before it matter
+        for node in stack:
+          if not self._is_pure(node):
+            self._emit_node(node)
+        stack = []
+        self.code += (opcode, argument)
+
+      else:
+        if opcode == bc.BEG: # An accepted INT input is stored as an integer
+          slot, _, variable_type, _ = program.inputs[argument]
+          self._set_int_slot(slot, variable_type == "INT")
+        self.code += (opcode, argument)
+
+      if program.lines: # Emitted instructions take the line of the instruction that emitted them
+        self.lines += [program.lines[index // 2]] * (len(self.code) // 2 - len(self.lines))
+
+    return Program(
+      tuple(self.code), tuple(self.constants), program.variables,
+      program.divisions, program.failures, program.inputs, tuple(self.lines)
+    )
+
+def _constant_key(value):
+  return (float, repr(value)) if type(value) is float else (type(value), value) # Keeps 0.0 and -0.0 apart
+
+def _evaluate(opcode: int, first, second):
+  """
+    Evaluates an operation on constants, None if it fails at runtime and cannot be folded.
+  """
+  try:
+    if opcode == bc.ADD:
+      return first + second
+    elif opcode == bc.SUB:
+      return first - second
+    elif opcode == bc.MULT:
+      return first * second
+    elif opcode == bc.DIV:
+      return None if second == 0 else first / second
+    elif opcode == bc.MOD:
+      return first % second
+  except (ArithmeticError, ValueError): # Division or modulo by zero, or a result too large for a float
+    return None
@@ -0,0 +1,78 @@
+from abc import ABC, abstractmethod
+
+DEFAULT_BATCH_SIZE = 256 # Number of written items joined into one write to the destination
+
+class OutputSink(ABC):
+  """
+    Buffered destination of the output of the runtime.
+    Written items are joined and sent to the destination in batches of batch_size items, or earlier when the sink is flushed.
+    Subclasses implement _emit to send a batch to their destination.
+  """
+  def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+    self.batch_size = batch_size
+    self.buffer = [] # Items written since the last flush
+
+  def write(self, text):
+    """
+      Buffers the text, sends the buffer once it holds batch_size items.
+    """
+    self.buffer.append(str(text))
+    if len(self.buffer) >= self.batch_size:
+      self.flush()
+
+  def flush(self):
+    """
+      Sends the buffered text to the destination.
+    """
+    if self.buffer:
+      text = "".join(self.buffer)
+      self.buffer = []
+      self._emit(text)
+
+  @abstractmethod
+  def _emit(self, text: str):
+    """
+      Sends a batch of text to the destination.
+    """
+
+class TextWidgetSink(OutputSink):
+  """
+    Sink writing to a Tk text widget, with one insert per batch instead of one per item.
+    The widget is kept read-only between batches. Must be used from the thread running the Tk main loop.
+  """
+  def __init__(self, text_widget, batch_size: int = DEFAULT_BATCH_SIZE):
+    super().__init__(batch_size)
+    self.text_widget = text_widget
+
+  def _emit(self, text: str):
+    import tkinter as tk
+    self.text_widget.config(state=tk.NORMAL)
+    self.text_widget.insert(tk.END, text)
+    self.text_widget.see(tk.END)
+    self.text_widget.config(state=tk.DISABLED)
+
+class StreamSink(OutputSink):
+  """
+    Sink writing to a text stream such as stdout or an open file, flushing the stream with the sink.
+  """
+  def __init__(self, stream, batch_size: int = DEFAULT_BATCH_SIZE):
+    super().__init__(batch_size)
+    self.stream = stream
+
+  def flush(self):
+    super().flush()
+    self.stream.flush()
+
+  def _emit(self, text: str):
+    self.stream.write(text)
+
+class CallbackSink(OutputSink):
+  """
+    Sink passing every batch to a function, such as one posting it to another thread.
+  """
+  def __init__(self, callback, batch_size: int = DEFAULT_BATCH_SIZE):
+    super().__init__(batch_size)
+    self.callback = callback
+
+  def _emit(self, text: str):
+    self.callback(text)
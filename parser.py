@@ -1,17 +1,66 @@
+from collections import deque
+from copy import copy
+from collections.abc import Iterable, Mapping
+from itertools import islice
+from grammar import Grammar, load_grammar # Import the compiled grammar
 from symbol_table import SymbolTable # Import the SymbolTable class
+from cancellation import JobCancelled # Raised when the parse is cancelled
+from syntax_tree import SyntaxTree, Declaration, Assignment, Input, Print, NewLine, Operation, Variable, Literal, prefix_nodes, format_expression # Syntax tree nodes
+
+# Semantic actions of the IOL, attached to the productions of grammar.prod by their name and symbols
+# Each action is the name of the Parser method called with the lookahead token and its line when the production is expanded
+IOL_ACTIONS = {
+  ("VariableDeclaration", "DataType IDENT VarDeclTail"): "_startDeclaration",
+  ("VarDeclTail", "e"): "_finishDeclaration",
+  ("Assignment", "INTO IDENT IS Expression"): "_startAssignment",
+  ("Input", "BEG IDENT"): "_startInput",
+  ("Output", "PRINT Expression"): "_startPrint",
+  ("Output", "NEWLN"): "_addNewLine",
+  ("Value", "INT_LIT"): "_addLiteral",
+  ("Value", "IDENT"): "_addVariable",
+  ("Operator", "ADD"): "_addOperator",
+  ("Operator", "SUB"): "_addOperator",
+  ("Operator", "MULT"): "_addOperator",
+  ("Operator", "DIV"): "_addOperator",
+  ("Operator", "MOD"): "_addOperator",
+  ("DataType", "INT"): "_setDataType",
+  ("DataType", "STR"): "_setDataType",
+}
+
+# Nonterminal at whose boundaries the parser resynchronises after a syntax error, in the IOL grammar
+RECOVERY_SYMBOL = "Statement"
 
 class Parser: 
   """
     A class to represent a parser object.
+    The syntax tree of the program is built during the derivation by the semantic actions of the expanded productions,
+    and every statement is checked for static semantics errors once it is complete.
+    Actions are dispatched by production number, see set_action to attach actions to the productions of another grammar.
+    After a syntax error the parser resynchronises at the next recovery_symbol, a statement of the IOL grammar, and goes on,
+    so a single parse reports every error. A parser without a recovery symbol stops at the first syntax error.
+    If incremental is set, the state of the parser is saved at the start of every line,
+    so a later parse of the same program can resume from the first edited line.
   """
-  def __init__(self, symbol_table: SymbolTable):
-    self.prod_table = [] # Production table for given IOL
-    self.parse_table = [] # Parse table for given IOL
+  def __init__(self, symbol_table: SymbolTable, grammar: Grammar | None = None, incremental: bool = False, recovery_symbol: str | None = RECOVERY_SYMBOL):
+    self.grammar = grammar if grammar is not None else load_grammar() # Compiled grammar, shared between parsers
+    self.prod_table = self.grammar.prod_table # Production table for given IOL
+    self.parse_table = self.grammar.parse_table # Parse table for given IOL
+    self.ll1_table = self.grammar.ll1_table # Nonterminal -> terminal -> (production number, production name, is epsilon, symbols to push)
     self.symbol_table = symbol_table # Symbol table object
+    self.actions = self._buildActions() # Production number -> semantic action, None for the productions without one
+
+    # Error recovery components, no recovery without a recovery symbol or if the grammar does not have it
+    self.recovery_symbol = recovery_symbol # Nonterminal at whose boundaries the parse resynchronises after a syntax error
+    self.sync_symbols = frozenset( # Nonterminals the recovery symbol starts from, the parse resumes from them
+      production[1] for production in self.prod_table if production[2].strip().split(' ')[0] == recovery_symbol
+    )
+    self.sync_tokens = ( # Tokens that can start or follow the recovery symbol, the input is skipped up to one of them
+      self.grammar.first_sets.get(recovery_symbol, frozenset()) | self.grammar.follow_sets.get(recovery_symbol, frozenset())
+    ) - {'e'}
 
     # NRPP components
     self.stack = [] # Stack for the parser
-    self.input_buffer = [] # Input buffer for the parser
+    self.input_buffer = deque() # Input buffer for the parser
     self.total_output = [] # Total output of the parser
 
     self.is_valid = bool # Flag to check if overall parsing is valid
@@ -20,211 +69,327 @@ class Parser:
     self.line_number = 1 # Line number of the input code
 
     # Semantic Analysis components
-    self.arithmetic_operators = ["ADD", "SUB", "MULT", "DIV", "MOD"]  
-    self.operation_stack_index = 0
-    self.operation_stack = []
+    self.tree = SyntaxTree([]) # Syntax tree of the program, built during the derivation
+    self.statement = None # Statement being built, checked once it is complete
+    self.open_operations = [] # Operations of the statement whose operands are not all parsed yet, innermost last
+    self.awaiting_variable = False # Whether the next IDENT is the variable of the statement
+    self.recovering = False # Whether the input is skipped up to the next statement after a syntax error
 
-    self.in_declaration = False # Flag to check if the parser is in declaration
-    self.declaration_stack = []
-    self.declaration_line = 0
+    # Incremental parsing components
+    self.incremental = incremental
+    self.snapshots = [] # State of the parser at the start of each line, the n-th snapshot is taken at line n
+    self.kept_statement_count = 0 # Statements of the tree kept from the previous parse by the last resumed parse
 
-    self.in_assignment = False # Flag to check if the parser is in assignment
-    self.assignment_stack = []
-    self.in_assignment_line = 0
+    # Profiling hooks called on every expansion, see profiler.ProfileHooks
+    self.hooks = None
 
-    self._getProdTable();
-    self._getParseTable()
+    self.cancel_event = None # Event checked at the start of every line, the parse stops with JobCancelled once it is set
 
-  def _getProdTable(self):
+  def _expressionSemanticAnalysis(self, expression):
     """
-      Get the production table from the input file named grammar.prod in the current working directory.
+      Perform semantic analysis on the expression.
+      The resulting type is INT only if every operand is INT, otherwise STR.
     """
-    try:
-      with open("grammar.prod", "r", encoding="UTF-8") as file: 
-        lines = file.readlines()
-        for line in lines:
-          # Split each line into tokens and strip whitespace
-          production = line.strip().split(',')
-          self.prod_table.append(production)
-        
-    except FileNotFoundError:
-      print("Error: grammar.prod file not found")
-    except Exception as e:
-      print(f"Error reading grammar.prod: {str(e)}")
+    for node in prefix_nodes(expression):
+      if type(node) is Variable and self.symbol_table.get_symbol(node.name).type != "INT":
+        return "STR"
+    return "INT"
 
-  def _getParseTable(self):
+  def _varDeclarationSemanticAnalysis(self, declaration: Declaration):
     """
-      Get the parse table from the input file named grammar.ptbl in the current working directory.
+      Perform semantic analysis on the variable declaration
     """
-    try:
-      with open("grammar.ptbl", "r", encoding="UTF-8") as file:
-        lines = file.readlines()
-        for line in lines:
-          # Split each line into tokens and strip whitespace
-          production = line.strip().split(',')
-          self.parse_table.append(production)
-      
-    except FileNotFoundError:
-      print("Error: grammar.ptbl file not found")
-    except Exception as e:
-      print(f"Error reading grammar.ptbl: {str(e)}")
+    var_data_type = declaration.data_type # Data type of the variable
+    value = declaration.value
 
-  def _getParseTableRow(self, symbol: str):
-    """
-      Get the row of the parse table corresponding to the given symbol.
-    """
-    for ind, X in enumerate(self.parse_table):
-      if X[0] == symbol:
-        return ind
+    # If value is declared when the variable is initialize, perform type checking
+    if (type(value) is Variable):
+      if (var_data_type == "INT"): # If the variable is an integer, check if the value is an integer
+        variable_type = self.symbol_table.get_symbol(value.name).type
 
-  def _getParseTableCol(self, symbol: str):
-    """
-      Get the column of the parse table corresponding to the given symbol.
-    """
-    for ind, X in enumerate(self.parse_table[0]):
-      if X == symbol:
-        return ind
+        if (variable_type != "INT"): # If the value is not an integer, append an error message
+          self.errors.append(f'Semantic Error in line {declaration.line}: {value.name} is {variable_type} (Expected {var_data_type})')
+
+    elif (type(value) is Literal):
+      if (var_data_type == "STR"): # If the variable is a string, an integer literal cannot initialise it
+        self.errors.append(f'Semantic Error in line {declaration.line}: {value.value} is INT (Expected {var_data_type})')
+
+    # Operations is detected
+    elif (type(value) is Operation): # If the variable is initialized with an expression, perform semantic analysis on the expression
+      resulting_type = self._expressionSemanticAnalysis(value)
+
+      if (var_data_type != resulting_type): # If the resulting type of the expression does not match the variable type, append an error message
+        self.errors.append(f"Semantic Error in line {declaration.line}: The resulting type of expression '{format_expression(value)}' is {resulting_type}. (Expected {var_data_type})")
 
-  def _getOperationStackNextToken(self):
+  def _assignmentSemanticAnalysis(self, assignment: Assignment):
     """
-      Get the next token in the operation stack.
+      Perform semantic analysis on the assignment statement
     """
-    self.operation_stack_index += 1
-    return self.operation_stack[self.operation_stack_index - 1]
+    variable_type = self.symbol_table.get_symbol(assignment.variable.name).type # Get the type of the variable
+    value = assignment.value
+
+    # Check if value is a variable
+    if (type(value) is Variable):
+      var_type = self.symbol_table.get_symbol(value.name).type
+
+      if (variable_type == "INT" and var_type == "STR"): # If the variable is an integer and the value is a string, append an error message
+        self.errors.append(f"Semantic Error in line {assignment.line}: {value.name} is {var_type}. (Expected {variable_type})")
+
+    # Check if value is an expression
+    elif (type(value) is Operation):
+      resulting_type = self._expressionSemanticAnalysis(value)
+
+      if (variable_type == "INT" and resulting_type == "STR"): # If the variable is an integer and the resulting type of the expression is a string, append an error message
+        self.errors.append(f"Semantic Error in line {assignment.line}: The resulting type of expression '{format_expression(value)}' is {resulting_type}. (Exptected {variable_type})")
 
-  def _expressionSemanticAnalysis(self):
+  def _buildActions(self):
     """
-      Perform semantic analysis on the expression.
+      Gets the semantic action of every production number of the grammar, from the IOL actions of the productions it shares with grammar.prod.
+      Production numbers start at 1, so the first entry is unused.
     """
-    operator = self._getOperationStackNextToken()
-
-    # Check if the op1 is expression
-    op1 = self._getOperationStackNextToken() 
-    if (op1["name"] in self.arithmetic_operators): # If the token is an operator, perform semantic analysis on the expression
-      self.operation_stack_index -= 1
-      op1_type = self._expressionSemanticAnalysis()
-    elif (op1["name"] == "IDENT"): # If the token is an identifier, get the type from the symbol table
-      variable = self.symbol_table.get_symbol(op1["value"])
-      op1_type = variable["type"]
-    else: # If the token is an integer literal, set the type to INT
-      op1_type = "INT"
-
-    # Check if the op1 is expression
-    op2 = self._getOperationStackNextToken()
-    if (op2["name"] in self.arithmetic_operators): # If the token is an operator, perform semantic analysis on the expression
-      self.operation_stack_index -= 1
-      op2_type = self._expressionSemanticAnalysis()
-    elif (op2["name"] == "IDENT"): # If the token is an identifier, get the type from the symbol table
-      variable = self.symbol_table.get_symbol(op2["value"])
-      op2_type = variable["type"]
-    else: # If the token is an integer literal, set the type to INT
-      op2_type = "INT"
-
-    return "INT" if (op1_type == "INT" and op2_type == "INT") else "STR" # Return the resulting type of the expression
-
-  def _varDeclarationSemanticAnalysis(self):
+    actions = [None] * (len(self.prod_table) + 1)
+    for production_number, production in enumerate(self.prod_table, 1):
+      action_name = IOL_ACTIONS.get((production[1], production[2].strip()))
+      if action_name is not None:
+        actions[production_number] = getattr(self, action_name)
+    return actions
+
+  def set_action(self, production_number: int, action):
     """
-      Perform semantic analysis on the variable declaration
+      Attaches a semantic action to a production, replacing its current action.
+      @param production_number: The number of the production in the production table, starting at 1.
+      @param action: Called with the lookahead token and its line whenever the production is expanded, None removes the action.
     """
-    var_data_type = self.declaration_stack[0]["name"] # Data type of the variable
+    if not 1 <= production_number <= len(self.prod_table):
+      raise ValueError(f"Invalid production number {production_number}")
+    self.actions[production_number] = action
 
-    # If value is declared when the variable is initialize, perform type checking
-    if (len(self.declaration_stack) == 4):
-      value = self.declaration_stack[3]
+  def _startDeclaration(self, token: dict, line: int):
+    self._startStatement(Declaration(None, None, None, line), True)
 
-      if (var_data_type == "INT"): # If the variable is an integer, check if the value is an integer
-        if (value["name"] == "IDENT"):
-          variable_type = self.symbol_table.get_symbol(value["value"])["type"]
-          
-          if (variable_type != "INT"): # If the value is not an integer, append an error message
-            self.errors.append(f'Semantic Error in line {self.declaration_line}: {value["value"]} is {variable_type} (Expected {var_data_type})')
-      
-    # Operations is detected
-    if(len(self.declaration_stack) > 4): # If the variable is initialized with an expression, perform semantic analysis on the expression
-      self.operation_stack = self.declaration_stack[3::]
-      resulting_type = self._expressionSemanticAnalysis()
-      
-      if (var_data_type != resulting_type): # If the resulting type of the expression does not match the variable type, append an error message
-        self.errors.append(f"Semantic Error in line {self.declaration_line}: The resulting type of expression '{' '.join(list(map(lambda x: x['name'] if x['value'] == None else x['value'], self.operation_stack)))}' is {resulting_type}. (Expected {var_data_type})")
-        
-      self._resetOperationStates() # Reset the operation states
+  def _setDataType(self, token: dict, line: int):
+    self.statement.data_type = token["name"]
+
+  def _finishDeclaration(self, token: dict, line: int):
+    self._finishStatement() # Declaration without a value
+
+  def _startAssignment(self, token: dict, line: int):
+    self._startStatement(Assignment(None, None, line), True)
+
+  def _startInput(self, token: dict, line: int):
+    self._startStatement(Input(None, line), True)
+
+  def _startPrint(self, token: dict, line: int):
+    self._startStatement(Print(None, line), False)
+
+  def _addNewLine(self, token: dict, line: int):
+    self._startStatement(NewLine(line), False)
+    self._finishStatement()
 
+  def _addLiteral(self, token: dict, line: int):
+    self._addOperand(Literal(token["value"], line))
 
-  def _assignmentSemanticAnalysis(self):
+  def _addVariable(self, token: dict, line: int):
+    self._addOperand(Variable(token["value"], line))
+
+  def _addOperator(self, token: dict, line: int):
+    self._addOperand(Operation(token["name"], None, None, line)) # Its operands follow
+
+  def _startStatement(self, statement, has_variable: bool):
     """
-      Perform semantic analysis on the assignment statement
+      Starts building a statement, its variable is the next IDENT if it has one.
     """
-    variable = self.assignment_stack[1] # Get the variable from the assignment stack
-    variable_type = self.symbol_table.get_symbol(variable["value"])["type"] # Get the type of the variable
-    value = self.assignment_stack[3] # Get the value from the assignment stack
+    self.statement = statement
+    self.awaiting_variable = has_variable
 
-    # Check if value is a variable
-    if (value["name"] == "IDENT"):
-      var = self.symbol_table.get_symbol(value["value"])
-      var_type = var["type"]
+  def _finishStatement(self):
+    """
+      Checks the statement once all of its tokens are parsed and adds it to the syntax tree.
+    """
+    statement = self.statement
+    if type(statement) is Declaration:
+      self._varDeclarationSemanticAnalysis(statement)
+    elif type(statement) is Assignment:
+      self._assignmentSemanticAnalysis(statement)
 
-      if (variable_type == "INT" and var_type == "STR"): # If the variable is an integer and the value is a string, append an error message
-        self.errors.append(f"Semantic Error in line {self.in_assignment_line}: {value["value"]} is {var_type}. (Expected {variable_type})")
-        
-    # Check if value is an expression
-    elif (value["name"] in self.arithmetic_operators):
-      self.operation_stack = self.assignment_stack[3::]
-      resulting_type = self._expressionSemanticAnalysis() 
-      
-      if (variable_type == "INT" and resulting_type == "STR"): # If the variable is an integer and the resulting type of the expression is a string, append an error message
-        self.errors.append(f"Semantic Error in line {self.in_assignment_line}: The resulting type of expression '{' '.join(list(map(lambda x: x['name'] if x['value'] == None else x['value'], self.operation_stack)))}' is {resulting_type}. (Exptected {variable_type})")
-      
-      self._resetOperationStates()
-    
-  def _resetVarDeclStates(self):
+    self.tree.statements.append(statement)
+    self.statement = None
+
+  def _addOperand(self, node):
+    """
+      Adds an operator or value of the expression being parsed to the statement.
+      The statement is finished once its expression has all of its operands.
+    """
+    open_operations = self.open_operations
+    if open_operations: # Operand of the innermost open operation
+      operation = open_operations[-1]
+      if operation.first is None:
+        operation.first = node
+      else:
+        operation.second = node
+    else:
+      self.statement.value = node
+
+    if type(node) is Operation: # Its operands follow
+      open_operations.append(node)
+      return
+
+    # Close the operations completed by this value
+    while open_operations and open_operations[-1].second is not None:
+      open_operations.pop()
+    if not open_operations:
+      self._finishStatement()
+
+  def _copyOpenStatement(self, statement, open_operations: list):
     """
-      Reset the variable declaration states
+      Copies the statement being built and its open operations, the only nodes changed by the rest of the parse.
+      Complete nodes are shared with the copy.
     """
-    self.in_declaration = False
-    self.declaration_stack = []
-    self.declaration_line = 0
-  
-  def _resetAssignState(self):
+    if statement is None:
+      return None, []
+
+    statement = copy(statement)
+    parent = statement
+    copies = []
+    for operation in open_operations:
+      operation_copy = copy(operation)
+      if parent is statement:
+        parent.value = operation_copy
+      elif parent.second is operation:
+        parent.second = operation_copy
+      else:
+        parent.first = operation_copy
+      copies.append(operation_copy)
+      parent = operation_copy
+    return statement, copies
+
+  def _takeSnapshot(self, line: int, current_symbol: str):
     """
-      Reset the assignment states
+      Saves the state of the parser at the start of a line.
+      Finished statements are never changed, so the number of statements is enough to restore the syntax tree.
     """
-    self.in_assignment = False
-    self.assignment_stack = []
-    self.assignment_stack_index = 0
-    self.in_assignment_line = 0
-  
-  def _resetOperationStates(self):
+    return (
+      line, current_symbol, list(self.stack),
+      tuple(self.input_buffer) if current_symbol != '$' else (), # Input left after the end symbol is never parsed
+      self.is_valid, len(self.errors),
+      len(self.tree.statements), self.tree.end_line,
+      *self._copyOpenStatement(self.statement, self.open_operations), self.awaiting_variable, self.recovering
+    )
+
+  def _restoreSnapshot(self, snapshot: tuple):
     """
-      Reset the operation states
+      Restores the state of the parser saved at the start of a line, returns the line and the current symbol.
     """
-    self.operation_stack = []
-    self.operation_stack_index = 0
+    (
+      line, current_symbol, stack, input_buffer, self.is_valid, error_count,
+      statement_count, self.tree.end_line, statement, open_operations, self.awaiting_variable, self.recovering
+    ) = snapshot
+
+    self.stack = list(stack)
+    self.input_buffer = deque(input_buffer)
+    self.errors = self.errors[:error_count]
+    del self.tree.statements[statement_count:]
+    self.statement, self.open_operations = self._copyOpenStatement(statement, open_operations)
+    return line, current_symbol
+
+  def _recover(self, current_symbol: str):
+    """
+      Panic mode error recovery after a syntax error, resynchronises the parse at the next statement.
+      The statement the error was found in is discarded, the stack is popped back to the nonterminal the statement started from,
+      and the input is skipped up to a token in the FIRST or FOLLOW set of a statement.
+      Returns the symbol the parse resumes from, None if the error is outside of the statements and the parse cannot go on.
+    """
+    self.statement = None
+    self.open_operations = []
+    self.awaiting_variable = False
+
+    if (current_symbol in self.sync_symbols): # The error is at the start of a statement, skip at least its first token
+      self.input_buffer.popleft()
+
+    while (current_symbol not in self.sync_symbols):
+      if not self.stack:
+        return None
+      current_symbol = self.stack.pop()
+
+    self.recovering = True
+    self._skipInput()
+    return current_symbol
 
-  def parse(self, input_tokens: list[dict]):
+  def _skipInput(self):
     """
-      Parse the input tokens using the production and parse tables.
+      Skips the input up to the next token that can start or follow a statement.
+      The rest of the statement may be on the next lines, the skip goes on as they are added to the input buffer.
     """
-    # Reset the containers
-    self.total_output = []
-    self.input_buffer = []
-    self.errors = []
-    self.is_valid = True
+    input_buffer = self.input_buffer
+    sync_tokens = self.sync_tokens
+    while (input_buffer and input_buffer[0]["name"] not in sync_tokens):
+      input_buffer.popleft()
+
+    if input_buffer:
+      self.recovering = False
 
-    self.stack.append('$') # End symbol
-    self.stack.append(self.prod_table[0][1]) # Start symbol is the first symbol of the first production
-    current_symbol = self.stack.pop() # Get the current symbol from the stack
+  def parse(self, input_tokens: Mapping[int, list[dict]] | Iterable[tuple[int, list[dict]]], resume_line: int | None = None):
+    """
+      Parse the input tokens using the production and parse tables.
+      The tokens are either a line number -> tokens mapping or (line number, tokens) pairs,
+      such as the ones yielded by LexicalAnalyzer.tokenizeFile, which are parsed as they are produced.
+      If the parser is incremental and resume_line is given, parsing resumes from the state saved at the start of that line,
+      or of the last line reached by the previous parse if it stopped before. The lines before resume_line must not have changed
+      since the previous parse of the line number -> tokens mapping. The statements of the tree before kept_statement_count are the ones of the previous tree.
+    """
+    lines = input_tokens.items() if isinstance(input_tokens, Mapping) else input_tokens
+    hooks = self.hooks
+    actions = self.actions
+    snapshot_count = min(resume_line, len(self.snapshots)) if self.incremental and resume_line is not None else 0
+
+    if snapshot_count > 0 and isinstance(input_tokens, Mapping):
+      # Resume from the nearest saved line, the snapshots after it are taken again
+      first_line, current_symbol = self._restoreSnapshot(self.snapshots[snapshot_count - 1])
+      del self.snapshots[snapshot_count - 1:]
+      lines = islice(lines, first_line - 1, None)
+      self.kept_statement_count = len(self.tree.statements)
+
+    else:
+      # Reset the containers
+      self.total_output = []
+      self.input_buffer = deque()
+      self.errors = []
+      self.is_valid = True
+      self.snapshots = []
+      self.kept_statement_count = 0
+
+      # Reset the state left by a previous parse
+      self.stack = []
+      self.tree = SyntaxTree([])
+      self.statement = None
+      self.open_operations = []
+      self.awaiting_variable = False
+      self.recovering = False
+
+      self.stack.append('$') # End symbol
+      self.stack.append(self.prod_table[0][1]) # Start symbol is the first symbol of the first production
+      current_symbol = self.stack.pop() # Get the current symbol from the stack
 
     # Iterate through each line of the input tokens.
-    for line in input_tokens:
+    for line, line_tokens in lines:
+      if self.cancel_event is not None and self.cancel_event.is_set():
+        raise JobCancelled()
+
+      if self.incremental:
+        self.snapshots.append(self._takeSnapshot(line, current_symbol))
+
       self.line_number = line
 
-      # Stop the function if an error is found
-      if not self.is_valid:
+      # Stop the function if an error could not be recovered from
+      if current_symbol is None:
         break
 
       # Add the line to the input buffer
-      for token in input_tokens[line]:
-        self.input_buffer.append(token)
+      self.input_buffer.extend(line_tokens)
+      if self.recovering: # Rest of a statement with a syntax error
+        self._skipInput()
+      if not self.input_buffer: # Nothing to parse on an empty line
+        continue
       
       # Initialize the current input and symbol
       current_input = self.input_buffer[0]
@@ -234,23 +399,14 @@ class Parser:
         
         # If the current symbol matches the current input
         if (current_symbol == current_input["name"]):
-          if (current_symbol == "LOI"): 
-            if (self.in_assignment): # If the parser is in assignment, perform semantic analysis
-              self._assignmentSemanticAnalysis()
-              self._resetAssignState()
-              
-            elif (self.in_declaration): # If the parser is in declaration, perform semantic analysis
-              self._varDeclarationSemanticAnalysis()
-              self._resetVarDeclStates()
-
-          if (self.in_declaration): # If the parser is in declaration, append the input to the declaration stack
-            self.declaration_stack.append(current_input)
-          
-          if (self.in_assignment): # If the parser is in assignment, append the input to the assignment stack
-            self.assignment_stack.append(current_input)
+          self.input_buffer.popleft() # Remove the first element of the input buffer
+
+          if (self.awaiting_variable and current_symbol == "IDENT"): # Variable of the statement
+            self.awaiting_variable = False
+            self.statement.variable = Variable(current_input["value"], line)
+            if (type(self.statement) is Input):
+              self._finishStatement()
 
-          self.input_buffer.pop(0) # Remove the first element of the input buffer
-          
           # Update the current symbol and input
           current_symbol = self.stack.pop()
           current_input = self.input_buffer[0] if len(self.input_buffer) != 0 else ''
@@ -259,71 +415,43 @@ class Parser:
         elif (current_symbol.isupper() and current_symbol != current_input["name"]):
           self.errors.append(f'Error on line {line} | Terminal mismatch - Expected {current_symbol}, found {current_input["name"]} with value {current_input["value"]}')
           self.is_valid = False
-          break
+          current_symbol = self._recover(current_symbol)
+          if current_symbol is None:
+            break
+          current_input = self.input_buffer[0] if len(self.input_buffer) != 0 else ''
 
         # if the current symbol is non-terminal, get the production from the parse table
         else:
-          parse_row = self._getParseTableRow(current_symbol)
-          parse_col = self._getParseTableCol(current_input["name"])
+          entry = self.ll1_table.get(current_symbol, {}).get(current_input["name"])
 
-          # If the parse_row or col is not a valid index raise error
-          if parse_row == None or parse_col == None:
+          # if there is no production for the symbol and input raise error
+          if entry is None:
             self.errors.append(f'Error on line {line} | No production found for input {current_input["name"]} with value {current_input["value"]}')
             self.is_valid = False
-            break
+            current_symbol = self._recover(current_symbol)
+            if current_symbol is None:
+              break
+            current_input = self.input_buffer[0] if len(self.input_buffer) != 0 else ''
+            continue
+          
+          production_number, production_name, is_epsilon, stack_symbols = entry
+          if hooks is not None:
+            hooks.expansion(production_name)
 
-          parse_cell = self.parse_table[parse_row][parse_col]
+          # Run the semantic action of the production, the current input is its first token
+          action = actions[production_number]
+          if action is not None:
+            action(current_input, line)
 
-          # if the parse cell is empty raise error 
-          if parse_cell == '':
-            self.errors.append(f'Error on line {line} | No production found for input {current_input["name"]} with value {current_input["value"]}')
-            self.is_valid = False
-            break
-          
-          # Get the production from the production table
-          production = self.prod_table[int(parse_cell) - 1][2]
-          production_name = self.prod_table[int(parse_cell) - 1][1]
-          production_symbols = production.strip().split(' ')
-
-          if(production_name == "VariableDeclaration"): # If the production is a variable declaration
-            self.in_assignment = False
-
-            if (self.in_declaration): # If the parser is in declaration, perform semantic analysis
-              self._varDeclarationSemanticAnalysis()
-              self._resetVarDeclStates
-            
-            self.in_declaration = True # Set the parser to declaration
-            self.declaration_line = line # Set the declaration line
-            
-          if (self.in_declaration and production_name == "VarDeclTail"): # If the parser is in declaration and the production is a variable declaration tail
-            if ('e' in production_symbols): # If the production contains epsilon, perform semantic analysis
-              self._varDeclarationSemanticAnalysis()
-              self._resetVarDeclStates
-
-          if(production_name == "Assignment"): # If the production is an assignment
-            self.in_declaration = False
-
-            if(self.in_assignment): # If the parser is in assignment, perform semantic analysis
-              self._assignmentSemanticAnalysis()
-              self._resetAssignState()
-            
-            self.in_assignment = True
-            self.in_assignment_line = line
-          
-          if(production_name in ["Input", "Output"]): # If the production is an input or output
-            if (self.in_assignment):
-              self._assignmentSemanticAnalysis()
-              self._resetAssignState()
-
-            elif (self.in_declaration):
-              self._varDeclarationSemanticAnalysis()
-              self._resetVarDeclStates()
-            
           # Add the symbols to stack in reverse order
-          for symbol in production_symbols[::-1]:
-            if symbol != 'e':
-              self.stack.append(symbol)
+          self.stack.extend(stack_symbols)
           
           current_symbol = self.stack.pop()
 
+      if (current_symbol == '$' and not self.tree.end_line): # LOI was matched on this line
+        self.tree.end_line = line
 
+    else:
+      # Save the state after the last line, lines added at the end of the program resume from it
+      if self.incremental:
+        self.snapshots.append(self._takeSnapshot(len(self.snapshots) + 1, current_symbol))
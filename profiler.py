@@ -0,0 +1,136 @@
+import time
+from contextlib import contextmanager
+
+from bytecode import OPCODE_NAMES
+
+class ProfileHooks:
+  """
+    Hooks called around the compiler phases, on every parser expansion and on every runtime instruction.
+    Every hook does nothing, subclasses override the ones they need.
+    The parser and the runtime only call them when their hooks attribute is set, so they cost nothing otherwise.
+  """
+  def phase_started(self, phase: str):
+    pass
+
+  def phase_finished(self, phase: str):
+    pass
+
+  def expansion(self, production_name: str):
+    pass
+
+  def instruction(self, opcode: int):
+    pass
+
+@contextmanager
+def profile_phase(hooks: ProfileHooks | None, phase: str):
+  """
+    Calls the phase hooks around the body of the with statement, does nothing if there are no hooks.
+  """
+  if hooks is None:
+    yield
+    return
+
+  hooks.phase_started(phase)
+  try:
+    yield
+  finally:
+    hooks.phase_finished(phase)
+
+class Histogram:
+  """
+    Count and total time of an event, with a histogram of its durations in powers of two of microseconds.
+    Bucket i counts the durations under 2^i microseconds and at least half of that.
+  """
+  __slots__ = ("count", "total", "buckets")
+
+  def __init__(self):
+    self.count = 0
+    self.total = 0.0
+    self.buckets = []
+
+  def add(self, seconds: float):
+    self.count += 1
+    self.total += seconds
+    bucket = int(seconds * 1e6).bit_length()
+    if bucket >= len(self.buckets):
+      self.buckets.extend([0] * (bucket + 1 - len(self.buckets)))
+    self.buckets[bucket] += 1
+
+  def format_buckets(self):
+    return " ".join(f"<{1 << bucket}us:{count}" for bucket, count in enumerate(self.buckets) if count)
+
+class Profiler(ProfileHooks):
+  """
+    Hooks collecting the count and wall time of the phases, of the parser expansions of every production
+    and of the runtime instructions of every opcode.
+    An expansion or instruction lasts until the next event, so the time spent matching tokens is counted with the expansion before it.
+    Reading the clock on every event slows the parser and the runtime down, compare the times relative to each other.
+  """
+  def __init__(self):
+    self.phases = {} # Phase -> histogram
+    self.expansions = {} # Production name -> histogram
+    self.instructions = {} # Opcode -> histogram
+    self.phase_starts = {}
+
+    self.event = None # Histogram of the last expansion or instruction, and when it started
+    self.event_start = 0.0
+
+  def _finish_event(self, now: float):
+    """
+      Adds the time since the last expansion or instruction started to its histogram.
+    """
+    if self.event is not None:
+      self.event.add(now - self.event_start)
+      self.event = None
+
+  def phase_started(self, phase: str):
+    now = time.perf_counter()
+    self._finish_event(now)
+    self.phase_starts[phase] = now
+
+  def phase_finished(self, phase: str):
+    now = time.perf_counter()
+    self._finish_event(now)
+    self.phases.setdefault(phase, Histogram()).add(now - self.phase_starts.pop(phase))
+
+  def expansion(self, production_name: str):
+    now = time.perf_counter()
+    self._finish_event(now)
+    histogram = self.expansions.get(production_name)
+    if histogram is None:
+      histogram = self.expansions[production_name] = Histogram()
+    self.event = histogram
+    self.event_start = now
+
+  def instruction(self, opcode: int):
+    now = time.perf_counter()
+    self._finish_event(now)
+    histogram = self.instructions.get(opcode)
+    if histogram is None:
+      histogram = self.instructions[opcode] = Histogram()
+    self.event = histogram
+    self.event_start = now
+
+  def report(self):
+    """
+      Gets the timing report, one table per kind of event with the slowest events first.
+    """
+    self._finish_event(time.perf_counter())
+    lines = []
+    tables = (
+      ("Phase", self.phases),
+      ("Parser expansion", self.expansions),
+      ("Runtime instruction", {OPCODE_NAMES[opcode]: histogram for opcode, histogram in self.instructions.items()}),
+    )
+
+    for title, histograms in tables:
+      if not histograms:
+        continue
+      lines.append(f"{title:24} {'count':>10} {'total ms':>10} {'mean us':>9}  histogram")
+      for name, histogram in sorted(histograms.items(), key=lambda item: -item[1].total):
+        lines.append(
+          f"{name:24} {histogram.count:>10,} {histogram.total * 1e3:>10.3f} {histogram.total / histogram.count * 1e6:>9.2f}  {histogram.format_buckets()}"
+        )
+      lines.append("")
+
+    return "\n".join(lines) if lines else "Nothing was profiled."
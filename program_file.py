@@ -0,0 +1,365 @@
+import mmap
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+from functools import cached_property
+
+import bytecode as bc
+from bytecode import Program
+from symbol_table import SymbolTable
+
+# Compiled program files (.iolc)
+# A header followed by sections of unsigned 32-bit words in the byte order of the machine that wrote the file,
+# each aligned to 8 bytes. Texts are kept once in a string pool and referenced by index.
+# The code and the line table are read in place from the mapped file, so a large program starts without being
+# decoded and processes loading the same file share its pages.
+MAGIC = b"IOLC"
+FORMAT_VERSION = 2
+
+# Sections, in the order of the header
+CODE = 0 # Flat (opcode, argument) pairs
+LINES = 1 # Source line number of each instruction
+STRING_OFFSETS = 2 # Start of every string in STRINGS, followed by the end of the last one
+STRINGS = 3 # UTF-8 texts of the string pool
+CONSTANTS = 4 # (kind, string) of the constants of the program, then of the symbol values
+SYMBOLS = 5 # (name string, type string, initial value constant) of every slot
+DIVISIONS = 6 # (line number, message string)
+FAILURES = 7 # Error message string
+INPUTS = 8 # (slot, name string, type string, line number)
+SECTION_COUNT = 9
+
+# Kinds of constants, stored as text
+INT_CONSTANT = 0
+FLOAT_CONSTANT = 1
+STR_CONSTANT = 2
+
+_HEADER = struct.Struct("<4sHBBII") # Magic, version, byte order, word size, section count, constants of the program
+_SECTION = struct.Struct("<QQ") # Offset and size in bytes
+_BYTE_ORDERS = ("little", "big")
+
+class ProgramFileError(Exception):
+  """
+    Raised when a compiled program file is not a valid .iolc file of this version.
+  """
+
+class _Encoder:
+  """
+    Builds the sections of a compiled program file.
+  """
+  def __init__(self):
+    self.strings = []
+    self.string_index = {}
+    self.constants = array("I")
+    self.constant_index = {}
+
+  def string(self, text: str):
+    """
+      Gets the index of a text in the string pool, adding it to the pool.
+    """
+    index = self.string_index.get(text)
+    if index is None:
+      index = self.string_index[text] = len(self.strings)
+      self.strings.append(text.encode("UTF-8"))
+    return index
+
+  def constant(self, value):
+    """
+      Gets the index of a constant, adding it to the constants.
+    """
+    if type(value) is int:
+      kind, text = INT_CONSTANT, hex(value) # Not limited in length like decimal conversions
+    elif type(value) is float:
+      kind, text = FLOAT_CONSTANT, repr(value)
+    elif type(value) is str:
+      kind, text = STR_CONSTANT, value
+    else:
+      raise ProgramFileError(f"Cannot store a constant of type {type(value).__name__}")
+
+    key = (kind, text)
+    index = self.constant_index.get(key)
+    if index is None:
+      index = self.constant_index[key] = len(self.constants) // 2
+      self.constants += array("I", (kind, self.string(text)))
+    return index
+
+def _encode(program: Program, symbol_table: SymbolTable):
+  """
+    Gets the bytes of every section of a program.
+  """
+  encoder = _Encoder()
+  constants = [encoder.constant(value) for value in program.constants] # Constant i of the program is constant i of the file
+
+  symbols = array("I")
+  for name in program.variables:
+    symbol = symbol_table.get_symbol(name)
+    symbols += array("I", (encoder.string(name), encoder.string(symbol.type), encoder.constant(symbol.value)))
+
+  divisions = array("I")
+  for line_number, message in program.divisions:
+    divisions += array("I", (line_number, encoder.string(message)))
+
+  failures = array("I", (encoder.string(message) for message in program.failures))
+
+  inputs = array("I")
+  for slot, name, variable_type, line_number in program.inputs:
+    inputs += array("I", (slot, encoder.string(name), encoder.string(variable_type), line_number))
+
+  if constants != list(range(len(constants))): # Equal constants of different types or repeated in the program
+    raise ProgramFileError("The constants of the program are not distinct")
+
+  string_offsets = array("I", [0])
+  for text in encoder.strings:
+    string_offsets.append(string_offsets[-1] + len(text))
+
+  sections = [None] * SECTION_COUNT
+  sections[CODE] = array("I", program.code).tobytes()
+  sections[LINES] = array("I", program.lines).tobytes()
+  sections[STRING_OFFSETS] = string_offsets.tobytes()
+  sections[STRINGS] = b"".join(encoder.strings)
+  sections[CONSTANTS] = encoder.constants.tobytes()
+  sections[SYMBOLS] = symbols.tobytes()
+  sections[DIVISIONS] = divisions.tobytes()
+  sections[FAILURES] = failures.tobytes()
+  sections[INPUTS] = inputs.tobytes()
+  return sections
+
+# Values an instruction pops from the stack and pushes onto it, by opcode
+_POPS = {bc.ADD: 2, bc.SUB: 2, bc.MULT: 2, bc.DIV: 2, bc.MOD: 2, bc.POP: 1, bc.STORE: 1, bc.PRINT: 1}
+_PUSHES = {bc.PUSH_CONST: 1, bc.LOAD_INT: 1, bc.LOAD: 1, bc.ADD: 1, bc.SUB: 1, bc.MULT: 1, bc.DIV: 1, bc.MOD: 1}
+
+def _check_code(program: Program, problem: str):
+  """
+    Checks that every instruction is known, references an entry of its table and finds its operands on the stack,
+    and that the program ends with an instruction that stops it, so the runtime never reads outside of the file.
+    @param problem: The start of the error messages.
+  """
+  tables = { # Length of the table the argument of the opcode indexes
+    bc.PUSH_CONST: len(program.constants), bc.PRINT_TEXT: len(program.constants),
+    bc.LOAD_INT: len(program.variables), bc.LOAD: len(program.variables), bc.STORE: len(program.variables), bc.PRINT_VAR: len(program.variables),
+    bc.DIV: len(program.divisions), bc.MOD: len(program.divisions),
+    bc.FAIL: len(program.failures),
+    bc.BEG: len(program.inputs),
+  }
+  code = program.code
+  depth = 0
+  for index in range(0, len(code), 2):
+    opcode = code[index]
+    argument = code[index + 1]
+    if opcode >= len(bc.OPCODE_NAMES):
+      raise ProgramFileError(f"{problem}: unknown opcode {opcode} at instruction {index // 2}")
+    if argument >= tables.get(opcode, argument + 1):
+      raise ProgramFileError(f"{problem}: argument {argument} of {bc.OPCODE_NAMES[opcode]} out of its table at instruction {index // 2}")
+
+    depth -= _POPS.get(opcode, 0)
+    if depth < 0:
+      raise ProgramFileError(f"{problem}: {bc.OPCODE_NAMES[opcode]} without its operands at instruction {index // 2}")
+    depth += _PUSHES.get(opcode, 0)
+
+  if not code or code[-2] not in (bc.HALT, bc.FAIL):
+    raise ProgramFileError(f"{problem}: the code does not end with HALT or FAIL")
+  for slot, _, _, _ in program.inputs:
+    if slot >= len(program.variables):
+      raise ProgramFileError(f"{problem}: input of slot {slot} out of the symbols")
+
+def encode_program(program: Program, symbol_table: SymbolTable):
+  """
+    Gets the bytes of the .iolc file of a compiled program and the variables of its slots.
+    @param program: The optimised bytecode of the program.
+    @param symbol_table: The symbol table the program was compiled with.
+  """
+  if array("I").itemsize != 4:
+    raise ProgramFileError("Unsigned integers are not 32-bit on this machine")
+  _check_code(program, "Invalid program") # Once here, so loading the file does not check it again
+
+  sections = _encode(program, symbol_table)
+  header = _HEADER.pack(MAGIC, FORMAT_VERSION, _BYTE_ORDERS.index(sys.byteorder), 4, SECTION_COUNT, len(program.constants))
+  offset = _HEADER.size + _SECTION.size * SECTION_COUNT
+  table = []
+  for section in sections:
+    offset += -offset % 8
+    table.append((offset, len(section)))
+    offset += len(section)
+
+  data = bytearray(header)
+  for section_offset, size in table:
+    data += _SECTION.pack(section_offset, size)
+  for (section_offset, _), section in zip(table, sections):
+    data += b"\0" * (section_offset - len(data))
+    data += section
+  return bytes(data)
+
+def write_program(path: str, program: Program, symbol_table: SymbolTable):
+  """
+    Writes a compiled program and the variables of its slots to a .iolc file.
+    @param program: The optimised bytecode of the program.
+    @param symbol_table: The symbol table the program was compiled with.
+  """
+  data = encode_program(program, symbol_table)
+  with open(path, "wb") as file:
+    file.write(data)
+
+class _Decoder:
+  """
+    Reads the sections of a mapped compiled program file.
+  """
+  def __init__(self, view: memoryview):
+    if len(view) < _HEADER.size:
+      raise ProgramFileError("File too short for a compiled program")
+
+    magic, version, byte_order, word_size, section_count, self.constant_count = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+      raise ProgramFileError("Not a compiled IOL program")
+    if version != FORMAT_VERSION or word_size != 4 or section_count != SECTION_COUNT:
+      raise ProgramFileError(f"Unsupported compiled program format version {version}")
+    if byte_order >= len(_BYTE_ORDERS):
+      raise ProgramFileError("Invalid byte order")
+    if array("I").itemsize != 4:
+      raise ProgramFileError("Unsigned integers are not 32-bit on this machine")
+    if len(view) < _HEADER.size + _SECTION.size * SECTION_COUNT:
+      raise ProgramFileError("Truncated compiled program")
+
+    self.view = view
+    self.swap = _BYTE_ORDERS[byte_order] != sys.byteorder # Written on a machine of the other byte order
+    self.sections = [_SECTION.unpack_from(view, _HEADER.size + _SECTION.size * index) for index in range(SECTION_COUNT)]
+    for offset, size in self.sections:
+      if offset + size > len(view):
+        raise ProgramFileError("Truncated compiled program")
+
+  def bytes(self, section: int):
+    offset, size = self.sections[section]
+    return self.view[offset:offset + size]
+
+  def words(self, section: int):
+    """
+      Gets the words of a section, in place from the mapped file when it was written on a machine of the same byte order.
+    """
+    data = self.bytes(section)
+    if len(data) % 4:
+      raise ProgramFileError("Truncated compiled program")
+    if not self.swap:
+      return data.cast("I")
+
+    words = array("I")
+    words.frombytes(data)
+    words.byteswap()
+    return words
+
+  @cached_property
+  def string_offsets(self):
+    return self.words(STRING_OFFSETS)
+
+  def string(self, index: int):
+    """
+      Decodes a text of the string pool.
+    """
+    pool = self.bytes(STRINGS)
+    start, end = self.string_offsets[index], self.string_offsets[index + 1]
+    if start > end or end > len(pool):
+      raise ProgramFileError("Corrupted compiled program: string offsets out of the string pool")
+    return str(pool[start:end], "UTF-8")
+
+  @cached_property
+  def constant_words(self):
+    return self.words(CONSTANTS)
+
+  def constant(self, index: int):
+    """
+      Decodes a constant.
+    """
+    kind, text = self.constant_words[2 * index], self.string(self.constant_words[2 * index + 1])
+    return int(text, 16) if kind == INT_CONSTANT else float(text) if kind == FLOAT_CONSTANT else text
+
+def _records(words, width: int):
+  """
+    Gets the records of a section of fixed width records.
+  """
+  if len(words) % width:
+    raise ProgramFileError("Truncated compiled program")
+  return [tuple(words[index:index + width]) for index in range(0, len(words), width)]
+
+@contextmanager
+def _reading():
+  """
+    Reports references out of their table and texts that cannot be decoded as a corrupted program.
+  """
+  try:
+    yield
+  except (IndexError, ValueError) as error:
+    raise ProgramFileError(f"Corrupted compiled program: {error}")
+
+class _MappedProgram(Program):
+  """
+    Program read in place from a compiled program file.
+    The code and the line table are views of the file, the other tables are decoded on first use.
+  """
+  def __init__(self, decoder: _Decoder):
+    self.decoder = decoder
+    self.code = decoder.words(CODE)
+    self.lines = decoder.words(LINES)
+
+  @cached_property
+  def constants(self):
+    with _reading():
+      if self.decoder.constant_count > len(self.decoder.constant_words) // 2:
+        raise ProgramFileError("Corrupted compiled program: missing constants")
+      return tuple(self.decoder.constant(index) for index in range(self.decoder.constant_count))
+
+  @cached_property
+  def variables(self):
+    with _reading():
+      return tuple(self.decoder.string(name) for name, _, _ in _records(self.decoder.words(SYMBOLS), 3))
+
+  @cached_property
+  def divisions(self):
+    with _reading():
+      return tuple((line_number, self.decoder.string(message)) for line_number, message in _records(self.decoder.words(DIVISIONS), 2))
+
+  @cached_property
+  def failures(self):
+    with _reading():
+      return tuple(self.decoder.string(message) for message in self.decoder.words(FAILURES))
+
+  @cached_property
+  def inputs(self):
+    with _reading():
+      return tuple(
+        (slot, self.decoder.string(name), self.decoder.string(variable_type), line_number)
+        for slot, name, variable_type, line_number in _records(self.decoder.words(INPUTS), 4)
+      )
+
+def load_program(path: str, verify: bool = False):
+  """
+    Loads a program written by write_program, returns the program and a symbol table holding the variables of its slots.
+    The file is mapped into memory and its code is not copied, the mapping lives as long as the program.
+    @param verify: Whether to check every instruction, for files that may not have been written by write_program.
+  """
+  with open(path, "rb") as file:
+    try:
+      data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError: # Empty file
+      raise ProgramFileError("File too short for a compiled program")
+
+  return decode_program(data, verify)
+
+def decode_program(data, verify: bool = False):
+  """
+    Decodes the bytes of a .iolc file, returns the program and a symbol table holding the variables of its slots.
+    Nothing is decoded but the symbols: the code is read in place, the data lives as long as the program, and the
+    other tables are decoded when the runtime first uses them.
+    @param verify: Whether to decode every table and check every instruction, the code was checked when it was
+    written, so only files that may not have been written by write_program need it.
+  """
+  decoder = _Decoder(memoryview(data))
+  program = _MappedProgram(decoder)
+  if len(program.code) % 2 or (program.lines and len(program.lines) * 2 != len(program.code)):
+    raise ProgramFileError("Corrupted compiled program: the code and the line table do not match")
+
+  symbol_table = SymbolTable()
+  with _reading():
+    for name, variable_type, value in _records(decoder.words(SYMBOLS), 3):
+      symbol_table.add_symbol(decoder.string(name), decoder.string(variable_type), decoder.constant(value))
+
+  if verify:
+    _check_code(program, "Corrupted compiled program")
+  return program, symbol_table
@@ -1,268 +1,240 @@
 import re
-import tkinter as tk 
+import sys
+import bytecode as bc
+from bytecode import Program
+from output_sink import OutputSink, TextWidgetSink, StreamSink, CallbackSink
 from symbol_table import SymbolTable
+from cancellation import JobCancelled
+
+CANCEL_CHECK_INTERVAL = 2 ** 16 # Instructions run between two checks of the cancel event
 
 class Runtime:
   """
     Runtime class for running the input code 
+    Output is written in batches to an output sink, the console text widget by default, and input is asked with a dialog.
+    tkinter is only imported when used.
   """
-  def __init__(self, console_text_widget):
-    # Initialize the console text widget, symbol table, tokens, line number, and token index
+  def __init__(self, console_text_widget, output_sink: OutputSink | None = None):
+    # Initialize the console text widget, output sink and symbol table
     self.console_text_widget = console_text_widget
+    self.output_sink = output_sink if output_sink is not None else TextWidgetSink(console_text_widget)
     self.symbol_table = SymbolTable()
-    self.tokens = {}
 
-    self.line_number = 1
-    self.token_index = 0
-    
     self.errors = []
 
-    self.arithmetic_operators = ["ADD", "SUB", "MULT", "DIV", "MOD"]
+    # Profiling hooks called on every instruction of run_program, see profiler.ProfileHooks
+    self.hooks = None
+
+    self.cancel_event = None # Event checked while the program runs, it stops with JobCancelled once it is set
 
-  def _get_next_token(self):
+  def _write(self, text: str):
     """
-      Gets the next token from the tokens dictionary.
+      Writes the text to the output sink, which sends it to its destination in batches.
     """
-    commands = self.tokens[self.line_number] # Get the commands in the current line
+    self.output_sink.write(text)
 
-    if self.token_index >= len(commands): # If the token index is greater than the length of the commands, move to the next line
-      self.line_number += 1
-      self.token_index = 0
-      return self._get_next_token()
+  def _read_input(self, variable_name: str, variable_type: str):
+    """
+      Asks the user for the value of a variable, returns None if the input is cancelled.
+    """
+    import tkinter.simpledialog
+    return tkinter.simpledialog.askstring("Input", f"Enter value for {variable_name} (type: {variable_type})")
 
-    # Update the token index
-    self.token_index += 1
-    return commands[self.token_index - 1]
+  def _echo_input(self, user_input: str):
+    """
+      Writes the accepted user input to the console.
+    """
+    self._write(user_input + "\n")
 
-  def _peek_next_token(self):
+  def _write_termination(self):
     """
-      Peeks the next token from the tokens dictionary.
+      Writes how the program terminated.
     """
-    commands = self.tokens[self.line_number]
-    return commands[self.token_index] if self.token_index < len(commands) else None
-  
-  def _process_arithmetic_operator(self, current_operator: str):
+    # If no error message, update the console text widget
+    # If there is any error message, update the console and stop runtime
+    if self.errors:
+      self._write("\n\nProgram terminated due to encountered error:\n")
+      for error in self.errors:
+        self._write(error + "\n")
+      
+    else:
+      self._write("\n\nProgram terminated successfully...")
+
+  def _read_variable(self, program: Program, input_index: int, values: list):
     """
-      Processes the arithmetic operator in the input code.
+      Reads the value of a variable for a BEG instruction, returns False if the input is rejected.
     """
-    op1 = self._get_next_token() # Get first operand
+    slot, variable_name, variable_type, line_number = program.inputs[input_index]
+    self._write("Input for " + variable_name + ": ")
+    self.output_sink.flush() # Show the prompt before waiting for the input
 
-    # If the operand is a variable, get its value from the symbol table
-    if op1["name"] == "IDENT":
-      op1_type = self.symbol_table.get_symbol(op1["value"])["type"]
-      
-      if op1_type != "INT": # if type is not int, raise an error
-        self.errors.append(f"Runtime error on line {self.line_number} | Operand {op1['value']} is not an integer")
-        raise Exception(f"Error: Operand {op1['value']} is not an integer")
-      
-      op1_value = int(self.symbol_table.get_symbol(op1["value"])["value"]) # Get the value of the variable
- 
-    elif op1["name"] == "INT_LIT": # Get the value of the integer literal
-      op1_value = int(op1["value"])
+    # Get user input, a cancelled input is an empty input
+    user_input = self._read_input(variable_name, variable_type)
+    if user_input == None:
+      user_input = ""
 
-    elif op1["name"] in self.arithmetic_operators: # Get the result of the operation
-      result = self._process_arithmetic_operator(op1["name"])
-      op1_value = result
-    
-    op2 = self._get_next_token() # Get the second operand
+    # Check data type of user input and match with variable type
+    if variable_type == "INT":
+      if not re.fullmatch(r'^[0-9]+$', user_input):
+        self.errors.append(f"Runtime error on line {line_number} | Expected an integer for variable {variable_name}")
+        return False
 
-    if op2["name"] == "IDENT": # Get the value of the variable
-      op2_type = self.symbol_table.get_symbol(op2["value"])["type"]
-      
-      if op2_type != "INT": # if type is not int, raise an error
-        self.errors.append(f"Runtime error on line {self.line_number} | Operand {op2['value']} is not an integer")
-        raise Exception(f"Error | Operand {op2['value']} is not an integer")
-      
-      op2_value = int(self.symbol_table.get_symbol(op2["value"])["value"]) # Get the value of the variable
+      values[slot] = int(user_input)
+      self._echo_input(user_input)
+
+    elif variable_type == "STR":
+      if re.fullmatch(r'^[0-9]+$', user_input): # Validate that the input is not a pure number
+        self.errors.append(f"Runtime error on line {line_number} | Expected a string for variable {variable_name}")
+        return False
 
-    elif op2["name"] == "INT_LIT": # Get the value of the integer literal
-      op2_value = int(op2["value"])
+      values[slot] = user_input
+      self._echo_input(user_input)
 
-    elif op2["name"] in self.arithmetic_operators: # Get the result of the operation
-      result = self._process_arithmetic_operator(op2["name"])
-      op2_value = result
+    return True
 
-    # Perform the operation
-    if current_operator == "ADD":
-      return op1_value + op2_value
-    elif current_operator == "SUB":
-      return op1_value - op2_value
-    elif current_operator == "MULT":
-      return op1_value * op2_value
-    elif current_operator == "DIV":
-      if op2_value == 0: # If division by zero, raise an error
-        if op2["name"] == "IDENT":
-          self.errors.append(f"Runtime error on line {self.line_number} | Division by zero in variable {op2['value']}")
-          raise Exception(f"Runtime error on line {self.line_number} | Division by zero in variable {op2['value']}")
-        else:
-          self. error_message.append(f"Runtime error on line {self.line_number} | Division by zero in integer literal {op2['value']}")
-          raise Exception(f"Runtime error on line {self.line_number} | Division by zero in integer literal {op2['value']}")
-      return op1_value / op2_value
-    elif current_operator == "MOD":
-      return op1_value % op2_value
-    
-  def _process_print(self):
+  def _execute(self, program: Program, values: list):
     """
-      Processes the print operation in the input code.
+      Executes the instructions of the program until it halts or stops on a runtime error.
     """
-    token_to_print = self._get_next_token() # Get the token to print
-
-    # If the token to print is a variable, get its value from the symbol table
-    if token_to_print["name"] == "IDENT":
-      value = self.symbol_table.get_symbol(token_to_print["value"])["value"]
-      self.console_text_widget.config(state=tk.NORMAL)
-      self.console_text_widget.insert(tk.END, value)
-      self.console_text_widget.see(tk.END)
-      self.console_text_widget.config(state=tk.DISABLED)
-    
-    # If the token to print is an integer literal, insert it into the console text widget
-    elif token_to_print["name"] == "INT_LIT":
-      self.console_text_widget.config(state=tk.NORMAL)
-      self.console_text_widget.insert(tk.END, token_to_print["value"])
-      self.console_text_widget.see(tk.END)
-      self.console_text_widget.config(state=tk.DISABLED)
-    
-    # If the token to print is an arithmetic operator, get the result of the operation and insert it into the console text widget
-    elif token_to_print["name"] in self.arithmetic_operators:
-      result = self._process_arithmetic_operator(token_to_print["name"])
-      self.console_text_widget.config(state=tk.NORMAL)
-      self.console_text_widget.insert(tk.END, result)
-      self.console_text_widget.see(tk.END)
-      self.console_text_widget.config(state=tk.DISABLED)
-  
-  def process_input_code(self, tokens: dict, symbol_table: SymbolTable):
+    code = program.code
+    constants = program.constants
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    write = self._write
+    instruction_hook = self.hooks.instruction if self.hooks is not None else None
+    cancel_event = self.cancel_event
+    next_check = CANCEL_CHECK_INTERVAL * 2 if cancel_event is not None else sys.maxsize # Program counter of the next check
+
+    PUSH_CONST, LOAD_INT, ADD, SUB, MULT, DIV, MOD = bc.PUSH_CONST, bc.LOAD_INT, bc.ADD, bc.SUB, bc.MULT, bc.DIV, bc.MOD
+    POP, STORE, PRINT, PRINT_VAR, PRINT_TEXT, NEWLN = bc.POP, bc.STORE, bc.PRINT, bc.PRINT_VAR, bc.PRINT_TEXT, bc.NEWLN
+    BEG, FAIL, LOAD = bc.BEG, bc.FAIL, bc.LOAD
+
+    program_counter = 0
+    while True:
+      opcode = code[program_counter]
+      argument = code[program_counter + 1]
+      program_counter += 2
+      if instruction_hook is not None:
+        instruction_hook(opcode)
+      if program_counter > next_check:
+        next_check += CANCEL_CHECK_INTERVAL * 2
+        if cancel_event.is_set():
+          raise JobCancelled()
+
+      if opcode == LOAD_INT:
+        push(int(values[argument]))
+      elif opcode == PUSH_CONST:
+        push(constants[argument])
+      elif opcode == ADD:
+        operand = pop()
+        stack[-1] = stack[-1] + operand
+      elif opcode == MULT:
+        operand = pop()
+        stack[-1] = stack[-1] * operand
+      elif opcode == SUB:
+        operand = pop()
+        stack[-1] = stack[-1] - operand
+      elif opcode == STORE:
+        values[argument] = pop()
+      elif opcode == DIV:
+        operand = pop()
+        if operand == 0: # Division by zero
+          self.errors.append(program.divisions[argument][1])
+          return
+        stack[-1] = stack[-1] / operand
+      elif opcode == MOD:
+        operand = pop()
+        if operand == 0: # Modulo by zero
+          self.errors.append(program.divisions[argument][1])
+          return
+        stack[-1] = stack[-1] % operand
+      elif opcode == PRINT:
+        write(pop())
+      elif opcode == PRINT_VAR:
+        write(values[argument])
+      elif opcode == PRINT_TEXT:
+        write(constants[argument])
+      elif opcode == NEWLN:
+        write("\n")
+      elif opcode == POP:
+        pop()
+      elif opcode == BEG:
+        if not self._read_variable(program, argument, values):
+          return
+      elif opcode == LOAD:
+        push(values[argument])
+      elif opcode == FAIL:
+        self.errors.append(program.failures[argument])
+        return
+      else: # HALT
+        return
+
+  def run_program(self, program: Program, symbol_table: SymbolTable):
     """
-      Iterates through the tokens and processes them.
+      Runs a program compiled by BytecodeCompiler with the same symbol table.
+      A runtime error stops the program, it is added to errors and written with the termination message.
     """
     self.symbol_table = symbol_table
-    self.tokens = tokens
-
-    self.line_number = 1
-    self.token_index = 0
-
-    current_token = self._get_next_token()
-
-    # Iterate through the tokens until the end of the input code
-    while current_token["name"] != "LOI": 
-      
-      if self.errors: # If any error message is encountered, stop the runtime
-        break
-      
-      if current_token["name"] in self.arithmetic_operators: # If the token is an arithmetic operator, process it
-        result = self._process_arithmetic_operator(current_token["name"])
-
-      elif current_token["name"] == "PRINT": # If the token is a print operation, process it
-        self._process_print()
-
-      elif current_token["name"] == "NEWLN": # If the token is a newline, insert a newline into the console text widget
-        self.console_text_widget.config(state=tk.NORMAL)
-        self.console_text_widget.insert(tk.END, "\n")
-        self.console_text_widget.see(tk.END)
-        self.console_text_widget.config(state=tk.DISABLED)
-      
-      elif current_token["name"] == "INTO": # If the token is an INTO operation, process it
-        variable = self._get_next_token()
-        is_keyword = self._get_next_token()
-        value = self._get_next_token()
+    self.errors = []
 
-        if value["name"] == "INT_LIT":
-          self.symbol_table.update_symbol(variable["value"], int(value["value"]))
-          
-        elif value["name"] == "IDENT":
-          ident_value = self.symbol_table.get_symbol(value["value"])["value"]
-          self.symbol_table.update_symbol(variable["value"], int(ident_value))
-          
-        elif value["name"] in self.arithmetic_operators:
-          result = self._process_arithmetic_operator(value["name"])
-          self.symbol_table.update_symbol(variable["value"], result)
+    # Variables live in slots while the program runs and are written back to the symbol table afterwards
+    symbols = [symbol_table.get_symbol_at(slot) for slot in range(len(program.variables))]
+    values = [symbol.value for symbol in symbols]
+    try:
+      self._execute(program, values)
+      self._write_termination()
+    finally:
+      for symbol, value in zip(symbols, values):
+        symbol.value = value
+      self.output_sink.flush() # Show the output written before an error too
+
+class ConsoleRuntime(Runtime):
+  """
+    Runtime that runs the input code without a GUI.
+    Output is written to a text stream (stdout by default) and BEG input is read line by line from another one (stdin by default).
+  """
+  def __init__(self, output = None, input = None, echo_input: bool | None = None):
+    self.output = output if output is not None else sys.stdout
+    super().__init__(None, StreamSink(self.output))
+    self.input = input if input is not None else sys.stdin
+    # Echo the input like the GUI console does, unless a user typed it in a terminal
+    self.echo_input = echo_input if echo_input is not None else not self.input.isatty()
+
+  def _echo_input(self, user_input: str):
+    """
+      Writes the accepted user input, unless the user typed it in a terminal.
+    """
+    if self.echo_input:
+      self._write(user_input + "\n")
 
-      elif current_token["name"] == "INT":
-        variable = self._get_next_token()
+  def _read_input(self, variable_name: str, variable_type: str):
+    """
+      Reads the value of a variable from the next input line, returns None at the end of the input.
+    """
+    line = self.input.readline()
+    if line == "":
+      return None
+    return line.rstrip("\r\n")
 
-        if (self._peek_next_token()["name"] == "IS"):
-          self._get_next_token()
-          value = self._get_next_token()
+class JobRuntime(Runtime):
+  """
+    Runtime that runs the input code in a job of a BackgroundWorker, without touching the widgets from the worker thread.
+    Batches of output and input requests are posted to the main thread, and the program stops at its next batch once the job is cancelled.
+  """
+  def __init__(self):
+    super().__init__(None, CallbackSink(self._post_output))
+    self.job = None # Job running the program, set before every run
 
-          if value["name"] == "INT_LIT":
-            self.symbol_table.update_symbol(variable["value"], int(value["value"]))
-            
-          elif value["name"] == "IDENT":
-            ident_value = self.symbol_table.get_symbol(value["value"])["value"]
-            ident_type = self.symbol_table.get_symbol(value["value"])["type"]
-            if ident_type == "STR":
-                self.errors.append(f"Error: Cannot store f{ident_type} type into variable f{variable['name']}")
-                raise Exception(f"Error: Cannot store f{ident_type} type into variable f{variable["name"]}")
-            self.symbol_table.update_symbol(variable["value"], int(ident_value))
-        
-      # Input operation in the form BEG var_name  
-      elif current_token["name"] == "BEG":
-        variable = self._get_next_token()
-        variable_type = self.symbol_table.get_symbol(variable["value"])["type"]
-        
-        # if the variable is not in the symbol table, raise an error
-        if not self.symbol_table.get_symbol(variable["value"]):
-          self.errors.append(f"Runtime error on line {self.line_number} | Variable {variable['value']} is not declared")
-          break
-          # raise Exception(f"Runtime error on line {self.line_number} | Variable {variable['value']} is not declared")
-        
-        self.console_text_widget.config(state=tk.NORMAL)
-        self.console_text_widget.insert(tk.END, "Input for " + variable["value"] + ": ")
-        self.console_text_widget.config(state=tk.DISABLED) 
-               
-        # Get user input
-        user_input = tk.simpledialog.askstring("Input", f"Enter value for {variable['value']} (type: {variable_type})")
-        
-        # If cancel button is clicked, treat it as an empty input
-        if user_input == None:
-          user_input = ""
-          
-        # Check data type of user input and match with variable type
-        if variable_type == "INT":  
-          if not re.fullmatch(r'^[0-9]+$', user_input):
-            self.errors.append(f"Runtime error on line {self.line_number} | Expected an integer for variable {variable['value']}")
-            break
-         
-          if user_input == "":  # If the user input is empty, raise error
-            self.errors.append(f"Runtime error on line {self.line_number} | Empty input for variable {variable['value']}")
-            break
-            
-          self.symbol_table.update_symbol(variable["value"], int(user_input)) # Update variable value if the user input is valid
-          
-          # Update console text widget
-          self.console_text_widget.config(state=tk.NORMAL)
-          self.console_text_widget.insert(tk.END, user_input + "\n") 
-          self.console_text_widget.see(tk.END)
-          self.console_text_widget.config(state=tk.DISABLED)
-            
-        elif variable_type == "STR": # STR input
-          # Validate that the input is not a pure number
-          if re.fullmatch(r'^[0-9]+$', user_input):
-            self.errors.append(f"Runtime error on line {self.line_number} | Expected a string for variable {variable['value']}")
-            break
-          
-          self.symbol_table.update_symbol(variable["value"], user_input)
-          
-          self.console_text_widget.config(state=tk.NORMAL)
-          self.console_text_widget.insert(tk.END, user_input + "\n")
-          self.console_text_widget.see(tk.END)
-          self.console_text_widget.config(state=tk.DISABLED)
-      
+  def _post_output(self, text: str):
+    """
+      Posts a batch of output for the console text widget.
+    """
+    self.job.check()
+    self.job.post("output", text)
 
-      current_token = self._get_next_token()
-    
-    # If no error message, update the console text widget
-    # If there is any error message, update the console and stop runtime
-    if self.errors:
-      self.console_text_widget.config(state=tk.NORMAL)
-      self.console_text_widget.insert(tk.END, "\n\nProgram terminated due to encountered error:\n")
-      for error in self.errors:
-        self.console_text_widget.insert(tk.END, error + "\n")
-      self.console_text_widget.see(tk.END)
-      self.console_text_widget.config(state=tk.DISABLED)
-      
-    else:
-      self.console_text_widget.config(state=tk.NORMAL)
-      self.console_text_widget.insert(tk.END, "\n\nProgram terminated successfully...")
-      self.console_text_widget.see(tk.END)
-      self.console_text_widget.config(state=tk.DISABLED)
-      
\ No newline at end of file
+  def _read_input(self, variable_name: str, variable_type: str):
+    """
+      Asks the main thread for the value of a variable and waits for it, returns None if the input is cancelled.
+    """
+    return self.job.ask("input", variable_name, variable_type)
@@ -1,27 +1,87 @@
+class Symbol:
+  """
+    Record of a symbol in the symbol table, with a fixed set of attributes.
+    The slot is the index of the symbol in the table, so the runtime can reach it without hashing its name.
+    Also readable as symbol["type"] and symbol["value"], the same as the dictionaries used before.
+  """
+  __slots__ = ("name", "type", "value", "slot")
+
+  def __init__(self, name: str, type: str, value: str | int, slot: int):
+    self.name = name
+    self.type = type
+    self.value = value
+    self.slot = slot
+
+  def __getitem__(self, key: str):
+    if key == "type":
+      return self.type
+    if key == "value":
+      return self.value
+    raise KeyError(key)
+
+  def __setitem__(self, key: str, value):
+    if key == "type":
+      self.type = value
+    elif key == "value":
+      self.value = value
+    else:
+      raise KeyError(key)
+
+  def __repr__(self):
+    return repr({"type": self.type, "value": self.value})
+
 class SymbolTable:
-  """ 
+  """
     Class to represent the symbol table.
     Stores the symbol, type and value of the symbol.
     In this program, this class stores variables encountered in the input code.
+    Symbols are kept by name and by slot, the order in which they were added.
   """
   def __init__(self):
-    self.symbol_table = {}
-  
+    self.symbol_table = {} # Name -> symbol
+    self.symbols = [] # Slot -> symbol
+
   def add_symbol(self, symbol: str, type: str, value: str | int):
-    self.symbol_table[symbol] = {"type": type, "value": value}
-  
+    record = self.symbol_table.get(symbol)
+    if record is not None: # Adding a symbol again replaces its type and value, it keeps its slot
+      record.type = type
+      record.value = value
+      return
+
+    record = Symbol(symbol, type, value, len(self.symbols))
+    self.symbol_table[symbol] = record
+    self.symbols.append(record)
+
   def get_symbol(self, symbol: str):
     return self.symbol_table[symbol]
 
+  def get_slot(self, symbol: str):
+    return self.symbol_table[symbol].slot
+
+  def get_symbol_at(self, slot: int):
+    return self.symbols[slot]
+
   def remove_all_symbols(self):
     self.symbol_table.clear()
-  
+    self.symbols.clear()
+
+  # Remove the symbols from the slot onward, the symbols before it keep their slots
+  def remove_symbols_from(self, slot: int):
+    for record in self.symbols[slot:]:
+      del self.symbol_table[record.name]
+    del self.symbols[slot:]
+
+  # Set every symbol back to the initial value of its type, the same as the lexical analyzer gives it
+  def reset_values(self):
+    for record in self.symbols:
+      record.value = 0 if record.type == "INT" else ""
+
   def get_symbol_table(self):
     return self.symbol_table
-  
+
   def update_symbol(self, symbol: str, value: str | int):
-    self.symbol_table[symbol]["value"] = value
-  
+    self.symbol_table[symbol].value = value
+
   # Print the symbol table
   def print_symbol_table(self):
     for symbol in self.symbol_table:
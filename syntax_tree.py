@@ -0,0 +1,116 @@
+class SyntaxTree:
+  """
+    Abstract syntax tree of an IOL program, built by the parser during the derivation.
+    The end line is the line of LOI, 0 until the parser reaches it.
+  """
+  __slots__ = ("statements", "end_line")
+
+  def __init__(self, statements: list, end_line: int = 0):
+    self.statements = statements
+    self.end_line = end_line
+
+class Declaration:
+  """
+    INT or STR declaration of a variable, with an optional initial value.
+  """
+  __slots__ = ("data_type", "variable", "value", "line")
+
+  def __init__(self, data_type: str | None, variable, value, line: int):
+    self.data_type = data_type
+    self.variable = variable
+    self.value = value
+    self.line = line
+
+class Assignment:
+  """
+    INTO statement storing the value of an expression into a variable.
+  """
+  __slots__ = ("variable", "value", "line")
+
+  def __init__(self, variable, value, line: int):
+    self.variable = variable
+    self.value = value
+    self.line = line
+
+class Input:
+  """
+    BEG statement reading the value of a variable.
+  """
+  __slots__ = ("variable", "line")
+
+  def __init__(self, variable, line: int):
+    self.variable = variable
+    self.line = line
+
+class Print:
+  """
+    PRINT statement writing the value of an expression.
+  """
+  __slots__ = ("value", "line")
+
+  def __init__(self, value, line: int):
+    self.value = value
+    self.line = line
+
+class NewLine:
+  """
+    NEWLN statement writing a line break.
+  """
+  __slots__ = ("line",)
+
+  def __init__(self, line: int):
+    self.line = line
+
+class Operation:
+  """
+    Arithmetic operation of a prefix expression, the operator is the name of its token.
+  """
+  __slots__ = ("operator", "first", "second", "line")
+
+  def __init__(self, operator: str, first, second, line: int):
+    self.operator = operator
+    self.first = first
+    self.second = second
+    self.line = line
+
+class Variable:
+  """
+    Identifier, either the variable of a statement or an operand.
+  """
+  __slots__ = ("name", "line")
+
+  def __init__(self, name: str, line: int):
+    self.name = name
+    self.line = line
+
+class Literal:
+  """
+    Integer literal, its value is the text as written.
+  """
+  __slots__ = ("value", "line")
+
+  def __init__(self, value: str, line: int):
+    self.value = value
+    self.line = line
+
+def prefix_nodes(expression):
+  """
+    Yields the nodes of an expression in prefix order, the order of their tokens in the source code.
+    Walks the expression with an explicit stack, so deeply nested expressions do not reach the recursion limit.
+  """
+  pending = [expression]
+  while pending:
+    node = pending.pop()
+    yield node
+    if type(node) is Operation:
+      pending.append(node.second)
+      pending.append(node.first)
+
+def format_expression(expression):
+  """
+    Gets the tokens of an expression as written, operators by name and operands by value.
+  """
+  return " ".join(
+    node.operator if type(node) is Operation else node.name if type(node) is Variable else node.value
+    for node in prefix_nodes(expression)
+  )
@@ -0,0 +1,71 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import cli
+from batch import compile_files, find_sources
+
+# File name -> content, and the kinds of errors reported for it
+SOURCES = {
+  "valid.iol": (b"IOL\nINT x IS 4\nPRINT x\nLOI", []),
+  "lexical.iol": (b"IOL\nINT x IS 4\nPRINT x#\nLOI", ["lexical", "syntax"]), # The invalid word is also unexpected by the parser
+  "syntax.iol": (b"IOL\nINT x IS\nLOI", ["syntax"]),
+  "semantic.iol": (b"IOL\nINT x\nSTR s\nINTO x IS s\nLOI", ["semantic"]),
+  "undecodable.iol": (b"IOL\nPRINT \xff\xfe\nLOI", ["file"]), # Not UTF-8
+}
+
+class BatchTest(unittest.TestCase):
+  def setUp(self):
+    directory = tempfile.TemporaryDirectory()
+    self.addCleanup(directory.cleanup)
+    self.directory = directory.name
+    for name, (content, _) in SOURCES.items():
+      with open(os.path.join(self.directory, name), "wb") as file:
+        file.write(content)
+    with open(os.path.join(self.directory, "notes.txt"), "w") as file: # Not a .iol file
+      file.write("IOL")
+
+  def test_files_are_reported_by_kind_of_error(self):
+    sources = find_sources([self.directory])
+    self.assertEqual([os.path.basename(path) for path in sources], sorted(SOURCES))
+
+    for jobs in (1, 2):
+      with self.subTest(jobs=jobs):
+        report = compile_files(sources, jobs)
+        self.assertEqual([file.path for file in report.files], sources)
+        for file in report.files:
+          self.assertEqual(sorted(file.errors), SOURCES[os.path.basename(file.path)][1], file.path)
+
+        self.assertEqual(report.summary(), "5 files, 1 valid, 4 with errors (lexical 1, syntax 2, semantic 1, file 1)")
+        summary = report.to_dict()["summary"]
+        self.assertEqual(summary, {"files": 5, "invalid": 4, "lexical": 1, "syntax": 2, "semantic": 1, "file": 1, "internal": 0})
+
+  def batch(self, *arguments: str):
+    """
+      Runs the batch command, returns its exit code and what it printed.
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+      status = cli.main(["batch", *arguments])
+    return status, output.getvalue()
+
+  def test_exit_code_reports_invalid_files(self):
+    report_path = os.path.join(self.directory, "report.json")
+    for jobs in ("1", "2"):
+      with self.subTest(jobs=jobs):
+        status, output = self.batch(self.directory, "--jobs", jobs, "--report", report_path)
+        self.assertEqual(status, 1)
+        self.assertIn("[semantic] Semantic Error in line 4", output)
+        self.assertTrue(output.endswith("4 with errors (lexical 1, syntax 2, semantic 1, file 1)\n"), output)
+        with open(report_path) as file:
+          self.assertEqual(json.load(file)["summary"]["invalid"], 4)
+
+        status, output = self.batch(os.path.join(self.directory, "valid.iol"), "--jobs", jobs)
+        self.assertEqual(status, 0)
+        self.assertEqual(output, "1 files, 1 valid, 0 with errors\n")
+
+if __name__ == "__main__":
+  unittest.main()
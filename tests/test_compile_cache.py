@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from compile_cache import CompileCache
+from compiler import compile_source, format_tokens
+from grammar import load_grammar
+
+class CompileCacheTest(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup(self.directory.cleanup)
+
+  def test_cached_compilation_matches_the_compilation(self):
+    cache = CompileCache(self.directory.name)
+    for source in ("IOL\nINT x IS 4\nINT y\nINTO y IS MULT x 3\nPRINT y\nLOI", "IOL\nPRINT z\nLOI"):
+      with self.subTest(source=source):
+        expected = compile_source(source)
+        compile_source(source, cache=cache)
+        cached = compile_source(source, cache=cache)
+
+        self.assertEqual(format_tokens(cached.tokens), format_tokens(expected.tokens))
+        self.assertEqual(cached.variables, expected.variables)
+        self.assertEqual(cached.errors, expected.errors)
+        if expected.program is None:
+          self.assertIsNone(cached.program)
+        else:
+          self.assertEqual(cached.program.disassemble(), expected.program.disassemble())
+          self.assertEqual(cached.program.constants, expected.program.constants)
+    self.assertEqual(cache.hits, 2)
+
+  def test_entries_are_not_pickled(self):
+    cache = CompileCache(self.directory.name)
+    source = "IOL\nINT x IS 4\nPRINT x\nLOI"
+    compile_source(source, cache=cache)
+    path = cache._path(cache.key(source.strip(), load_grammar().digest))
+    with open(path, "rb") as file:
+      self.assertTrue(file.read().startswith(b"{"))
+
+  def test_corrupted_entries_are_misses(self):
+    cache = CompileCache(self.directory.name)
+    source = "IOL\nINT x IS 4\nPRINT x\nLOI"
+    compile_source(source, cache=cache)
+    path = cache._path(cache.key(source.strip(), load_grammar().digest))
+    with open(path, "rb") as file:
+      data = file.read()
+    for corrupted in (data[:len(data) // 2], data.replace(b'"token_sections": [', b'"token_sections": [1000, ')):
+      with self.subTest(size=len(corrupted)):
+        with open(path, "wb") as file:
+          file.write(corrupted)
+        self.assertIsNone(cache.get(cache.key(source.strip(), load_grammar().digest)))
+    self.assertEqual(cache.hits, 0)
+
+  def test_size_limit_holds_across_caches_sharing_the_directory(self):
+    caches = [CompileCache(self.directory.name, max_bytes=20000) for _ in range(4)]
+    for index in range(200):
+      compile_source(f"IOL\nINT v{index} IS {index}\nPRINT v{index}\nLOI", cache=caches[index % len(caches)])
+
+    size = sum(
+      os.path.getsize(os.path.join(directory, name))
+      for directory, _, names in os.walk(self.directory.name) for name in names if name.endswith(".iolcache")
+    )
+    self.assertLessEqual(size, 20000)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,89 @@
+import random
+import unittest
+
+from lexical_analyzer import LexicalAnalyzer
+from symbol_table import SymbolTable
+
+PROGRAMS = [
+  "IOL\nINT x IS 4\nINT y\nINTO y IS MULT x 3\nPRINT y\nLOI",
+  "IOL\n  STR s\n\nBEG s\tPRINT s NEWLN\nINT n IS ADD 1 2\nLOI",
+  "IOL\nINT 1a IS 5\nSTR _s x$ y\nPRINT int IS 007\n\n\nLOI",
+]
+
+# Words the edits insert, valid and invalid
+WORDS = ["INT", "STR", "x", "y", "5", "ADD", "IS", "PRINT", "LOI", "", "s", "1a", "%", "Int"]
+
+def tokenize(source: str, **options):
+  """
+    Gets the tokens of every line, the variables and the errors found by an analyzer in the given mode.
+  """
+  lexical_analyzer = LexicalAnalyzer(**options)
+  lexical_analyzer.tokenizeInput(source)
+  return as_result(lexical_analyzer, lexical_analyzer.getOutput())
+
+def as_result(lexical_analyzer: LexicalAnalyzer, tokens):
+  return {line: list(tokens[line]) for line in tokens}, lexical_analyzer.getVariables(), lexical_analyzer.errors
+
+def edit(source: str, rng: random.Random):
+  """
+    Gets the source with one line replaced, inserted, removed or changed.
+  """
+  lines = source.split("\n")
+  index = rng.randrange(len(lines))
+  change = rng.random()
+  if change < 0.3:
+    lines[index] = " ".join(rng.choice(WORDS) for _ in range(rng.randrange(1, 5)))
+  elif change < 0.5:
+    lines.insert(index, rng.choice(WORDS))
+  elif change < 0.6 and len(lines) > 1:
+    del lines[index]
+  else:
+    words = lines[index].split(" ")
+    words[rng.randrange(len(words))] = rng.choice(WORDS)
+    lines[index] = " ".join(words)
+  return "\n".join(lines).strip() or "IOL LOI"
+
+class LexicalAnalyzerTest(unittest.TestCase):
+  def sources(self):
+    rng = random.Random(14)
+    sources = list(PROGRAMS)
+    for _ in range(200):
+      sources.append(edit(rng.choice(sources), rng))
+    return sources
+
+  def test_scanner_and_output_modes_give_the_same_tokens(self):
+    for source in self.sources():
+      expected = tokenize(source)
+      for options in ({"single_pass": True}, {"compact": True}, {"single_pass": True, "compact": True}):
+        with self.subTest(source=source, options=options):
+          self.assertEqual(tokenize(source, **options), expected)
+
+  def test_lazy_tokenization_matches_the_whole_input(self):
+    for source in self.sources():
+      with self.subTest(source=source):
+        tokens, variables, errors = tokenize(source)
+        symbol_table = SymbolTable()
+        lines = dict(LexicalAnalyzer().tokenizeLines(source.strip().split("\n"), symbol_table))
+        self.assertEqual({line: list(line_tokens) for line, line_tokens in lines.items()}, tokens)
+        self.assertEqual(list(symbol_table.get_symbol_table()), [variable["name"] for variable in variables])
+
+  def test_retokenizing_matches_tokenizing_from_scratch(self):
+    rng = random.Random(41)
+    for source in PROGRAMS:
+      lexical_analyzer = LexicalAnalyzer(single_pass=True)
+      previous = None
+      for _ in range(30):
+        first_changed_line = lexical_analyzer.retokenizeInput(source)
+        result = as_result(lexical_analyzer, lexical_analyzer.getOutput())
+        with self.subTest(source=source):
+          self.assertEqual(result, tokenize(source))
+          if previous is not None: # The lines before the first changed one keep their tokens
+            self.assertEqual(
+              [result[0].get(line) for line in range(1, first_changed_line)],
+              [previous[0].get(line) for line in range(1, first_changed_line)]
+            )
+        previous = result
+        source = edit(source, rng)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+import bytecode as bc
+from bytecode import BytecodeCompiler
+from lexical_analyzer import LexicalAnalyzer
+from optimizer import Optimizer
+from parser import Parser
+from symbol_table import SymbolTable
+
+def optimize(source: str):
+  """
+    Gets the optimiser run on the bytecode of a source, and the optimised program.
+  """
+  lexical_analyzer = LexicalAnalyzer(single_pass=True, compact=True)
+  lexical_analyzer.tokenizeInput(source.strip())
+  symbol_table = SymbolTable()
+  for variable in lexical_analyzer.getVariables():
+    symbol_table.add_symbol(variable["name"], variable["data_type"], variable["value"])
+  parser = Parser(symbol_table)
+  parser.parse(lexical_analyzer.getOutput())
+
+  optimizer = Optimizer()
+  return optimizer, optimizer.optimize(BytecodeCompiler().compile(parser.tree, symbol_table))
+
+def instructions(program: bc.Program):
+  """
+    Gets the (opcode name, argument) instructions of a program, constants in place of their index.
+  """
+  return [
+    (bc.OPCODE_NAMES[opcode], program.constants[argument] if opcode in (bc.PUSH_CONST, bc.PRINT_TEXT) else argument)
+    for opcode, argument in zip(program.code[::2], program.code[1::2])
+  ]
+
+class OptimizerTest(unittest.TestCase):
+  def test_constant_expressions_fold_to_one_push(self):
+    _, program = optimize("IOL\nINT y\nINTO y IS ADD MULT 2 3 SUB 10 MOD 9 5\nLOI")
+    self.assertEqual(instructions(program), [("PUSH_CONST", 12), ("STORE", 0), ("HALT", 0)])
+
+  def test_multiplication_by_zero_folds_only_pure_operands(self):
+    # x holds an integer once its declaration stored one, loading it can never fail
+    _, program = optimize("IOL\nINT x IS 3\nINT y\nINTO y IS MULT x 0\nLOI")
+    self.assertEqual(instructions(program)[2:], [("PUSH_CONST", 0), ("STORE", 1), ("HALT", 0)])
+
+    # The modulo may divide by zero, so it is still evaluated
+    _, program = optimize("IOL\nINT x IS 3\nINT y\nINTO y IS MULT MOD 5 x 0\nLOI")
+    self.assertIn(("MOD", 0), instructions(program))
+    self.assertIn(("MULT", 0), instructions(program))
+
+    # x was never stored, loading it converts whatever it holds and may fail
+    _, program = optimize("IOL\nINT x\nINT y\nINTO y IS MULT 0 x\nLOI")
+    self.assertEqual(instructions(program), [("PUSH_CONST", 0), ("LOAD_INT", 0), ("MULT", 0), ("STORE", 1), ("HALT", 0)])
+
+  def test_additive_and_multiplicative_identities_are_removed(self):
+    for expression in ("ADD x 0", "ADD 0 x", "SUB x 0", "MULT x 1", "MULT 1 x"):
+      with self.subTest(expression=expression):
+        _, program = optimize(f"IOL\nINT x\nINT y\nINTO y IS {expression}\nLOI")
+        self.assertEqual(instructions(program), [("LOAD_INT", 0), ("STORE", 1), ("HALT", 0)])
+
+  def test_division_by_a_constant_zero_is_reported(self):
+    cases = [
+      ("IOL\nINT x IS 4\nPRINT DIV x 0\nLOI", ["Semantic Error in line 3: Division by zero, the divisor always evaluates to 0"]),
+      ("IOL\nINT x IS 4\n\nINTO x IS DIV x SUB 2 2\nLOI", ["Semantic Error in line 4: Division by zero, the divisor always evaluates to 0"]),
+      ("IOL\nINT x IS 4\nPRINT DIV x 2\nLOI", []),
+    ]
+    for source, errors in cases:
+      with self.subTest(source=source):
+        optimizer, _ = optimize(source)
+        self.assertEqual(optimizer.errors, errors)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,90 @@
+import io
+import random
+import unittest
+
+from compiler import compile_source
+from output_sink import CallbackSink, StreamSink, TextWidgetSink
+from runtime import Runtime
+
+class FakeTextWidget:
+  """
+    Text widget recording its inserts and whether it was left read-only.
+  """
+  def __init__(self):
+    self.inserts = []
+    self.state = "disabled"
+
+  def config(self, state):
+    self.state = state
+
+  def insert(self, index, text):
+    if self.state != "normal":
+      raise AssertionError("insert into a read-only widget")
+    self.inserts.append(text)
+
+  def see(self, index):
+    pass
+
+class OutputSinkTest(unittest.TestCase):
+  def test_writes_are_sent_in_batches(self):
+    batches = []
+    sink = CallbackSink(batches.append, batch_size=3)
+    for item in range(7):
+      sink.write(item)
+    self.assertEqual(batches, ["012", "345"])
+    self.assertEqual(sink.buffer, ["6"])
+
+  def test_flush_sends_and_empties_the_buffer(self):
+    batches = []
+    sink = CallbackSink(batches.append, batch_size=10)
+    sink.write("a")
+    sink.write(1)
+    sink.flush()
+    self.assertEqual(batches, ["a1"])
+    self.assertEqual(sink.buffer, [])
+
+    sink.flush() # Nothing left to send
+    self.assertEqual(batches, ["a1"])
+
+  def test_batched_output_keeps_the_order_of_the_writes(self):
+    rng = random.Random(16)
+    items = [rng.choice(["x", "\n", 42, 2.5, ""]) for _ in range(1000)]
+    for batch_size in (1, 2, 7, 256, 5000):
+      with self.subTest(batch_size=batch_size):
+        batches = []
+        sink = CallbackSink(batches.append, batch_size)
+        for item in items:
+          sink.write(item)
+        sink.flush()
+        self.assertEqual("".join(batches), "".join(map(str, items)))
+
+  def test_runtime_output_does_not_depend_on_the_batch_size(self):
+    result = compile_source("IOL\nINT x IS 1\nPRINT x NEWLN PRINT MULT x 3 NEWLN PRINT 7\nPRINT DIV x SUB x 1\nLOI")
+    outputs = []
+    for batch_size in (1, 2, 256):
+      batches = []
+      Runtime(None, CallbackSink(batches.append, batch_size)).run_program(result.program, result.symbol_table)
+      outputs.append("".join(batches))
+    self.assertEqual(outputs[1:], outputs[:1] * 2)
+    self.assertTrue(outputs[0].startswith("1\n3\n7\n\nProgram terminated due to encountered error:"), outputs[0])
+
+  def test_stream_sink_flushes_the_stream(self):
+    stream = io.StringIO()
+    flushes = []
+    stream.flush = lambda: flushes.append(stream.getvalue())
+    sink = StreamSink(stream, batch_size=4)
+    sink.write("ab")
+    sink.flush()
+    self.assertEqual(flushes, ["ab"])
+
+  def test_text_widget_sink_inserts_one_batch_at_a_time(self):
+    widget = FakeTextWidget()
+    sink = TextWidgetSink(widget, batch_size=2)
+    for item in ("a", "b", "c"):
+      sink.write(item)
+    sink.flush()
+    self.assertEqual(widget.inserts, ["ab", "c"])
+    self.assertEqual(widget.state, "disabled")
+
+if __name__ == "__main__":
+  unittest.main()
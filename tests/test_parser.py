@@ -0,0 +1,194 @@
+import random
+import unittest
+
+from compiler import ProgramCompiler, compile_program
+from lexical_analyzer import LexicalAnalyzer
+from parser import Parser
+from symbol_table import SymbolTable
+
+PROGRAMS = [
+  "IOL\nINT x IS 4\nINT y\nINTO y IS MULT x 3\nPRINT y\nLOI",
+  "IOL\nSTR s\nBEG s\nPRINT s NEWLN\nINT n IS ADD 1 2\nPRINT MOD n 2\nLOI",
+  "IOL\nINT a IS 1 INT b IS 2\nINTO a IS SUB b a\nBEG b\nPRINT DIV a b\nLOI",
+]
+
+# Words inserted into the programs, most of them break the syntax
+WORDS = ["IOL", "LOI", "INT", "STR", "IS", "INTO", "BEG", "PRINT", "NEWLN", "ADD", "SUB", "MULT", "DIV", "MOD", "x", "y", "5", "7"]
+
+# Statements inserted into the programs, most of them keep the syntax valid
+STATEMENTS = ["INT x IS 2", "INT z", "STR t", "PRINT x", "PRINT t NEWLN", "INTO y IS ADD y 1", "INTO x IS DIV 6 0", "PRINT MULT z 1", "BEG z", "INTO"]
+
+def analyze(source: str):
+  """
+    Gets the tokens and the symbol table of a source.
+  """
+  lexical_analyzer = LexicalAnalyzer(single_pass=True, compact=True)
+  lexical_analyzer.tokenizeInput(source.strip())
+  symbol_table = SymbolTable()
+  for variable in lexical_analyzer.getVariables():
+    symbol_table.add_symbol(variable["name"], variable["data_type"], variable["value"])
+  return lexical_analyzer.getOutput(), symbol_table
+
+def parse(source: str, **options):
+  tokens, symbol_table = analyze(source)
+  parser = Parser(symbol_table, **options)
+  parser.parse(tokens)
+  return parser
+
+def mutate(source: str, rng: random.Random):
+  """
+    Gets the source with a few words removed, inserted or replaced.
+  """
+  lines = source.split("\n")
+  for _ in range(rng.randint(1, 4)):
+    index = rng.randrange(len(lines))
+    words = lines[index].split(" ")
+    position = rng.randrange(len(words))
+    change = rng.random()
+    if change < 0.4:
+      del words[position]
+    elif change < 0.7:
+      words.insert(position, rng.choice(WORDS))
+    else:
+      words[position] = rng.choice(WORDS)
+    lines[index] = " ".join(words)
+  return "\n".join(lines)
+
+def edit_statements(source: str, rng: random.Random):
+  """
+    Gets the source with a line between IOL and LOI removed, inserted or replaced by a statement.
+  """
+  lines = source.split("\n")
+  index = rng.randrange(1, len(lines))
+  change = rng.random()
+  if change < 0.3 and len(lines) > 2:
+    del lines[index]
+  elif change < 0.7:
+    lines.insert(index, rng.choice(STATEMENTS))
+  else:
+    lines[index] = rng.choice(STATEMENTS)
+  return "\n".join(lines)
+
+def program_fields(program):
+  return program.code, program.constants, program.variables, program.divisions, program.failures, program.inputs, program.lines
+
+class SemanticAnalysisTest(unittest.TestCase):
+  def test_declarations_are_initialised_with_their_type(self):
+    cases = [
+      ("IOL\nSTR s IS 5\nLOI", ["Semantic Error in line 2: 5 is INT (Expected STR)"]),
+      ("IOL\nSTR t\nINT x IS t\nLOI", ["Semantic Error in line 3: t is STR (Expected INT)"]),
+      ("IOL\nSTR s IS ADD 1 2\nLOI", ["Semantic Error in line 2: The resulting type of expression 'ADD 1 2' is INT. (Expected STR)"]),
+      ("IOL\nINT x IS 5\nSTR t\nSTR s IS t\nLOI", []),
+    ]
+    for source, errors in cases:
+      with self.subTest(source=source):
+        self.assertEqual(parse(source).errors, errors)
+
+class RecoveryTest(unittest.TestCase):
+  SOURCE = "IOL\nINT x\nINTO x 5\nPRINT x\nBEG\nNEWLN\nLOI"
+
+  def test_every_statement_error_is_reported(self):
+    errors = parse(self.SOURCE).errors
+    self.assertEqual(len(errors), 2)
+    self.assertIn("line 3", errors[0])
+    self.assertIn("line 6", errors[1]) # BEG without its variable, found at the next token
+
+  def test_parser_without_recovery_symbol_stops_at_the_first_error(self):
+    self.assertEqual(parse(self.SOURCE, recovery_symbol=None).errors, parse(self.SOURCE).errors[:1])
+
+  def test_recovery_symbol_missing_from_the_grammar_disables_recovery(self):
+    parser = parse(self.SOURCE, recovery_symbol="Paragraph")
+    self.assertEqual(parser.sync_symbols, frozenset())
+    self.assertEqual(parser.errors, parse(self.SOURCE, recovery_symbol=None).errors)
+
+  def test_recovery_symbol_sets_the_synchronising_tokens(self):
+    parser = parse(self.SOURCE, recovery_symbol="Statement")
+    self.assertEqual(parser.sync_symbols, frozenset({"Statements", "StatementsTail"}))
+    self.assertEqual(parser.sync_tokens, {"INT", "STR", "INTO", "BEG", "PRINT", "NEWLN", "LOI"})
+
+  def test_recovered_errors_start_with_the_errors_without_recovery(self):
+    rng = random.Random(25)
+    for _ in range(500):
+      source = mutate(rng.choice(PROGRAMS), rng)
+      with self.subTest(source=source):
+        first_errors = parse(source, recovery_symbol=None).errors
+        errors = parse(source).errors
+        self.assertEqual(errors[:len(first_errors)], first_errors)
+        self.assertEqual(bool(errors), bool(first_errors))
+
+def dump(node):
+  """
+    Gets the fields of a syntax tree node and of its children, to compare trees.
+  """
+  if isinstance(node, list):
+    return [dump(child) for child in node]
+  if not hasattr(node, "__slots__"):
+    return node
+  return (type(node).__name__,) + tuple(dump(getattr(node, field)) for field in node.__slots__)
+
+class IncrementalParseTest(unittest.TestCase):
+  def test_resumed_parse_matches_a_full_parse(self):
+    rng = random.Random(14)
+    for source in PROGRAMS:
+      # Kept like the IDE does between compilations
+      lexical_analyzer = LexicalAnalyzer()
+      symbol_table = SymbolTable()
+      parser = Parser(symbol_table, incremental=True)
+      first_changed_line = 1
+
+      for _ in range(25):
+        first_changed_line = min(first_changed_line, lexical_analyzer.retokenizeInput(source))
+        symbol_table.remove_all_symbols()
+        for variable in lexical_analyzer.getVariables():
+          symbol_table.add_symbol(variable["name"], variable["data_type"], variable["value"])
+        tokens = lexical_analyzer.getOutput()
+        parser.parse(tokens, first_changed_line)
+        first_changed_line = len(tokens) + 1
+
+        expected = parse(source)
+        with self.subTest(source=source):
+          self.assertEqual(parser.errors, expected.errors)
+          self.assertEqual(parser.is_valid, expected.is_valid)
+          self.assertEqual(dump(parser.tree.statements), dump(expected.tree.statements))
+          self.assertEqual(parser.tree.end_line, expected.tree.end_line)
+
+        source = mutate(source, rng)
+
+  def test_resumed_compile_matches_a_full_compile(self):
+    rng = random.Random(14)
+    compiled = 0
+    for source in PROGRAMS:
+      # Kept like the IDE does between compilations
+      lexical_analyzer = LexicalAnalyzer()
+      symbol_table = SymbolTable()
+      parser = Parser(symbol_table, incremental=True)
+      program_compiler = ProgramCompiler()
+      first_changed_line = 1
+      first_changed_statement = 0
+
+      for _ in range(40):
+        first_changed_line = min(first_changed_line, lexical_analyzer.retokenizeInput(source))
+        symbol_table.remove_symbols_from(lexical_analyzer.retained_variable_count)
+        for variable in lexical_analyzer.getVariables(lexical_analyzer.retained_variable_count):
+          symbol_table.add_symbol(variable["name"], variable["data_type"], variable["value"])
+        tokens = lexical_analyzer.getOutput()
+        parser.parse(tokens, first_changed_line)
+        first_changed_line = len(tokens) + 1
+        first_changed_statement = min(first_changed_statement, parser.kept_statement_count)
+
+        if not parser.errors: # Only valid code is compiled
+          program, errors = program_compiler.compile(parser.tree, symbol_table, first_changed_statement)
+          first_changed_statement = len(parser.tree.statements)
+          compiled += 1
+
+          expected = parse(source)
+          expected_program, expected_errors = compile_program(expected.tree, expected.symbol_table)
+          with self.subTest(source=source):
+            self.assertEqual(errors, expected_errors)
+            self.assertEqual(program_fields(program), program_fields(expected_program))
+
+        source = edit_statements(source, rng)
+    self.assertGreater(compiled, 30)
+
+if __name__ == "__main__":
+  unittest.main()
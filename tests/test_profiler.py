@@ -0,0 +1,75 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import cli
+from compiler import compile_source
+from profiler import Profiler, profile_phase
+from runtime import ConsoleRuntime
+
+SOURCE = "IOL\nINT x IS 4\nINT y\nINTO y IS MULT ADD x 1 3\nPRINT y NEWLN\nLOI"
+
+# Phases timed by the compiler and the command line, the semantic checks are part of the syntax analysis
+# and the optimisation is part of the bytecode compilation
+PHASES = ["lexical analysis", "syntax analysis", "bytecode compilation", "execution"]
+
+def table(report: str, title: str):
+  """
+    Gets the name -> (count, total ms, mean us) rows of a table of a report.
+  """
+  lines = report.split("\n")
+  start = next(index for index, line in enumerate(lines) if line.startswith(title))
+  rows = {}
+  for line in lines[start + 1:]:
+    if not line:
+      break
+    name, count, total, mean = line[:24].strip(), *line[24:].split()[:3]
+    rows[name] = (int(count.replace(",", "")), float(total), float(mean))
+  return rows
+
+class ProfilerTest(unittest.TestCase):
+  def test_report_times_every_phase(self):
+    profiler = Profiler()
+    result = compile_source(SOURCE, hooks=profiler)
+    self.assertEqual(result.errors, [])
+    runtime = ConsoleRuntime(io.StringIO(), io.StringIO())
+    runtime.hooks = profiler
+    with profile_phase(profiler, "execution"):
+      runtime.run_program(result.program, result.symbol_table)
+
+    report = profiler.report()
+    phases = table(report, "Phase")
+    self.assertEqual(sorted(phases), sorted(PHASES))
+    for phase, (count, total, mean) in phases.items():
+      with self.subTest(phase=phase):
+        self.assertEqual(count, 1)
+        self.assertGreaterEqual(total, 0)
+        self.assertGreaterEqual(mean, 0)
+
+    self.assertIn("Program", table(report, "Parser expansion"))
+    instructions = table(report, "Runtime instruction")
+    self.assertEqual(instructions["HALT"][0], 1)
+    self.assertTrue(all(total >= 0 for _, total, _ in instructions.values()))
+
+  def test_phases_without_hooks_are_not_timed(self):
+    with profile_phase(None, "execution"):
+      pass
+    self.assertEqual(Profiler().report(), "Nothing was profiled.")
+
+  def test_run_command_prints_the_report(self):
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "program.iol")
+      with open(path, "w") as file:
+        file.write(SOURCE)
+      output, errors = io.StringIO(), io.StringIO()
+      with contextlib.redirect_stdout(output), contextlib.redirect_stderr(errors):
+        status = cli.main(["run", path, "--profile"])
+
+    self.assertEqual(status, 0)
+    self.assertTrue(output.getvalue().startswith("15\n"), output.getvalue())
+    self.assertEqual(sorted(table(errors.getvalue(), "Phase")), sorted(PHASES))
+
+if __name__ == "__main__":
+  unittest.main()
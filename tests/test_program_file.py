@@ -0,0 +1,83 @@
+import os
+import random
+import struct
+import tempfile
+import unittest
+
+import bytecode as bc
+from compiler import compile_source
+from program_file import ProgramFileError, decode_program, encode_program, load_program, write_program, _HEADER, _SECTION, CODE
+
+SOURCE = "IOL\nINT x IS 4\nINT y\nSTR s\nBEG s\nINTO y IS MOD MULT x 3 5\nPRINT y NEWLN PRINT s\nLOI"
+
+class ProgramFileTest(unittest.TestCase):
+  def setUp(self):
+    result = compile_source(SOURCE)
+    self.assertEqual(result.errors, [])
+    self.program = result.program
+    self.data = encode_program(result.program, result.symbol_table)
+
+  def with_instruction(self, index: int, opcode: int, argument: int):
+    """
+      Gets the bytes of the program with one instruction replaced.
+    """
+    offset, _ = _SECTION.unpack_from(self.data, _HEADER.size + _SECTION.size * CODE)
+    data = bytearray(self.data)
+    struct.pack_into("=II", data, offset + index * 8, opcode, argument)
+    return bytes(data)
+
+  def test_program_is_read_back(self):
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "program.iolc")
+      write_program(path, self.program, compile_source(SOURCE).symbol_table)
+      program, symbol_table = load_program(path)
+    self.assertEqual(program.disassemble(), self.program.disassemble())
+    self.assertEqual(program.variables, ("x", "y", "s"))
+    self.assertEqual(symbol_table.get_symbol("x").value, 0)
+    for table in ("constants", "divisions", "failures", "inputs"):
+      self.assertEqual(getattr(program, table), getattr(self.program, table))
+
+  def test_code_is_only_checked_on_request(self):
+    data = self.with_instruction(0, bc.ADD, 0)
+    program, _ = decode_program(data)
+    self.assertEqual(program.code[0], bc.ADD)
+    with self.assertRaisesRegex(ProgramFileError, "without its operands"):
+      decode_program(data, verify=True)
+
+  def test_invalid_code_is_not_written(self):
+    program = bc.Program((bc.ADD, 0, bc.HALT, 0), (), (), (), (), ())
+    with self.assertRaisesRegex(ProgramFileError, "Invalid program: ADD without its operands"):
+      encode_program(program, compile_source(SOURCE).symbol_table)
+
+  def test_unknown_opcode_is_rejected(self):
+    with self.assertRaisesRegex(ProgramFileError, "unknown opcode"):
+      decode_program(self.with_instruction(0, len(bc.OPCODE_NAMES), 0), verify=True)
+
+  def test_arguments_out_of_their_table_are_rejected(self):
+    for opcode in (bc.PUSH_CONST, bc.PRINT_TEXT, bc.LOAD_INT, bc.LOAD, bc.PRINT_VAR, bc.FAIL, bc.BEG):
+      with self.subTest(opcode=bc.OPCODE_NAMES[opcode]):
+        with self.assertRaisesRegex(ProgramFileError, "out of its table"):
+          decode_program(self.with_instruction(0, opcode, 1000), verify=True)
+
+  def test_missing_operands_are_rejected(self):
+    with self.assertRaisesRegex(ProgramFileError, "without its operands"):
+      decode_program(self.with_instruction(0, bc.ADD, 0), verify=True)
+
+  def test_code_must_stop(self):
+    last = len(self.program.code) // 2 - 1
+    with self.assertRaisesRegex(ProgramFileError, "does not end"):
+      decode_program(self.with_instruction(last, bc.NEWLN, 0), verify=True)
+
+  def test_corrupted_files_only_raise_program_file_errors(self):
+    rng = random.Random(22)
+    for _ in range(2000):
+      data = bytearray(self.data)
+      for _ in range(rng.randrange(1, 4)):
+        data[rng.randrange(len(data))] = rng.randrange(256)
+      try:
+        decode_program(bytes(data), verify=True)
+      except ProgramFileError:
+        pass
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,156 @@
+import copy
+import io
+import random
+import unittest
+
+from bytecode import BytecodeCompiler
+from lexical_analyzer import LexicalAnalyzer
+from optimizer import Optimizer
+from parser import Parser
+from runtime import ConsoleRuntime
+from symbol_table import SymbolTable
+
+INPUT = "5\nhello\n\n12\nx1\n0\n"
+
+# Words of the random programs, most of them malformed
+WORDS = ["INT", "STR", "x", "y", "s", "t", "IS", "INTO", "ADD", "SUB", "MULT", "DIV", "MOD", "PRINT", "NEWLN", "BEG", "0", "1", "7", "42"]
+
+def analyze(source: str):
+  """
+    Gets the tokens and the symbol table of a source.
+  """
+  lexical_analyzer = LexicalAnalyzer(single_pass=True, compact=True)
+  lexical_analyzer.tokenizeInput(source.strip())
+  symbol_table = SymbolTable()
+  for variable in lexical_analyzer.getVariables():
+    symbol_table.add_symbol(variable["name"], variable["data_type"], variable["value"])
+  return lexical_analyzer.getOutput(), symbol_table
+
+def compile_tree(source: str):
+  """
+    Gets the bytecode of the syntax tree of a source and its symbol table, a tree with syntax errors holds the recovered statements.
+  """
+  tokens, symbol_table = analyze(source)
+  parser = Parser(symbol_table)
+  parser.parse(tokens)
+  return BytecodeCompiler().compile(parser.tree, symbol_table), symbol_table
+
+def run(source: str, mode: str):
+  """
+    Runs the bytecode of a source as compiled, or optimised, returns its output, errors and final variable values.
+  """
+  program, symbol_table = compile_tree(source)
+  if mode == "optimized":
+    program = Optimizer().optimize(program)
+  output = io.StringIO()
+  runtime = ConsoleRuntime(output, io.StringIO(INPUT), echo_input=True)
+  runtime.run_program(program, symbol_table)
+
+  values = {name: symbol.value for name, symbol in symbol_table.get_symbol_table().items()}
+  return output.getvalue(), runtime.errors, values
+
+def random_program(rng: random.Random):
+  """
+    Gets a program of random words after the declarations of its variables.
+  """
+  lines = ["IOL", "INT x IS 3 y", "STR s t"]
+  for _ in range(rng.randrange(1, 6)):
+    lines.append(" ".join(rng.choice(WORDS) for _ in range(rng.randrange(1, 8))))
+  lines.append("LOI")
+  return "\n".join(lines)
+
+class RuntimeTest(unittest.TestCase):
+  PROGRAMS = [
+    "IOL\nINT x IS 5\nPRINT x\nLOI",
+    "IOL\nINT x IS 7 y\nINTO y IS MULT ADD x 1 SUB x 2\nPRINT y NEWLN PRINT DIV y 4\nLOI",
+    "IOL\nINT x y\nBEG x\nINTO y IS MOD x 3\nPRINT y\nLOI",
+    "IOL\nSTR s\nBEG s\nPRINT s\nLOI",
+    "IOL\nINT x IS 1\nPRINT DIV x 0\nPRINT x\nLOI",
+    "IOL\nINT x IS 0\nPRINT MOD 5 x\nLOI",
+    "IOL\nSTR s\nPRINT ADD s 1\nLOI",
+    "IOL\nINT x\nSTR s\nINTO x IS s\nLOI",
+    "IOL\nSTR s t\nBEG s\nINTO t IS s\nPRINT t\nLOI",
+    "IOL\nINT x\nBEG x\nBEG x\nLOI",
+    "IOL\nINT x\nPRINT ADD x\nLOI",
+    "IOL\nINT x\nINTO 5 IS 6\nLOI",
+    "IOL\nINT x\nPRINT NEWLN\nLOI",
+    "IOL\nPRINT z\nLOI",
+  ]
+
+  def assert_same_run(self, source: str):
+    expected = run(source, "compiled")
+    with self.subTest(source=source):
+      self.assertEqual(run(source, "optimized"), expected)
+
+  def test_optimized_programs_run_like_the_programs(self):
+    for source in self.PROGRAMS:
+      self.assert_same_run(source)
+
+  def test_optimized_random_programs_run_like_the_programs(self):
+    rng = random.Random(9)
+    for _ in range(300):
+      self.assert_same_run(random_program(rng))
+
+  def test_programs_write_their_output(self):
+    cases = [
+      (self.PROGRAMS[0], "5\n\nProgram terminated successfully..."),
+      ("IOL\nINT x IS 7\nINT y\nINTO y IS MULT ADD x 1 SUB x 2\nPRINT y NEWLN PRINT DIV y 16\nLOI", "40\n2.5\n\nProgram terminated successfully..."),
+      (self.PROGRAMS[2], "Input for x: 5\n2\n\nProgram terminated successfully..."),
+      (self.PROGRAMS[3], "Input for s: \n\nProgram terminated due to encountered error:\nRuntime error on line 3 | Expected a string for variable s\n"),
+    ]
+    for source, output in cases:
+      for mode in ("compiled", "optimized"):
+        with self.subTest(source=source, mode=mode):
+          self.assertEqual(run(source, mode)[0], output)
+
+  def test_statements_with_syntax_errors_are_not_run(self):
+    output, errors, values = run("IOL\nINT x IS 2\nINTO 5 IS 6\nPRINT x\nLOI", "compiled")
+    self.assertEqual(errors, [])
+    self.assertEqual(output, "2\n\nProgram terminated successfully...")
+    self.assertEqual(values["x"], 2)
+
+  def test_declarations_store_their_value(self):
+    cases = [
+      ("IOL\nINT x\nPRINT x\nLOI", "0"),
+      ("IOL\nINT x IS ADD 2 3\nPRINT x\nLOI", "5"),
+      ("IOL\nINT y IS 4\nINT x IS MULT y SUB y 1\nPRINT x\nLOI", "12"),
+      ("IOL\nINT x\nIS 7\nPRINT x\nLOI", "7"),
+      ("IOL\nINT n\nSTR s\nBEG n\nBEG s\nSTR t IS s\nPRINT t\nLOI", "hello"),
+    ]
+    for source, printed in cases:
+      for mode in ("compiled", "optimized"):
+        with self.subTest(source=source, mode=mode):
+          output, errors, _ = run(source, mode)
+          self.assertEqual(errors, [])
+          self.assertTrue(output.endswith(f"{printed}\n\nProgram terminated successfully..."), output)
+
+  def test_runtime_errors_stop_the_program(self):
+    output, errors, values = run("IOL\nINT x IS 1\nPRINT DIV x 0\nPRINT x\nLOI", "optimized")
+    self.assertEqual(errors, ["Runtime error on line 3 | Division by zero in integer literal 0"])
+    self.assertIn("Program terminated due to encountered error", output)
+    self.assertNotIn("1", output.split("\n\n")[0])
+
+  def test_runtime_errors_are_reported_on_their_line(self):
+    cases = [
+      ("IOL\nINT x IS 0\nPRINT MOD 5 x\nLOI", "Runtime error on line 3 | Modulo by zero in variable x"),
+      ("IOL\nSTR s\nPRINT ADD s 1\nLOI", "Runtime error on line 3 | Operand s is not an integer"),
+      ("IOL\nINT x\nSTR s\n\nINTO x IS s\nLOI", "Runtime error on line 5 | Cannot store STR variable s into INT variable x"),
+    ]
+    for source, error in cases:
+      for mode in ("compiled", "optimized"):
+        with self.subTest(source=source, mode=mode):
+          self.assertEqual(run(source, mode)[1], [error])
+
+  def test_errors_of_a_previous_run_are_cleared(self):
+    program, symbol_table = compile_tree("IOL\nINT x IS 1\nPRINT DIV x 0\nLOI")
+    runtime = ConsoleRuntime(io.StringIO(), io.StringIO())
+    runtime.run_program(program, copy.deepcopy(symbol_table))
+    self.assertEqual(len(runtime.errors), 1)
+
+    program, symbol_table = compile_tree("IOL\nPRINT 1\nLOI")
+    runtime.run_program(program, symbol_table)
+    self.assertEqual(runtime.errors, [])
+    self.assertTrue(runtime.output.getvalue().endswith("1\n\nProgram terminated successfully..."))
+
+if __name__ == "__main__":
+  unittest.main()
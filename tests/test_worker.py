@@ -0,0 +1,116 @@
+import threading
+import time
+import unittest
+
+from cancellation import JobCancelled
+from lexical_analyzer import LexicalAnalyzer
+from parser import Parser
+from symbol_table import SymbolTable
+from worker import BackgroundWorker
+
+SOURCE = "IOL\nINT x IS 4\n" + "INTO x IS ADD x 1\n" * 2000 + "PRINT x\nLOI"
+
+def compile_job(job, source: str, started: threading.Event | None = None):
+  """
+    Job parsing a source with the cancel event of the job, like the IDE compiles, then posting its errors.
+    When started is given, the job signals it and waits to be cancelled before parsing.
+  """
+  lexical_analyzer = LexicalAnalyzer(single_pass=True, compact=True)
+  lexical_analyzer.tokenizeInput(source)
+  symbol_table = SymbolTable()
+  for variable in lexical_analyzer.getVariables():
+    symbol_table.add_symbol(variable["name"], variable["data_type"], variable["value"])
+
+  parser = Parser(symbol_table)
+  parser.cancel_event = job.cancel_event
+  if started is not None:
+    started.set()
+    job.cancel_event.wait(5)
+  parser.parse(lexical_analyzer.getOutput())
+  job.post("compiled", parser.errors)
+
+class BackgroundWorkerTest(unittest.TestCase):
+  def setUp(self):
+    self.worker = BackgroundWorker()
+
+  def messages(self, timeout: float = 5):
+    """
+      Polls the worker like the Tk main loop does until the current job finishes, returns its messages.
+    """
+    messages = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+      messages += self.worker.poll()
+      if messages and messages[-1][0] == "finished":
+        return messages
+      time.sleep(0.001)
+    self.fail(f"The job did not finish: {messages}")
+
+  def test_cancelled_compilation_posts_no_result(self):
+    started = threading.Event()
+    stopped = threading.Event()
+    def cancelled_job(job):
+      try:
+        compile_job(job, SOURCE, started)
+      except JobCancelled:
+        stopped.set()
+        raise
+
+    job = self.worker.submit(cancelled_job)
+    self.assertTrue(started.wait(5))
+    self.worker.cancel()
+    self.assertTrue(job.cancel_event.is_set())
+    self.assertFalse(self.worker.busy)
+    self.assertTrue(stopped.wait(5)) # The parse stopped at its next line
+
+    self.worker.submit(compile_job, "IOL\nPRINT 1\nLOI")
+    self.assertEqual(self.messages(), [("compiled", ([],)), ("finished", ())])
+
+  def test_parser_stops_once_cancelled(self):
+    symbol_table = SymbolTable()
+    parser = Parser(symbol_table)
+    parser.cancel_event = threading.Event()
+    parser.cancel_event.set()
+    lexical_analyzer = LexicalAnalyzer(single_pass=True, compact=True)
+    lexical_analyzer.tokenizeInput(SOURCE)
+    with self.assertRaises(JobCancelled):
+      parser.parse(lexical_analyzer.getOutput())
+
+  def test_submitting_replaces_the_current_job(self):
+    started = threading.Event()
+    replaced = self.worker.submit(compile_job, SOURCE, started)
+    self.assertTrue(started.wait(5))
+
+    self.worker.submit(lambda job: job.post("output", "second"))
+    self.assertTrue(replaced.cancelled)
+    self.assertTrue(replaced.cancel_event.is_set())
+    self.assertEqual(self.messages(), [("output", ("second",)), ("finished", ())])
+
+  def test_messages_keep_their_order(self):
+    def job_function(job):
+      for index in range(100):
+        job.post("output", index)
+      raise ValueError("failed")
+
+    self.worker.submit(job_function)
+    messages = self.messages()
+    self.assertEqual(messages[:100], [("output", (index,)) for index in range(100)])
+    self.assertEqual([kind for kind, _ in messages[100:]], ["error", "finished"])
+    self.assertIsInstance(messages[100][1][0], ValueError)
+
+  def test_ask_waits_for_the_reply(self):
+    def job_function(job):
+      job.post("output", job.ask("input", "x", "INT"))
+
+    self.worker.submit(job_function)
+    deadline = time.monotonic() + 5
+    messages = []
+    while not messages and time.monotonic() < deadline:
+      messages = self.worker.poll()
+      time.sleep(0.001)
+    self.assertEqual(messages, [("input", ("x", "INT"))])
+    self.worker.reply("5")
+    self.assertEqual(self.messages(), [("output", ("5",)), ("finished", ())])
+
+if __name__ == "__main__":
+  unittest.main()
@@ -1,7 +1,14 @@
+from array import array
+from collections.abc import Mapping, Sequence
+
+# Names of the tokens produced by the lexical analyzer, the code of a token is its index in this tuple
+TOKEN_NAMES = ("IOL", "LOI", "IDENT", "IS", "INTO", "BEG", "PRINT", "NEWLN", "INT_LIT", "ADD", "SUB", "MULT", "DIV", "MOD", "INT", "STR", "ERROR")
+TOKEN_CODES = {name: code for code, name in enumerate(TOKEN_NAMES)}
+
 class Tokens:
   def __init__(self):
     self.tokens = []
-  
+
   def add_token(self, name, value = None):
     self.tokens.append({
       "name": name,
@@ -10,4 +17,81 @@ class Tokens:
 
   def get_tokens(self):
     return self.tokens
-  
\ No newline at end of file
+
+class TokenLine(Sequence):
+  """
+    Read-only view of the tokens of one line in a TokenStream.
+    Each token is returned as a {"name": ..., "value": ...} dictionary, the same as Tokens.get_tokens().
+  """
+  __slots__ = ("stream", "start", "stop")
+
+  def __init__(self, stream, start: int, stop: int):
+    self.stream = stream
+    self.start = start
+    self.stop = stop
+
+  def __len__(self):
+    return self.stop - self.start
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return [self[i] for i in range(*index.indices(len(self)))]
+    if index < 0:
+      index += len(self)
+    if not 0 <= index < len(self):
+      raise IndexError("token index out of range")
+    return self.stream.get_token(self.start + index)
+
+  def __iter__(self):
+    for position in range(self.start, self.stop):
+      yield self.stream.get_token(position)
+
+class TokenStream(Mapping):
+  """
+    Compact container for the tokens of a whole program.
+    Token kinds are stored as codes in an array, values as indices into a table of unique values,
+    and the start of every line in an offset index.
+    Behaves like the line number -> token list dictionary of the lexical analyzer, so the parser and runtime can iterate it.
+  """
+  def __init__(self):
+    self.kinds = array("B") # Token code of each token
+    self.value_ids = array("I") # Index of the value of each token in the value table
+    self.value_table = [None] # Unique token values, keywords use the None entry
+    self.value_index = {None: 0} # Value -> index in the value table
+    self.line_offsets = array("I", [0]) # Position of the first token of each line, followed by the end position
+
+  def add_token(self, name, value = None):
+    """
+      Appends a token to the current line.
+    """
+    value_id = self.value_index.get(value)
+    if value_id is None: # Intern the value in the value table
+      value_id = len(self.value_table)
+      self.value_index[value] = value_id
+      self.value_table.append(value)
+
+    self.kinds.append(TOKEN_CODES[name])
+    self.value_ids.append(value_id)
+
+  def end_line(self):
+    """
+      Closes the current line, the next tokens are added to a new line.
+    """
+    self.line_offsets.append(len(self.kinds))
+
+  def get_token(self, position: int):
+    """
+      Gets the token at the given position of the stream as a dictionary.
+    """
+    return {"name": TOKEN_NAMES[self.kinds[position]], "value": self.value_table[self.value_ids[position]]}
+
+  def __getitem__(self, line_number):
+    if not isinstance(line_number, int) or not 1 <= line_number < len(self.line_offsets):
+      raise KeyError(line_number)
+    return TokenLine(self, self.line_offsets[line_number - 1], self.line_offsets[line_number])
+
+  def __iter__(self):
+    return iter(range(1, len(self.line_offsets)))
+
+  def __len__(self):
+    return len(self.line_offsets) - 1
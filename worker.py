@@ -0,0 +1,131 @@
+import queue
+import threading
+
+from cancellation import JobCancelled # Raised by the jobs, and by the phases checking their cancel event
+
+_CANCELLED = object() # Reply that wakes up a cancelled job waiting in Job.ask
+
+class Job:
+  """
+    Handle of a function running on the thread of a BackgroundWorker.
+    The job posts messages for the main thread and checks whether it has been cancelled between its steps.
+    Long loops that do not post messages check cancel_event themselves, it is set when the job is cancelled.
+  """
+  def __init__(self, worker, generation: int):
+    self.worker = worker
+    self.generation = generation # Number of the submission that started the job
+    self.replies = queue.Queue() # Answers of the main thread to ask
+    self.cancel_event = threading.Event()
+
+  @property
+  def cancelled(self):
+    return self.generation != self.worker.generation
+
+  def check(self):
+    """
+      Stops the job if it has been cancelled.
+    """
+    if self.cancelled:
+      raise JobCancelled()
+
+  def post(self, kind: str, *data):
+    """
+      Posts a message for the main thread, which gets it from BackgroundWorker.poll.
+      @param kind: The kind of the message.
+      @param data: The content of the message.
+    """
+    self.worker.messages.put((self.generation, kind, data))
+
+  def ask(self, kind: str, *data):
+    """
+      Posts a message and waits until the main thread answers it with BackgroundWorker.reply.
+    """
+    self.post(kind, *data)
+    reply = self.replies.get()
+    if reply is _CANCELLED:
+      raise JobCancelled()
+    return reply
+
+class BackgroundWorker:
+  """
+    Runs functions one at a time on a daemon thread, so the Tk main loop keeps handling events while they run.
+    Submitting a function cancels the current job, and the messages of cancelled jobs are never returned by poll.
+    The methods are called from the main thread, the functions only talk to it through their Job.
+  """
+  def __init__(self):
+    self.generation = 0 # Number of the last submission, a job is cancelled once it is no longer the last one
+    self.current_job = None
+    self.jobs = queue.Queue() # (job, function, arguments) waiting for the worker thread
+    self.messages = queue.Queue() # (generation, kind, data) posted by the jobs
+
+    self.thread = threading.Thread(target=self._work, name="BackgroundWorker", daemon=True)
+    self.thread.start()
+
+  def submit(self, function, *args):
+    """
+      Cancels the current job and runs function(job, *args) on the worker thread.
+      Exceptions raised by the function are posted as an "error" message.
+    """
+    self.cancel()
+    self.current_job = Job(self, self.generation)
+    self.jobs.put((self.current_job, function, args))
+    return self.current_job
+
+  def cancel(self):
+    """
+      Cancels the current job, it stops at its next check and its pending messages are dropped.
+    """
+    self.generation += 1
+    if self.current_job is not None:
+      self.current_job.cancel_event.set()
+      self.current_job.replies.put(_CANCELLED) # Wake it up if it is waiting for an answer
+      self.current_job = None
+
+  @property
+  def busy(self):
+    """
+      Whether a job was submitted and has not finished or been cancelled yet.
+    """
+    return self.current_job is not None
+
+  def reply(self, value):
+    """
+      Answers the message the current job is waiting for in Job.ask.
+    """
+    if self.current_job is not None:
+      self.current_job.replies.put(value)
+
+  def poll(self):
+    """
+      Gets the (kind, data) messages posted by the current job since the last call, without waiting.
+      The last message of a job is "finished", after an "error" message if the job raised an exception.
+    """
+    messages = []
+    while True:
+      try:
+        generation, kind, data = self.messages.get_nowait()
+      except queue.Empty:
+        return messages
+
+      if generation != self.generation: # Posted by a cancelled job
+        continue
+      if kind == "finished":
+        self.current_job = None
+      messages.append((kind, data))
+
+  def _work(self):
+    """
+      Runs the submitted jobs in order, skipping the ones cancelled before they started.
+    """
+    while True:
+      job, function, args = self.jobs.get()
+      if job.cancelled:
+        continue
+
+      try:
+        function(job, *args)
+      except JobCancelled:
+        continue
+      except Exception as error:
+        job.post("error", error)
+      job.post("finished")